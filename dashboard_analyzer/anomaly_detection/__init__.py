@@ -7,6 +7,7 @@ aggregation periods and detection modes.
 
 from .anomaly_tree import AnomalyTree, AnomalyNode, Anomaly
 from .flexible_detector import FlexibleAnomalyDetector
+from .nps_matrix import NPSMatrix, AnomalyGrid
 from .flexible_anomaly_interpreter import FlexibleAnomalyInterpreter
 
 __all__ = [
@@ -14,5 +15,7 @@ __all__ = [
     'AnomalyNode', 
     'Anomaly',
     'FlexibleAnomalyDetector',
+    'NPSMatrix',
+    'AnomalyGrid',
     'FlexibleAnomalyInterpreter'
 ] 
\ No newline at end of file
@@ -67,6 +67,15 @@ class AnomalyTree:
         self.nodes: Dict[str, AnomalyNode] = {}
         self.dates: List[str] = []
         
+        # Date-indexed arrays aligned across nodes (rows: self.dates, columns: self.node_paths)
+        self.node_paths: List[str] = []
+        self.date_index: Dict[str, int] = {}
+        self.nps: Optional[np.ndarray] = None
+        self.responses: Optional[np.ndarray] = None
+        self.has_row: Optional[np.ndarray] = None
+        self.baselines: Optional[np.ndarray] = None  # Mean NPS of the window ending at each date
+        self.baseline_ready: Optional[np.ndarray] = None  # Node has a full window up to the date
+        
     def build_tree_structure(self):
         """Build the tree structure based on the README hierarchy"""
         # Create root node
@@ -132,80 +141,123 @@ class AnomalyTree:
                         df = df.sort_values('Date')
                         node.data = df
                         loaded_nodes += 1
-                        
-                        # Update global dates list
-                        if not self.dates:
-                            self.dates = df['Date'].dt.strftime('%Y-%m-%d').tolist()
                             
                 except Exception as e:
                     print(f"⚠️ Error loading data for {node_path}: {e}")
+        
+        self._build_arrays()
                     
         print(f"✅ Loaded data for {loaded_nodes}/{len(self.nodes)} nodes")
         print(f"📅 Date range: {len(self.dates)} days ({self.dates[0]} to {self.dates[-1]})")
         
+    def _build_arrays(self):
+        """Align the daily NPS and Responses of all nodes on one date axis"""
+        node_days = {}
+        for node_path, node in self.nodes.items():
+            if node.data is not None and not node.data.empty:
+                days = node.data['Date'].dt.strftime('%Y-%m-%d')
+                first = ~days.duplicated()  # A repeated date keeps its first row
+                node_days[node_path] = (days[first], node.data[first])
+        
+        self.node_paths = list(self.nodes.keys())
+        self.dates = sorted(set().union(*(set(days) for days, _ in node_days.values())))
+        self.date_index = {date: row for row, date in enumerate(self.dates)}
+        
+        shape = (len(self.dates), len(self.node_paths))
+        self.nps = np.full(shape, np.nan)
+        self.responses = np.full(shape, np.nan)
+        self.has_row = np.zeros(shape, dtype=bool)
+        self.baselines = None
+        self.baseline_ready = None
+        
+        for column, node_path in enumerate(self.node_paths):
+            if node_path not in node_days:
+                continue
+            days, df = node_days[node_path]
+            rows = days.map(self.date_index).to_numpy()
+            self.has_row[rows, column] = True
+            self.nps[rows, column] = pd.to_numeric(df['NPS'], errors='coerce').to_numpy(dtype=float)
+            if 'Responses' in df.columns:
+                self.responses[rows, column] = pd.to_numeric(df['Responses'], errors='coerce').to_numpy(dtype=float)
+            else:
+                self.responses[rows, column] = 0.0
+        
     def calculate_moving_averages(self, window_days: int = 7):
-        """Calculate mean of last 7 days for each node"""
+        """Calculate, for every date and node, the mean NPS of the node's last window_days days up to that date"""
         print(f"📈 Calculating mean of last {window_days} days...")
         
-        for node_path, node in self.nodes.items():
-            if node.data is not None and len(node.data) >= window_days:
-                # Get the last 7 days of data
-                last_7_days = node.data.tail(window_days)
-                
-                # Calculate the mean of these last 7 days
-                mean_last_7_days = last_7_days['NPS'].mean()
+        if self.has_row is None:
+            self._build_arrays()
+        
+        # Rows of each node up to every date; a window is the node's last window_days rows,
+        # so each node's rows are packed to the top to make its windows contiguous
+        row_number = np.cumsum(self.has_row, axis=0)
+        order = np.argsort(~self.has_row, axis=0, kind='stable')
+        packed = np.take_along_axis(np.where(self.has_row, self.nps, np.nan), order, axis=0)
+        
+        window_sum = np.zeros(packed.shape)
+        window_count = np.zeros(packed.shape)
+        # Oldest day of the window first, the same summation order as the per-node mean
+        for offset in reversed(range(min(window_days, len(packed)))):
+            shifted = packed[:len(packed) - offset]
+            valid = ~np.isnan(shifted)
+            window_sum[offset:] += np.where(valid, shifted, 0.0)
+            window_count[offset:] += valid
+        with np.errstate(invalid='ignore', divide='ignore'):
+            packed_means = window_sum / window_count  # NaN when the window has no NPS values
+        
+        last_row = np.maximum(row_number - 1, 0)
+        self.baselines = np.take_along_axis(packed_means, last_row, axis=0) if len(packed) else packed_means
+        self.baseline_ready = row_number >= window_days
                 
-                # Store this mean for later comparison
-                node.data['mean_last_7_days'] = mean_last_7_days
-                
-    def detect_daily_anomalies(self, threshold: float = 5.0, min_sample_size: int = 5):
-        """Detect anomalies for each of the last 7 days comparing with their mean"""
-        print(f"🔍 Detecting anomalies in last 7 days (threshold: ±{threshold} points, min sample: {min_sample_size} responses)...")
+    def detect_daily_anomalies(self, threshold: float = 5.0, min_sample_size: int = 5, last_days: int = 7, rolling: bool = False):
+        """
+        Detect anomalies for each of the last days comparing with their mean
+        
+        Args:
+            threshold: NPS points from the mean that make a day anomalous
+            min_sample_size: Minimum responses of a day (fewer are marked "S")
+            last_days: Number of most recent dates analyzed
+            rolling: Compare each date with the window ending at that date instead of
+                the window ending at the latest date
+        """
+        print(f"🔍 Detecting anomalies in last {last_days} days (threshold: ±{threshold} points, min sample: {min_sample_size} responses)...")
         
         # Dictionary to store anomaly states for each day
         self.daily_anomalies: Dict[str, Dict[str, str]] = {}  # date -> {node_path -> anomaly_state}
+        if not self.dates:
+            return
         
-        # Only analyze the last 7 days
-        last_7_dates = self.dates[-7:] if len(self.dates) >= 7 else self.dates
-        
-        for date in last_7_dates:
-            self.daily_anomalies[date] = {}
-            
-            for node_path, node in self.nodes.items():
-                if node.data is not None and hasattr(node.data, 'mean_last_7_days'):
-                    # Find data for this specific date
-                    day_data = node.data[node.data['Date'].dt.strftime('%Y-%m-%d') == date]
-                    
-                    if not day_data.empty:
-                        current_nps = day_data.iloc[0]['NPS']
-                        responses = day_data.iloc[0]['Responses'] if 'Responses' in day_data.columns else 0
-                        
-                        # Check minimum sample size
-                        if responses < min_sample_size:
-                            self.daily_anomalies[date][node_path] = "S"  # S = insufficient Sample
-                            # Mark the node as having insufficient sample for this date
-                            if not hasattr(node, 'insufficient_sample_dates'):
-                                node.insufficient_sample_dates = set()
-                            node.insufficient_sample_dates.add(date)
-                        else:
-                            mean_last_7_days = node.data['mean_last_7_days'].iloc[0]  # This is the same for all rows
-                            deviation = current_nps - mean_last_7_days
-                            
-                            # Determine anomaly state based on README criteria
-                            if deviation >= threshold:
-                                anomaly_state = "+"
-                            elif deviation <= -threshold:
-                                anomaly_state = "-"
-                            else:
-                                anomaly_state = "N"
-                                
-                            self.daily_anomalies[date][node_path] = anomaly_state
-                    else:
-                        # No data for this date
-                        self.daily_anomalies[date][node_path] = "?"
-                else:
-                    # No data or insufficient history
-                    self.daily_anomalies[date][node_path] = "?"
+        selected = slice(max(len(self.dates) - last_days, 0), len(self.dates))
+        analyzed_dates = self.dates[selected]
+        has_row = self.has_row[selected]
+        if self.baselines is None:
+            # Moving averages not calculated: no node has a baseline
+            baselines = np.full(has_row.shape, np.nan)
+            ready = np.zeros(has_row.shape, dtype=bool)
+        elif rolling:
+            baselines = self.baselines[selected]
+            ready = self.baseline_ready[selected]
+        else:
+            baselines = np.broadcast_to(self.baselines[-1], has_row.shape)
+            ready = np.broadcast_to(self.baseline_ready[-1], has_row.shape)
+        
+        with np.errstate(invalid='ignore'):
+            deviation = self.nps[selected] - baselines
+            # Determine anomaly state based on README criteria (S = insufficient Sample, ? = no data or history)
+            states = np.select(
+                [~ready | ~has_row, self.responses[selected] < min_sample_size, deviation >= threshold, deviation <= -threshold],
+                ["?", "S", "+", "-"],
+                default="N"
+            )
+        
+        for row, date in enumerate(analyzed_dates):
+            self.daily_anomalies[date] = dict(zip(self.node_paths, states[row].tolist()))
+        
+        # Mark the nodes with insufficient sample on each date
+        for column, node_path in enumerate(self.node_paths):
+            for row in np.flatnonzero(states[:, column] == "S"):
+                self.nodes[node_path].insufficient_sample_dates.add(analyzed_dates[row])
         
     def print_collapsed_tree(self, date: str):
         """Print collapsed tree view for a specific date"""
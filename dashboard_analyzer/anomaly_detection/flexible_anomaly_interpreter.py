@@ -3,9 +3,12 @@ from datetime import datetime, timedelta
 from pathlib import Path
 import pandas as pd
 import asyncio
+import os
 
 from .anomaly_interpreter import AnomalyInterpreter
 from ..data_collection.pbi_collector import PBIDataCollector
+from ..data_collection.data_plane import get_data_plane
+from ..anomaly_explanation.genai_core.utils.llm_scheduler import get_llm_scheduler
 from ..anomaly_explanation.data_analyzer import OperationalDataAnalyzer
 from ..anomaly_explanation.routes_analyzer import RoutesAnalyzer
 
@@ -42,39 +45,45 @@ class FlexibleAnomalyInterpreter:
     def _initialize_causal_agent(self, causal_filter: str = None, comparison_start_date: datetime = None, comparison_end_date: datetime = None, study_mode: str = None):
         """Initialize the causal agent with the correct filter"""
         if self.explanation_mode == "agent" and not self._agent_initialized:
-            try:
-                from ..anomaly_explanation.genai_core.agents.causal_explanation_agent import CausalExplanationAgent
-                from ..anomaly_explanation.genai_core.utils.enums import LLMType, get_default_llm_type
-                
-                # Use the provided causal_filter or fall back to instance variable
-                agent_causal_filter = causal_filter if causal_filter else self.causal_filter
-                agent_comparison_start_date = comparison_start_date if comparison_start_date else self.comparison_start_date
-                agent_comparison_end_date = comparison_end_date if comparison_end_date else self.comparison_end_date
-                
-                # Use the study_mode passed from main.py, or determine based on causal_filter as fallback
-                if study_mode:
-                    agent_study_mode = study_mode
-                elif agent_causal_filter is None:
-                    agent_study_mode = "single"
-                else:
-                    agent_study_mode = "comparative"
-                
-                self.causal_agent = CausalExplanationAgent(
-                    llm_type=get_default_llm_type(), 
-                    silent_mode=self.silent_mode, 
-                    detection_mode=self.detection_mode, 
-                    causal_filter=agent_causal_filter, 
-                    comparison_start_date=agent_comparison_start_date, 
-                    comparison_end_date=agent_comparison_end_date,
-                    study_mode=agent_study_mode
-                )
-                self._agent_initialized = True
-                if not self.silent_mode:
-                    print(f"🤖 Causal Explanation Agent initialized with filter: {agent_causal_filter}")
-            except ImportError as e:
-                print(f"⚠️  Agent mode requested but failed to initialize: {e}")
-                print("🔄 Falling back to raw mode")
-                self.explanation_mode = "raw"
+            self.causal_agent = self._create_causal_agent(causal_filter, comparison_start_date, comparison_end_date, study_mode)
+            self._agent_initialized = self.causal_agent is not None
+    
+    def _create_causal_agent(self, causal_filter: str = None, comparison_start_date: datetime = None, comparison_end_date: datetime = None, study_mode: str = None):
+        """Create a new causal agent (each investigation gets its own tracker and collected data)"""
+        try:
+            from ..anomaly_explanation.genai_core.agents.causal_explanation_agent import CausalExplanationAgent
+            from ..anomaly_explanation.genai_core.utils.enums import LLMType, get_default_llm_type
+            
+            # Use the provided causal_filter or fall back to instance variable
+            agent_causal_filter = causal_filter if causal_filter else self.causal_filter
+            agent_comparison_start_date = comparison_start_date if comparison_start_date else self.comparison_start_date
+            agent_comparison_end_date = comparison_end_date if comparison_end_date else self.comparison_end_date
+            
+            # Use the study_mode passed from main.py, or determine based on causal_filter as fallback
+            if study_mode:
+                agent_study_mode = study_mode
+            elif agent_causal_filter is None:
+                agent_study_mode = "single"
+            else:
+                agent_study_mode = "comparative"
+            
+            causal_agent = CausalExplanationAgent(
+                llm_type=get_default_llm_type(), 
+                silent_mode=self.silent_mode, 
+                detection_mode=self.detection_mode, 
+                causal_filter=agent_causal_filter, 
+                comparison_start_date=agent_comparison_start_date, 
+                comparison_end_date=agent_comparison_end_date,
+                study_mode=agent_study_mode
+            )
+            if not self.silent_mode:
+                print(f"🤖 Causal Explanation Agent initialized with filter: {agent_causal_filter}")
+            return causal_agent
+        except ImportError as e:
+            print(f"⚠️  Agent mode requested but failed to initialize: {e}")
+            print("🔄 Falling back to raw mode")
+            self.explanation_mode = "raw"
+            return None
         
     async def explain_anomaly(self, node_path: str, target_period: int, aggregation_days: int, 
                             anomaly_state: str = None, start_date: datetime = None, end_date: datetime = None, anomaly_magnitude: float = None, nps_context: str = "", causal_filter: str = "vs L7d", comparison_start_date: datetime = None, comparison_end_date: datetime = None) -> str:
@@ -102,12 +111,6 @@ class FlexibleAnomalyInterpreter:
         # Update instance variables with the passed parameters
         print(f"         🔍 DEBUG: explain_anomaly called with causal_filter: '{causal_filter}'")
         
-        # Always reinitialize the causal agent completely for each analysis
-        if self.explanation_mode == "agent":
-            print(f"         🔄 Forcing complete causal agent reinitialization for segment: {node_path}")
-            self.causal_agent = None
-            self._agent_initialized = False
-        
         if causal_filter:
             self.causal_filter = causal_filter
         if comparison_start_date:
@@ -115,31 +118,19 @@ class FlexibleAnomalyInterpreter:
         if comparison_end_date:
             self.comparison_end_date = comparison_end_date
         
-        # Initialize or update the causal agent with the correct filter
+        # Always create a fresh causal agent for each analysis. It is kept local so that
+        # concurrent explain_anomaly calls never share a tracker or collected data.
+        causal_agent = None
         if self.explanation_mode == "agent":
-            print(f"         🔍 DEBUG: Agent init check - _agent_initialized: {self._agent_initialized}")
-            if not self._agent_initialized:
-                print(f"         🔍 DEBUG: Initializing causal agent with causal_filter: '{causal_filter}'")
-                # Use the study_mode from the instance if available, otherwise determine from causal_filter
-                if hasattr(self, 'study_mode') and self.study_mode:
-                    study_mode = self.study_mode
-                else:
-                    study_mode = "single" if causal_filter is None else "comparative"
-                self._initialize_causal_agent(causal_filter, comparison_start_date, comparison_end_date, study_mode)
-            elif self.causal_agent and causal_filter and self.causal_agent.causal_filter != causal_filter:
-                print(f"         🔍 DEBUG: Recreating causal agent - filter changed from '{self.causal_agent.causal_filter}' to '{causal_filter}'")
-                # Recreate the agent with the correct filter
-                self._agent_initialized = False
+            print(f"         🔄 Creating a dedicated causal agent for segment: {node_path} (causal_filter: '{causal_filter}')")
+            # Use the study_mode from the instance if available, otherwise determine from causal_filter
+            if self.study_mode:
+                study_mode = self.study_mode
+            else:
                 study_mode = "single" if causal_filter is None else "comparative"
-                self._initialize_causal_agent(causal_filter, comparison_start_date, comparison_end_date, study_mode)
-            elif self.causal_agent and causal_filter:
-                print(f"         🔍 DEBUG: Updating causal agent filter from '{self.causal_agent.causal_filter}' to '{causal_filter}'")
-                self.causal_agent.causal_filter = causal_filter
-                self.causal_agent.comparison_start_date = comparison_start_date
-                self.causal_agent.comparison_end_date = comparison_end_date
-                # Update study_mode based on causal_filter (but respect the original study_mode if it was set)
-                if not hasattr(self.causal_agent, 'study_mode') or self.causal_agent.study_mode is None:
-                    self.causal_agent.study_mode = "single" if causal_filter is None else "comparative"
+            causal_agent = self._create_causal_agent(causal_filter, comparison_start_date, comparison_end_date, study_mode)
+            self.causal_agent = causal_agent
+            self._agent_initialized = causal_agent is not None
         
         try:
             # 1. Get the date range - use direct dates if provided, otherwise map period
@@ -163,7 +154,7 @@ class FlexibleAnomalyInterpreter:
                 anomaly_type = "negative"
             
             # 3. Choose explanation method based on mode
-            if self.explanation_mode == "agent" and self.causal_agent:
+            if self.explanation_mode == "agent" and causal_agent:
                 # Agent mode: Use intelligent causal analysis
                 print(f"         🤖 Running agent-based causal investigation...")
                 
@@ -188,7 +179,7 @@ class FlexibleAnomalyInterpreter:
                 # Calculate final magnitude
                 final_magnitude = anomaly_magnitude if anomaly_magnitude is not None else 0.0
                 
-                explanation = await self.causal_agent.investigate_anomaly(
+                explanation = await causal_agent.investigate_anomaly(
                     node_path=node_path,
                     start_date=start_date.strftime('%Y-%m-%d'),
                     end_date=end_date.strftime('%Y-%m-%d'),
@@ -243,7 +234,52 @@ class FlexibleAnomalyInterpreter:
             error_msg = f"Error generating explanation for {node_path} period {target_period}: {str(e)}"
             print(f"❌ {error_msg}")
             return error_msg
-    
+
+    async def explain_anomalies(self, node_requests: Dict[str, Dict[str, Any]], timeout: float = 1500.0,
+                                max_parallel_nodes: int = None) -> Dict[str, str]:
+        """
+        Explain several anomalous nodes concurrently
+
+        Each node gets its own causal agent; LLM calls and Power BI/S3 pulls are capped
+        by the shared concurrency budgets, so only the node fan-out is limited here.
+        Nodes of the same period share one data plane scope: raw tool data is fetched
+        once for all of them and evicted when the last one finishes.
+
+        Args:
+            node_requests: node_path -> explain_anomaly keyword arguments (in tree order)
+            timeout: Timeout per node in seconds, counted from when the node starts
+            max_parallel_nodes: Nodes investigated at once (default INVESTIGATION_MAX_PARALLEL_NODES or 3)
+
+        Returns:
+            node_path -> explanation in the same order as node_requests
+            ("Analysis timeout" for nodes that timed out or failed)
+        """
+        if max_parallel_nodes is None:
+            max_parallel_nodes = int(os.getenv("INVESTIGATION_MAX_PARALLEL_NODES", "3"))
+        node_slots = asyncio.Semaphore(max(1, max_parallel_nodes))
+
+        data_plane = get_data_plane()
+
+        async def explain_node(node_path: str, kwargs: Dict[str, Any]) -> str:
+            # The scope is held while waiting for a slot so it is not evicted between nodes
+            scope_key = (kwargs.get('target_period'), kwargs.get('aggregation_days'),
+                         kwargs.get('start_date'), kwargs.get('end_date'))
+            async with data_plane.scope(scope_key):
+                async with node_slots:
+                    try:
+                        return await asyncio.wait_for(
+                            self.explain_anomaly(node_path=node_path, **kwargs),
+                            timeout=timeout
+                        )
+                    except Exception:
+                        return "Analysis timeout"
+
+        node_paths = list(node_requests.keys())
+        results = await asyncio.gather(*(explain_node(node_path, node_requests[node_path]) for node_path in node_paths))
+        if self.explanation_mode == "agent" and node_paths:
+            get_llm_scheduler().print_report()
+        return dict(zip(node_paths, results))
+
     def _get_period_date_range(self, target_period: int, aggregation_days: int) -> Tuple[datetime, datetime]:
         """
         Get the start and end dates for a specific period
@@ -0,0 +1,120 @@
+"""
+Flexible Dataset
+Flexible NPS CSVs of a data folder parsed once, indexed by Period_Group and
+reloaded only when a file changes on disk
+"""
+
+import pandas as pd
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from .nps_matrix import NPSMatrix
+
+# Node paths mapping: logical_path -> folder_name
+NODE_FOLDERS = {
+    "Global": "Global",
+    "Global/LH": "Global_LH",
+    "Global/LH/Economy": "Global_LH_Economy",
+    "Global/LH/Business": "Global_LH_Business",
+    "Global/LH/Premium": "Global_LH_Premium",
+    "Global/SH": "Global_SH",
+    "Global/SH/Economy": "Global_SH_Economy",
+    "Global/SH/Business": "Global_SH_Business",
+    "Global/SH/Economy/IB": "Global_SH_Economy_IB",
+    "Global/SH/Economy/YW": "Global_SH_Economy_YW",
+    "Global/SH/Business/IB": "Global_SH_Business_IB",
+    "Global/SH/Business/YW": "Global_SH_Business_YW"
+}
+
+
+class FlexibleDataset:
+    """Per-node flexible NPS data of one folder, with Period_Group lookups and the NPS matrix"""
+
+    def __init__(self, data_folder: str, aggregation_days: int):
+        self.data_folder = Path(data_folder)
+        self.aggregation_days = aggregation_days
+        self.node_data: Dict[str, pd.DataFrame] = {}
+        self.periods: List[int] = []
+        self._period_rows: Dict[str, Dict[int, pd.DataFrame]] = {}
+        self._matrix: Optional[NPSMatrix] = None
+        self._signature = self._file_signature()
+        self._load()
+
+    def _files(self) -> Dict[str, Path]:
+        return {
+            logical_path: self.data_folder / folder_name / f'flexible_NPS_{self.aggregation_days}d.csv'
+            for logical_path, folder_name in NODE_FOLDERS.items()
+        }
+
+    def _file_signature(self) -> Tuple:
+        """(node, mtime, size) of every existing CSV - changes whenever a file is rewritten, added or removed"""
+        signature = []
+        for logical_path, path in self._files().items():
+            try:
+                stat = path.stat()
+                signature.append((logical_path, stat.st_mtime_ns, stat.st_size))
+            except FileNotFoundError:
+                continue
+        return tuple(signature)
+
+    def is_stale(self) -> bool:
+        """Whether any CSV changed since the dataset was loaded"""
+        return self._file_signature() != self._signature
+
+    def _load(self):
+        """Parse every node CSV once and index the rows by Period_Group"""
+        for logical_path, flexible_file in self._files().items():
+            if not flexible_file.exists():
+                continue
+            try:
+                df = pd.read_csv(flexible_file)
+                if not df.empty:
+                    self.node_data[logical_path] = df
+            except Exception as e:
+                print(f"❌ Error loading {logical_path}: {e}")
+
+        print(f"📊 Loaded {len(self.node_data)}/{len(NODE_FOLDERS)} segments")
+
+        all_periods = set()
+        for logical_path, df in self.node_data.items():
+            if 'Period_Group' not in df.columns:
+                continue
+            self._period_rows[logical_path] = {period: rows for period, rows in df.groupby('Period_Group', sort=False)}
+            # Only include periods that have valid NPS data (2024 or 2025)
+            valid_periods = df[
+                (df['NPS_2025'].notna()) | (df['NPS_2024'].notna())
+            ]['Period_Group'].unique()
+            all_periods.update(valid_periods)
+
+        # Sort periods in ascending order (period 1 = most recent)
+        self.periods = sorted(list(all_periods))
+
+    def period_rows(self, node_path: str, period: int) -> pd.DataFrame:
+        """Rows of a node for one period (empty DataFrame if there are none)"""
+        rows = self._period_rows.get(node_path, {}).get(period)
+        if rows is None:
+            return self.node_data.get(node_path, pd.DataFrame()).iloc[0:0]
+        return rows
+
+    @property
+    def matrix(self) -> NPSMatrix:
+        """Node x period NPS matrix, built on first use"""
+        if self._matrix is None:
+            self._matrix = NPSMatrix.from_node_frames(self.node_data)
+        return self._matrix
+
+
+_datasets: Dict[Tuple[str, int], FlexibleDataset] = {}
+_datasets_lock = threading.Lock()
+
+
+def get_flexible_dataset(data_folder: str, aggregation_days: int) -> FlexibleDataset:
+    """Get the loaded dataset for a folder, reloading it if any of its CSVs changed"""
+    key = (str(Path(data_folder).resolve()), aggregation_days)
+    with _datasets_lock:
+        dataset = _datasets.get(key)
+        if dataset is None or dataset.is_stale():
+            dataset = FlexibleDataset(data_folder, aggregation_days)
+            _datasets[key] = dataset
+        return dataset
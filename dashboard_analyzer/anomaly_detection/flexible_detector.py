@@ -9,6 +9,8 @@ from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 from datetime import datetime, timedelta
 from .anomaly_tree import AnomalyTree, AnomalyNode
+from .nps_matrix import AnomalyGrid, detect_mean_grid, detect_vslast_grid
+from .flexible_dataset import FlexibleDataset, get_flexible_dataset
 
 class FlexibleAnomalyDetector:
     """Enhanced flexible anomaly detector with target-based detection support"""
@@ -63,14 +65,14 @@ class FlexibleAnomalyDetector:
         print(f"📁 Data folder: {data_folder}")
         print(f"🎯 Detection mode: {self.detection_mode}")
         
-        # Load data
-        all_data = self._load_flexible_data(data_folder)
-        if not all_data:
+        # Load data (parsed once per folder, reused until a CSV changes)
+        dataset = self._get_dataset(data_folder)
+        if not dataset.node_data:
             print("❌ No data loaded")
             return {}, {}, [], {}
             
         # Get available periods
-        periods = self._get_available_periods(all_data)
+        periods = dataset.periods
         if not periods:
             print("❌ No valid periods found")
             return {}, {}, [], {}
@@ -89,259 +91,97 @@ class FlexibleAnomalyDetector:
         if self.detection_mode == "target":
             # Use target-based detection
             print(f"🎯 USING TARGET-BASED DETECTION")
-            anomalies, deviations = await self._detect_target_based_anomalies(all_data, latest_period, analysis_date)
+            anomalies, deviations = await self._detect_target_based_anomalies(dataset, latest_period, analysis_date)
             nps_values = {}  # Target mode doesn't store NPS values in the same way
         elif self.detection_mode == "mean":
             # Use mean-based detection
             print(f"📈 USING MEAN-BASED DETECTION")
-            anomalies, deviations, nps_values = self._detect_legacy_anomalies(all_data, latest_period, periods, reference_period)
+            anomalies, deviations, nps_values = self._detect_legacy_anomalies(dataset, latest_period, periods, reference_period)
         else:  # vslast
             # Use vslast detection
             print(f"🔄 USING VSLAST DETECTION")
-            anomalies, deviations, nps_values = self._detect_vslast_anomalies(all_data, latest_period, periods)
+            anomalies, deviations, nps_values = self._detect_vslast_anomalies(dataset, latest_period, periods)
             
         return anomalies, deviations, periods, nps_values
     
     def _load_flexible_data(self, data_folder: str) -> Dict[str, pd.DataFrame]:
         """Load flexible aggregation data for all nodes"""
-        data_folder_path = Path(data_folder)
-        all_data = {}
-        
-        # Define node paths mapping: logical_path -> folder_name
-        node_mapping = {
-            "Global": "Global",
-            "Global/LH": "Global_LH", 
-            "Global/LH/Economy": "Global_LH_Economy", 
-            "Global/LH/Business": "Global_LH_Business", 
-            "Global/LH/Premium": "Global_LH_Premium",
-            "Global/SH": "Global_SH", 
-            "Global/SH/Economy": "Global_SH_Economy", 
-            "Global/SH/Business": "Global_SH_Business",
-            "Global/SH/Economy/IB": "Global_SH_Economy_IB", 
-            "Global/SH/Economy/YW": "Global_SH_Economy_YW",
-            "Global/SH/Business/IB": "Global_SH_Business_IB", 
-            "Global/SH/Business/YW": "Global_SH_Business_YW"
-        }
-        
-        loaded_count = 0
-        for logical_path, folder_name in node_mapping.items():
-            node_folder = data_folder_path / folder_name
-            flexible_file = node_folder / f'flexible_NPS_{self.aggregation_days}d.csv'
+        return self._get_dataset(data_folder).node_data
+    
+    def _get_dataset(self, data_folder: str) -> FlexibleDataset:
+        """Loaded dataset for a folder (parsed once, reloaded when a CSV changes)"""
+        return get_flexible_dataset(data_folder, self.aggregation_days)
+    
+    def _get_mean_baseline_periods(self, all_periods: List[int], reference_period: int = None) -> List[int]:
+        """Baseline window for mean mode: the configured number of periods before the reference (or latest) period"""
+        # The baseline is the same for all target periods analyzed within the same run.
+        # Use reference_period if provided (when date_flight_local is specified), otherwise use the latest period
+        latest_period_for_baseline = reference_period if reference_period is not None else all_periods[0]
+        return [latest_period_for_baseline + i for i in range(1, self.baseline_periods + 1) if (latest_period_for_baseline + i) in all_periods]
+    
+    def detect_anomaly_grid(self, dataset: FlexibleDataset, all_periods: List[int],
+                            target_periods: List[int] = None, reference_period: int = None) -> Optional[AnomalyGrid]:
+        """
+        Detect mean or vslast anomalies for every node and period in one vectorized pass
+        
+        Args:
+            dataset: Loaded flexible NPS data
+            all_periods: Available periods (see FlexibleDataset.periods)
+            target_periods: Periods to score (default: all available periods)
+            reference_period: Optional reference period for the mean baseline
             
-            if flexible_file.exists():
-                try:
-                    df = pd.read_csv(flexible_file)
-                    if not df.empty:
-                        all_data[logical_path] = df
-                        loaded_count += 1
-                except Exception as e:
-                    print(f"❌ Error loading {logical_path}: {e}")
+        Returns:
+            AnomalyGrid with the status/deviation of every node and period, or None in target mode
+            or when there is not enough baseline data
+        """
+        if self.detection_mode not in ("mean", "vslast"):
+            return None
         
-        print(f"📊 Loaded {loaded_count}/{len(node_mapping)} segments")
-        return all_data
-    
-    def _get_available_periods(self, all_data: Dict[str, pd.DataFrame]) -> List[int]:
-        """Get list of available periods that have valid NPS data"""
-        all_periods = set()
-        
-        for node_path, df in all_data.items():
-            if 'Period_Group' in df.columns:
-                # Only include periods that have valid NPS data (2024 or 2025)
-                valid_periods = df[
-                    (df['NPS_2025'].notna()) | (df['NPS_2024'].notna())
-                ]['Period_Group'].unique()
-                all_periods.update(valid_periods)
-        
-        # Sort periods in ascending order (period 1 = most recent)
-        return sorted(list(all_periods))
+        matrix = dataset.matrix
+        periods = [p for p in (target_periods or all_periods) if p in all_periods]
+        
+        if self.detection_mode == "mean":
+            baseline_periods = self._get_mean_baseline_periods(all_periods, reference_period)
+            if len(baseline_periods) < 3:
+                return None
+            return detect_mean_grid(matrix, periods, baseline_periods, self.min_sample_size, self.baseline_periods)
+        
+        # vslast: only periods whose previous period is available can be compared
+        periods = [p for p in periods if p + 1 in all_periods]
+        return detect_vslast_grid(matrix, periods, self.min_sample_size)
     
-    def _detect_legacy_anomalies(self, all_data: Dict[str, pd.DataFrame], 
+    def _detect_legacy_anomalies(self, dataset: FlexibleDataset, 
                                 target_period: int, all_periods: List[int], reference_period: int = None) -> Tuple[Dict[str, str], Dict[str, float], Dict[str, Dict[str, float]]]:
         """Detect anomalies for a specific period using mean of configurable number of periods as baseline"""
-        anomalies = {}
-        deviations = {}
-        nps_values = {}  # Store actual NPS values for display
-        
-        # FIX: Calculate baseline periods once, independent of the target_period loop
-        # The baseline should be the same for all nodes analyzed within the same run.
-        # Use reference_period if provided (when date_flight_local is specified), otherwise use the latest period
-        latest_period_for_baseline = reference_period if reference_period is not None else all_periods[0]
-        baseline_periods = [latest_period_for_baseline + i for i in range(1, self.baseline_periods + 1) if (latest_period_for_baseline + i) in all_periods]
+        baseline_periods = self._get_mean_baseline_periods(all_periods, reference_period)
         
         if len(baseline_periods) < 3:
             print(f"⚠️ Insufficient baseline data for period {target_period} (need at least 3 periods)")
-            return anomalies, deviations, nps_values
+            return {}, {}, {}
         
         # Only print baseline info once per period  
         print(f"📈 Period {target_period}: baseline mean of periods {baseline_periods} (last {self.baseline_periods} periods relative to latest)")
         
-        for node_path, df in all_data.items():
-            if 'Period_Group' not in df.columns:
-                continue
-            
-            # Get target period data
-            target_data = df[df['Period_Group'] == target_period]
-            if target_data.empty:
-                anomalies[node_path] = "?"
-                continue
-                
-            target_responses = target_data.get('Responses', pd.Series([0])).iloc[0]
-            
-            # Check minimum sample size
-            if target_responses < self.min_sample_size:
-                anomalies[node_path] = "S"  # Insufficient sample
-                continue
-            
-            # Strategy: Try NPS_2025 first, fallback to NPS_2024
-            target_nps = None
-            baseline_avg = None
-            
-            # Try NPS_2025 for target
-            if 'NPS_2025' in df.columns and not pd.isna(target_data['NPS_2025'].iloc[0]):
-                target_nps = target_data['NPS_2025'].iloc[0]
-                
-                # Calculate baseline as mean of specified number of periods using NPS_2025
-                baseline_data = df[df['Period_Group'].isin(baseline_periods)]
-                baseline_nps_values = baseline_data['NPS_2025'].dropna()
-                
-                if len(baseline_nps_values) >= 3:
-                    baseline_avg = baseline_nps_values.mean()
-                else:
-                    # Fallback: Use NPS_2024 baseline for periods 23-74 (2024 data)
-                    nps_2024_periods = df[(df['Period_Group'] >= 23) & (df['Period_Group'] <= 74)]
-                    if len(nps_2024_periods) >= self.baseline_periods:
-                        baseline_avg = nps_2024_periods['NPS_2024'].dropna().tail(self.baseline_periods).mean()
-            
-            # Fallback to NPS_2024 if NPS_2025 not available
-            if target_nps is None and 'NPS_2024' in df.columns and not pd.isna(target_data['NPS_2024'].iloc[0]):
-                target_nps = target_data['NPS_2024'].iloc[0]
-                
-                # Calculate baseline as mean of specified number of periods using NPS_2024
-                baseline_data = df[df['Period_Group'].isin(baseline_periods)]
-                baseline_nps_values = baseline_data['NPS_2024'].dropna()
-                
-                if len(baseline_nps_values) >= 3:
-                    baseline_avg = baseline_nps_values.mean()
-            
-            # Final fallback to NPS_2019
-            if target_nps is None and 'NPS_2019' in df.columns and not pd.isna(target_data['NPS_2019'].iloc[0]):
-                target_nps = target_data['NPS_2019'].iloc[0]
-                baseline_data = df[df['Period_Group'].isin(baseline_periods)]
-                baseline_nps_values = baseline_data['NPS_2019'].dropna()
-                
-                if len(baseline_nps_values) >= 3:
-                    baseline_avg = baseline_nps_values.mean()
-            
-            # Check if we have valid data
-            if target_nps is None or baseline_avg is None:
-                anomalies[node_path] = "?"
-                continue
-            
-            deviation = target_nps - baseline_avg
-            deviations[node_path] = deviation
-            
-            # Store NPS values for display
-            nps_values[node_path] = {
-                'current': target_nps,
-                'baseline': baseline_avg,
-                'deviation': deviation
-            }
-            
-            # Classify anomaly
-            anomalies[node_path] = self._classify_anomaly_new_logic(deviation)
-        
-        return anomalies, deviations, nps_values
+        grid = detect_mean_grid(dataset.matrix, [target_period], baseline_periods, self.min_sample_size, self.baseline_periods)
+        return grid.period_results(target_period)
     
-    def _detect_vslast_anomalies(self, all_data: Dict[str, pd.DataFrame], 
+    def _detect_vslast_anomalies(self, dataset: FlexibleDataset, 
                                 target_period: int, all_periods: List[int]) -> Tuple[Dict[str, str], Dict[str, float], Dict[str, Dict[str, float]]]:
         """Detect anomalies for a specific period using only the previous period as baseline"""
-        anomalies = {}
-        deviations = {}
-        nps_values = {}  # Store actual NPS values for display
-        
         # Use only the immediately previous period as baseline
         previous_period = target_period + 1
         
         if previous_period not in all_periods:
             print(f"⚠️ Previous period {previous_period} not available for comparison with period {target_period}")
-            return anomalies, deviations, nps_values
+            return {}, {}, {}
         
         # Print baseline info once per period  
         print(f"🔄 Period {target_period}: comparing against previous period {previous_period}")
         
-        for node_path, df in all_data.items():
-            if 'Period_Group' not in df.columns:
-                continue
-            
-            # Get target period data
-            target_data = df[df['Period_Group'] == target_period]
-            if target_data.empty:
-                anomalies[node_path] = "?"
-                continue
-                
-            target_responses = target_data.get('Responses', pd.Series([0])).iloc[0]
-            
-            # Check minimum sample size
-            if target_responses < self.min_sample_size:
-                anomalies[node_path] = "S"  # Insufficient sample
-                continue
-            
-            # Get previous period data
-            previous_data = df[df['Period_Group'] == previous_period]
-            if previous_data.empty:
-                anomalies[node_path] = "?"
-                continue
-            
-            # Strategy: Try NPS_2025 first, fallback to NPS_2024
-            target_nps = None
-            previous_nps = None
-            
-            # Try NPS_2025 for both target and previous
-            if 'NPS_2025' in df.columns and not pd.isna(target_data['NPS_2025'].iloc[0]):
-                target_nps = target_data['NPS_2025'].iloc[0]
-                
-                if not pd.isna(previous_data['NPS_2025'].iloc[0]):
-                    previous_nps = previous_data['NPS_2025'].iloc[0]
-                else:
-                    # Fallback: use NPS_2024 for previous period if NPS_2025 not available
-                    if 'NPS_2024' in df.columns and not pd.isna(previous_data['NPS_2024'].iloc[0]):
-                        previous_nps = previous_data['NPS_2024'].iloc[0]
-            
-            # Fallback to NPS_2024 if NPS_2025 not available for target
-            if target_nps is None and 'NPS_2024' in df.columns and not pd.isna(target_data['NPS_2024'].iloc[0]):
-                target_nps = target_data['NPS_2024'].iloc[0]
-                
-                if not pd.isna(previous_data['NPS_2024'].iloc[0]):
-                    previous_nps = previous_data['NPS_2024'].iloc[0]
-            
-            # Final fallback to NPS_2019
-            if target_nps is None and 'NPS_2019' in df.columns and not pd.isna(target_data['NPS_2019'].iloc[0]):
-                target_nps = target_data['NPS_2019'].iloc[0]
-                
-                if not pd.isna(previous_data['NPS_2019'].iloc[0]):
-                    previous_nps = previous_data['NPS_2019'].iloc[0]
-            
-            # Check if we have valid data for both periods
-            if target_nps is None or previous_nps is None:
-                anomalies[node_path] = "?"
-                continue
-            
-            deviation = target_nps - previous_nps
-            deviations[node_path] = deviation
-            
-            # Store NPS values for display
-            nps_values[node_path] = {
-                'current': target_nps,
-                'baseline': previous_nps,
-                'deviation': deviation
-            }
-            
-            # Classify anomaly using same threshold as mean-based detection
-            anomalies[node_path] = self._classify_anomaly_new_logic(deviation)
-        
-        return anomalies, deviations, nps_values
+        grid = detect_vslast_grid(dataset.matrix, [target_period], self.min_sample_size)
+        return grid.period_results(target_period)
     
-    async def _detect_target_based_anomalies(self, all_data: Dict[str, pd.DataFrame], 
+    async def _detect_target_based_anomalies(self, dataset: FlexibleDataset, 
                                           target_period: int, analysis_date) -> Tuple[Dict[str, str], Dict[str, float]]:
         """Detect anomalies using target-based approach"""
         anomalies = {}
@@ -373,12 +213,12 @@ class FlexibleAnomalyDetector:
         
         print(f"🎯 Cached targets: {monthly_targets_for_period}")
         
-        for node_path, df in all_data.items():
+        for node_path, df in dataset.node_data.items():
             if 'Period_Group' not in df.columns:
                 continue
             
             # Get target period data
-            target_data = df[df['Period_Group'] == target_period]
+            target_data = dataset.period_rows(node_path, target_period)
             if target_data.empty:
                 anomalies[node_path] = "?"
                 continue
@@ -426,12 +266,13 @@ class FlexibleAnomalyDetector:
         
         return anomalies, deviations
     
-    def get_period_summary(self, data_folder: str, periods: List[int]) -> pd.DataFrame:
+    async def get_period_summary(self, data_folder: str, periods: List[int]) -> pd.DataFrame:
         """Generate summary table for multiple periods"""
         summary_data = []
         
-        for period in periods[:7]:  # Show last 7 periods
-            anomalies, _, _ = self.analyze_period(data_folder, period)
+        period_results = await self.analyze_periods(data_folder, periods[:7])  # Show last 7 periods
+        for period in periods[:7]:
+            anomalies = period_results[period][0]
             
             positive = sum(1 for a in anomalies.values() if a == "+")
             negative = sum(1 for a in anomalies.values() if a == "-")
@@ -471,14 +312,14 @@ class FlexibleAnomalyDetector:
         print(f"📁 Data folder: {data_folder}")
         print(f"🎯 Detection mode: {self.detection_mode}")
         
-        # Load data
-        all_data = self._load_flexible_data(data_folder)
-        if not all_data:
+        # Load data (parsed once per folder, reused until a CSV changes)
+        dataset = self._get_dataset(data_folder)
+        if not dataset.node_data:
             print("❌ No data loaded")
             return {}, {}, [], {}
             
         # Get available periods
-        periods = self._get_available_periods(all_data)
+        periods = dataset.periods
         if not periods:
             print("❌ No valid periods found")
             return {}, {}, [], {}
@@ -493,19 +334,66 @@ class FlexibleAnomalyDetector:
         if self.detection_mode == "target":
             # Use target-based detection
             print(f"🎯 USING TARGET-BASED DETECTION")
-            anomalies, deviations = await self._detect_target_based_anomalies(all_data, target_period, analysis_date)
+            anomalies, deviations = await self._detect_target_based_anomalies(dataset, target_period, analysis_date)
             nps_values = {}  # Target mode doesn't store NPS values in the same way
         elif self.detection_mode == "mean":
             # Use mean-based detection
             print(f"📈 USING MEAN-BASED DETECTION")
-            anomalies, deviations, nps_values = self._detect_legacy_anomalies(all_data, target_period, periods, reference_period)
+            anomalies, deviations, nps_values = self._detect_legacy_anomalies(dataset, target_period, periods, reference_period)
         else:  # vslast
             # Use vslast detection
             print(f"🔄 USING VSLAST DETECTION")
-            anomalies, deviations, nps_values = self._detect_vslast_anomalies(all_data, target_period, periods)
+            anomalies, deviations, nps_values = self._detect_vslast_anomalies(dataset, target_period, periods)
             
         return anomalies, deviations, periods, nps_values 
 
+    async def analyze_periods(self, data_folder: str, target_periods: List[int], analysis_date=None, reference_period: int = None) -> Dict[int, Tuple[Dict[str, str], Dict[str, float], List[str], Dict[str, Dict[str, float]]]]:
+        """
+        Analyze anomalies for several periods, loading the data once
+        
+        Mean and vslast modes score every period in a single vectorized pass
+        over the node x period matrix; target mode runs per period.
+        
+        Args:
+            data_folder: Path to data folder
+            target_periods: Period numbers to analyze
+            analysis_date: Optional analysis date
+            reference_period: Optional reference period for baseline calculation (when date_flight_local is specified)
+            
+        Returns:
+            Dict of period -> (anomalies, deviations, periods, nps_values), same tuples as analyze_period
+        """
+        if analysis_date is None:
+            analysis_date = datetime.now()
+        
+        print(f"🔍 Analyzing periods {target_periods} for {analysis_date.strftime('%Y-%m-%d')}")
+        print(f"🎯 Detection mode: {self.detection_mode}")
+        
+        dataset = self._get_dataset(data_folder)
+        periods = dataset.periods if dataset.node_data else []
+        if not periods:
+            print("❌ No data loaded or no valid periods found")
+            return {period: ({}, {}, [], {}) for period in target_periods}
+        
+        results = {}
+        if self.detection_mode == "target":
+            for period in target_periods:
+                if period not in periods:
+                    results[period] = ({}, {}, periods, {})
+                    continue
+                anomalies, deviations = await self._detect_target_based_anomalies(dataset, period, analysis_date)
+                results[period] = (anomalies, deviations, periods, {})
+            return results
+        
+        grid = self.detect_anomaly_grid(dataset, periods, target_periods, reference_period)
+        for period in target_periods:
+            if grid is None or period not in periods:
+                results[period] = ({}, {}, periods, {})
+                continue
+            anomalies, deviations, nps_values = grid.period_results(period)
+            results[period] = (anomalies, deviations, periods, nps_values)
+        return results
+
     def _classify_anomaly_new_logic(self, deviation: float) -> str:
         """
         New anomaly classification logic:
@@ -0,0 +1,265 @@
+"""
+NPS Matrix Detection Engine
+Vectorized node x period NPS detection used by the mean and vslast modes
+"""
+
+import pandas as pd
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+
+# Year columns in fallback order: a node/period uses the first one that has a value
+NPS_YEAR_COLUMNS = ['NPS_2025', 'NPS_2024', 'NPS_2019']
+
+# Periods holding 2024 data, used as the fallback baseline for NPS_2025 nodes
+NPS_2024_FALLBACK_PERIODS = (23, 74)
+
+
+class NPSMatrix:
+    """Node x period arrays of responses and NPS per year built from the flexible CSVs"""
+
+    def __init__(self, nodes: List[str], periods: np.ndarray, present: np.ndarray,
+                 responses: np.ndarray, nps: np.ndarray):
+        """
+        Args:
+            nodes: Node paths (row order)
+            periods: Period_Group values in ascending order (column order)
+            present: (nodes, periods) True where the node has a row for the period
+            responses: (nodes, periods) responses; 0 where the column is missing, NaN where the row is
+            nps: (years, nodes, periods) NPS per year column in NPS_YEAR_COLUMNS order
+        """
+        self.nodes = nodes
+        self.periods = periods
+        self.present = present
+        self.responses = responses
+        self.nps = nps
+        self.period_index = {int(period): i for i, period in enumerate(periods)}
+
+    @classmethod
+    def from_node_frames(cls, all_data: Dict[str, pd.DataFrame]) -> 'NPSMatrix':
+        """Build the matrix from per-node flexible NPS DataFrames (nodes without Period_Group are skipped)"""
+        frames = {node: df for node, df in all_data.items() if 'Period_Group' in df.columns}
+        nodes = list(frames.keys())
+
+        all_periods = set()
+        for df in frames.values():
+            all_periods.update(int(p) for p in df['Period_Group'].dropna().unique())
+        periods = np.array(sorted(all_periods), dtype=int)
+        period_index = {period: i for i, period in enumerate(periods)}
+
+        shape = (len(nodes), len(periods))
+        present = np.zeros(shape, dtype=bool)
+        responses = np.full(shape, np.nan)
+        nps = np.full((len(NPS_YEAR_COLUMNS),) + shape, np.nan)
+
+        for row, node in enumerate(nodes):
+            # One row per period; like the original .iloc[0] lookups, the first row wins
+            df = frames[node].dropna(subset=['Period_Group']).drop_duplicates('Period_Group', keep='first')
+            cols = df['Period_Group'].astype(int).map(period_index).to_numpy()
+            present[row, cols] = True
+            if 'Responses' in df.columns:
+                responses[row, cols] = pd.to_numeric(df['Responses'], errors='coerce').to_numpy()
+            else:
+                responses[row, cols] = 0
+            for year, column in enumerate(NPS_YEAR_COLUMNS):
+                if column in df.columns:
+                    nps[year, row, cols] = pd.to_numeric(df[column], errors='coerce').to_numpy()
+
+        return cls(nodes, periods, present, responses, nps)
+
+    def available_periods(self) -> List[int]:
+        """Periods where any node has NPS_2025 or NPS_2024 (same rule as FlexibleDataset.periods)"""
+        valid = (~np.isnan(self.nps[0]) | ~np.isnan(self.nps[1])).any(axis=0)
+        return [int(period) for period in self.periods[valid]]
+
+    def columns_for(self, periods: List[int]) -> np.ndarray:
+        """Column positions of the given periods (all of them must be in the matrix)"""
+        return np.array([self.period_index[p] for p in periods], dtype=int)
+
+    def target_year(self) -> np.ndarray:
+        """(nodes, periods) index of the first year column with a value, -1 if none (vectorized coalesce)"""
+        has_value = ~np.isnan(self.nps)
+        year = np.argmax(has_value, axis=0)
+        return np.where(has_value.any(axis=0), year, -1)
+
+    def target_nps(self, year: np.ndarray) -> np.ndarray:
+        """NPS of each cell taken from the selected year column"""
+        picked = np.take_along_axis(self.nps, np.clip(year, 0, None)[np.newaxis], axis=0)[0]
+        return np.where(year >= 0, picked, np.nan)
+
+
+class AnomalyGrid:
+    """Anomaly status, deviation and NPS values for every node and period"""
+
+    def __init__(self, nodes: List[str], periods: List[int], status: np.ndarray,
+                 current: np.ndarray, baseline: np.ndarray, scored: np.ndarray):
+        """
+        Args:
+            nodes: Node paths (row order)
+            periods: Periods with results (column order)
+            status: (nodes, periods) '+', '-', 'N', 'S', '?' or '' where the node has no result
+            current: (nodes, periods) NPS of the period
+            baseline: (nodes, periods) baseline NPS
+            scored: (nodes, periods) True where a deviation was computed
+        """
+        self.nodes = nodes
+        self.periods = periods
+        self.status = status
+        self.current = current
+        self.baseline = baseline
+        self.deviation = current - baseline
+        self.scored = scored
+        self.period_index = {period: i for i, period in enumerate(periods)}
+
+    def period_results(self, period: int) -> Tuple[Dict[str, str], Dict[str, float], Dict[str, Dict[str, float]]]:
+        """
+        Per-node results for one period in the detector's dict format
+
+        Returns:
+            Tuple of (anomalies, deviations, nps_values)
+        """
+        anomalies, deviations, nps_values = {}, {}, {}
+        col = self.period_index.get(period)
+        if col is None:
+            return anomalies, deviations, nps_values
+
+        for row, node in enumerate(self.nodes):
+            status = self.status[row, col]
+            if not status:
+                continue
+            anomalies[node] = status
+            if self.scored[row, col]:
+                deviation = float(self.deviation[row, col])
+                deviations[node] = deviation
+                nps_values[node] = {
+                    'current': float(self.current[row, col]),
+                    'baseline': float(self.baseline[row, col]),
+                    'deviation': deviation
+                }
+        return anomalies, deviations, nps_values
+
+    def to_frame(self) -> pd.DataFrame:
+        """Long-format view of the grid (one row per node and period)"""
+        rows, cols = np.nonzero(self.status != '')
+        return pd.DataFrame({
+            'node': [self.nodes[r] for r in rows],
+            'period': [self.periods[c] for c in cols],
+            'status': self.status[rows, cols],
+            'current': self.current[rows, cols],
+            'baseline': self.baseline[rows, cols],
+            'deviation': self.deviation[rows, cols]
+        })
+
+
+def _nan_mean(values: np.ndarray, min_count: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Row-wise mean ignoring NaN, plus whether at least min_count values were present"""
+    valid = ~np.isnan(values)
+    count = valid.sum(axis=1)
+    total = np.where(valid, values, 0.0).sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = total / count
+    return mean, count >= min_count
+
+
+def _first_values_mean(values: np.ndarray, k: int) -> np.ndarray:
+    """Row-wise mean of the first k non-NaN values (NaN when there are none)"""
+    valid = ~np.isnan(values)
+    take = valid & (np.cumsum(valid, axis=1) <= k)
+    count = take.sum(axis=1)
+    total = np.where(take, values, 0.0).sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return total / count
+
+
+def _sample_status(matrix: NPSMatrix, cols: np.ndarray, min_sample_size: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Status for missing rows ('?') and small samples ('S'); returns (status, still-to-score mask)"""
+    present = matrix.present[:, cols]
+    with np.errstate(invalid='ignore'):
+        small = present & (matrix.responses[:, cols] < min_sample_size)
+    status = np.full(present.shape, '', dtype=object)
+    status[~present] = '?'
+    status[small] = 'S'
+    return status, present & ~small
+
+
+def classify_deviation_grid(deviation: np.ndarray) -> np.ndarray:
+    """Vectorized _classify_anomaly_new_logic: negative -> '-', above +7 -> '+', otherwise 'N'"""
+    with np.errstate(invalid='ignore'):
+        return np.where(deviation < 0, '-', np.where(deviation > 7, '+', 'N')).astype(object)
+
+
+def detect_mean_grid(matrix: NPSMatrix, periods: List[int], baseline_periods: List[int],
+                     min_sample_size: int, fallback_window: int) -> AnomalyGrid:
+    """
+    Mean-mode detection for every period against one fixed baseline window
+
+    Args:
+        matrix: NPS matrix
+        periods: Periods to score
+        baseline_periods: Periods averaged into the baseline (the same for every target period)
+        min_sample_size: Minimum responses for a period to be scored
+        fallback_window: Number of NPS_2024 periods averaged when NPS_2025 has too little baseline data
+    """
+    cols = matrix.columns_for(periods)
+    base_cols = matrix.columns_for(baseline_periods)
+    n_nodes = len(matrix.nodes)
+
+    # Per-node, per-year baseline means over the window (need at least 3 values)
+    year_baseline = np.full((len(NPS_YEAR_COLUMNS), n_nodes), np.nan)
+    year_baseline_ok = np.zeros((len(NPS_YEAR_COLUMNS), n_nodes), dtype=bool)
+    for year in range(len(NPS_YEAR_COLUMNS)):
+        year_baseline[year], year_baseline_ok[year] = _nan_mean(matrix.nps[year][:, base_cols], 3)
+
+    # NPS_2025 fallback: 2024 periods, used when the node has enough rows there
+    low, high = NPS_2024_FALLBACK_PERIODS
+    fallback_cols = np.nonzero((matrix.periods >= low) & (matrix.periods <= high))[0]
+    fallback_rows_ok = matrix.present[:, fallback_cols].sum(axis=1) >= fallback_window
+    fallback_mean = _first_values_mean(matrix.nps[1][:, fallback_cols], fallback_window)
+    year_baseline[0] = np.where(year_baseline_ok[0], year_baseline[0], fallback_mean)
+    year_baseline_ok[0] = year_baseline_ok[0] | fallback_rows_ok
+
+    year = matrix.target_year()
+    current = matrix.target_nps(year)[:, cols]
+    year = year[:, cols]
+
+    rows = np.arange(n_nodes)[:, np.newaxis]
+    clipped = np.clip(year, 0, None)
+    baseline = np.where(year >= 0, year_baseline[clipped, rows], np.nan)
+    baseline_ok = (year >= 0) & year_baseline_ok[clipped, rows]
+
+    status, to_score = _sample_status(matrix, cols, min_sample_size)
+    scored = to_score & baseline_ok
+    status[to_score & ~baseline_ok] = '?'
+    status[scored] = classify_deviation_grid(current - baseline)[scored]
+
+    return AnomalyGrid(matrix.nodes, [int(matrix.periods[c]) for c in cols], status, current, baseline, scored)
+
+
+def detect_vslast_grid(matrix: NPSMatrix, periods: List[int], min_sample_size: int) -> AnomalyGrid:
+    """
+    Vslast-mode detection for every period against the period before it (period + 1)
+
+    Every period + 1 must be in the matrix; periods without a previous period are filtered out by the caller.
+    """
+    cols = matrix.columns_for(periods)
+    prev_cols = matrix.columns_for([p + 1 for p in periods])
+
+    year = matrix.target_year()
+    current = matrix.target_nps(year)[:, cols]
+    year = year[:, cols]
+    clipped = np.clip(year, 0, None)[np.newaxis]
+
+    # Previous NPS from the same year column; NPS_2025 targets may fall back to the previous NPS_2024
+    previous = np.take_along_axis(matrix.nps[:, :, prev_cols], clipped, axis=0)[0]
+    previous = np.where((year == 0) & np.isnan(previous), matrix.nps[1][:, prev_cols], previous)
+    previous = np.where(year >= 0, previous, np.nan)
+
+    status, to_score = _sample_status(matrix, cols, min_sample_size)
+    previous_present = matrix.present[:, prev_cols]
+    status[to_score & ~previous_present] = '?'
+    to_score = to_score & previous_present
+
+    scored = to_score & ~np.isnan(current) & ~np.isnan(previous)
+    status[to_score & ~scored] = '?'
+    status[scored] = classify_deviation_grid(current - previous)[scored]
+
+    return AnomalyGrid(matrix.nodes, [int(matrix.periods[c]) for c in cols], status, current, previous, scored)
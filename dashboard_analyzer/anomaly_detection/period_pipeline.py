@@ -0,0 +1,182 @@
+"""
+Period Pipeline
+
+Staged pipeline for the per-period analysis (detection, causal investigation,
+interpretation). Each stage runs on its own pool of workers and hands its results to
+the next stage through a bounded queue, so several periods are in flight at once and
+a slow stage holds back the ones before it instead of letting work pile up. Results
+are delivered in input order through a reorder buffer, and every stage records its
+throughput and the depth of its input queue.
+"""
+
+import asyncio
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+
+# End-of-stream marker, one per worker of the receiving stage
+_DONE = object()
+
+
+class PipelineStage:
+    """One pipeline step: an async function applied to every item by a fixed pool of workers"""
+
+    def __init__(self, name: str, fn: Callable[[Any], Awaitable[Any]], workers: int = 1):
+        """
+        Args:
+            name: Stage name used in the metrics report
+            fn: Coroutine function taking the previous stage's output (or the input item)
+            workers: Number of items processed by this stage at the same time
+        """
+        self.name = name
+        self.fn = fn
+        self.workers = max(1, int(workers))
+        self.reset_stats()
+
+    def reset_stats(self):
+        """Clear recorded metrics"""
+        self.processed = 0
+        self.busy_seconds = 0.0
+        self.first_started: Optional[float] = None
+        self.last_finished: Optional[float] = None
+        self.queue_depths: List[int] = []
+
+    def record_queue_depth(self, depth: int):
+        self.queue_depths.append(depth)
+
+    def get_stats(self) -> Dict[str, float]:
+        """Throughput and input queue depth of the stage"""
+        active_seconds = 0.0
+        if self.first_started is not None and self.last_finished is not None:
+            active_seconds = self.last_finished - self.first_started
+        return {
+            'workers': self.workers,
+            'processed': self.processed,
+            'busy_seconds': self.busy_seconds,
+            'active_seconds': active_seconds,
+            'throughput_per_minute': self.processed * 60.0 / active_seconds if active_seconds > 0 else 0.0,
+            'mean_queue_depth': sum(self.queue_depths) / len(self.queue_depths) if self.queue_depths else 0.0,
+            'max_queue_depth': max(self.queue_depths) if self.queue_depths else 0
+        }
+
+
+class StagedPipeline:
+    """Stages connected by bounded queues, with results delivered in input order"""
+
+    def __init__(self, stages: Sequence[PipelineStage], queue_size: int = None):
+        """
+        Args:
+            stages: Stages in processing order
+            queue_size: Capacity of the queue in front of each stage (default: PERIOD_PIPELINE_QUEUE_SIZE or 2)
+        """
+        self.stages = list(stages)
+        self.queue_size = queue_size or int(os.getenv("PERIOD_PIPELINE_QUEUE_SIZE", "2"))
+        self.items = 0
+        self.wall_seconds = 0.0
+
+    async def run(self, items: Sequence[Any], on_result: Callable[[Any, Any], Optional[Awaitable[None]]] = None) -> List[Any]:
+        """
+        Push every item through all stages
+
+        on_result(item, result) is called (and awaited when it is a coroutine) in input
+        order as soon as the result of the next expected item is ready. The first stage
+        error cancels the pipeline and is re-raised.
+
+        Returns:
+            Final stage results in input order
+        """
+        items = list(items)
+        self.items = len(items)
+        for stage in self.stages:
+            stage.reset_stats()
+        start = time.perf_counter()
+
+        # queues[i] feeds stage i, queues[-1] feeds the ordered delivery
+        queues = [asyncio.Queue(maxsize=self.queue_size) for _ in self.stages]
+        queues.append(asyncio.Queue(maxsize=self.queue_size))
+        remaining_workers = [stage.workers for stage in self.stages]
+        results: List[Any] = []
+
+        async def put(index: int, entry):
+            await queues[index].put(entry)
+            if index < len(self.stages) and entry is not _DONE:
+                self.stages[index].record_queue_depth(queues[index].qsize())
+
+        async def close(index: int):
+            receivers = self.stages[index].workers if index < len(self.stages) else 1
+            for _ in range(receivers):
+                await put(index, _DONE)
+
+        async def feed():
+            for position, item in enumerate(items):
+                await put(0, (position, item, item))
+            await close(0)
+
+        async def work(index: int):
+            stage = self.stages[index]
+            while True:
+                entry = await queues[index].get()
+                if entry is _DONE:
+                    break
+                position, item, value = entry
+                started = time.perf_counter()
+                if stage.first_started is None:
+                    stage.first_started = started
+                value = await stage.fn(value)
+                finished = time.perf_counter()
+                stage.busy_seconds += finished - started
+                stage.last_finished = finished
+                stage.processed += 1
+                await put(index + 1, (position, item, value))
+            remaining_workers[index] -= 1
+            if remaining_workers[index] == 0:
+                await close(index + 1)
+
+        async def deliver():
+            pending: Dict[int, tuple] = {}
+            while True:
+                entry = await queues[-1].get()
+                if entry is _DONE:
+                    break
+                position, item, value = entry
+                pending[position] = (item, value)
+                while len(results) in pending:
+                    item, value = pending.pop(len(results))
+                    results.append(value)
+                    if on_result is not None:
+                        delivered = on_result(item, value)
+                        if asyncio.iscoroutine(delivered):
+                            await delivered
+
+        tasks = [asyncio.create_task(feed()), asyncio.create_task(deliver())]
+        for index, stage in enumerate(self.stages):
+            tasks.extend(asyncio.create_task(work(index)) for _ in range(stage.workers))
+
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        finally:
+            self.wall_seconds = time.perf_counter() - start
+
+        return results
+
+    def get_stats(self) -> Dict[str, Dict[str, float]]:
+        """Metrics of every stage, by stage name"""
+        return {stage.name: stage.get_stats() for stage in self.stages}
+
+    def print_report(self, title: str = "Period pipeline"):
+        """Print per-stage throughput and queue depth"""
+        print(f"\n⏱️ {title} report ({self.items} items, queue size {self.queue_size}, wall-clock {self.wall_seconds:.2f}s):")
+        for name, stats in self.get_stats().items():
+            print(f"   {name}: {stats['processed']} done by {stats['workers']} workers | "
+                  f"busy {stats['busy_seconds']:.2f}s | {stats['throughput_per_minute']:.2f}/min | "
+                  f"queue depth mean {stats['mean_queue_depth']:.1f}, max {stats['max_queue_depth']}")
+
+
+def get_stage_workers(stage: str, default: int) -> int:
+    """Worker count of a stage from PERIOD_PIPELINE_<STAGE>_WORKERS"""
+    return max(1, int(os.getenv(f"PERIOD_PIPELINE_{stage.upper()}_WORKERS", str(default))))
@@ -4,9 +4,11 @@ Proporciona funcionalidades comunes y estructura estándar para agentes
 """
 
 from datetime import datetime
-from typing import Optional, Type, List, Any, Union
+from typing import Optional, Type, List, Any, Union, Callable
+import inspect
 import logging
 
+from langchain_core.messages import AIMessage
 from pydantic import BaseModel
 
 
@@ -45,6 +47,8 @@ class Agent:
         self.input_tokens = 0
         self.output_tokens = 0
         self.money_spent = 0
+        self.last_ttft = None
+        self.ttft_times = []
         
         self.logger.debug("Agent initialized with LLM: %s", type(llm).__name__)
 
@@ -85,10 +89,11 @@ class Agent:
         execution_time = (datetime.now() - start_time).total_seconds()
         self._update_metrics(execution_time)
 
-        # Tokens and money
-        self.input_tokens += response.usage_metadata['input_tokens']
-        self.output_tokens += response.usage_metadata['output_tokens']
-        self.money_spent = self.input_tokens*self.llm.token_input_price + self.output_tokens*self.llm.token_output_price
+        # Tokens and money (responses replayed from the LLM response cache cost nothing)
+        if not response.response_metadata.get('cache_hit'):
+            self.input_tokens += response.usage_metadata['input_tokens']
+            self.output_tokens += response.usage_metadata['output_tokens']
+            self.money_spent = self.input_tokens*self.llm.token_input_price + self.output_tokens*self.llm.token_output_price
 
         self.logger.debug("LLM response received. Input tokens: %d, Output tokens: %d", 
                          response.usage_metadata['input_tokens'], 
@@ -125,20 +130,59 @@ class Agent:
         
         # Start measuring execution time
         start_time = datetime.now()
+        first_token = True
             
         # Stream response chunks
-        response_text = ""
-
-        async for chunk in self.llm.stream_response(messages):
-            response_text += chunk
+        usage = {}
+        async for chunk in self.llm.stream_response(messages, include_final=False, usage=usage):
+            if first_token and chunk:
+                first_token = False
+                self._update_ttft((datetime.now() - start_time).total_seconds())
             yield chunk
 
         # Calculate execution time and update metrics
         execution_time = (datetime.now() - start_time).total_seconds()
         self._update_metrics(execution_time)
+
+        # Tokens and money, when the provider reports usage for streams
+        if 'input_tokens' in usage:
+            self.input_tokens += usage['input_tokens']
+            self.output_tokens += usage.get('output_tokens', 0)
+            self.money_spent = self.input_tokens*self.llm.token_input_price + self.output_tokens*self.llm.token_output_price
         
         self.logger.debug("Streaming complete. Execution time: %.2f seconds", execution_time)
 
+    async def invoke_stream(self, messages: list, on_chunk: Optional[Callable[[str], Any]] = None):
+        """
+        Stream the response and return it as a complete message (drop-in for invoke without tools)
+
+        Args:
+            messages: Optional message history
+            on_chunk: Optional callback (sync or async) receiving each chunk of text
+
+        Returns:
+            response, structured_response, tool_calls (the latter two always None);
+            response.response_metadata holds ttft and duration in seconds
+        """
+        start_time = datetime.now()
+        ttft = None
+        response_text = ""
+
+        async for chunk in self.ainvoke(messages):
+            if ttft is None and chunk:
+                ttft = (datetime.now() - start_time).total_seconds()
+            response_text += chunk
+            if on_chunk is not None:
+                result = on_chunk(chunk)
+                if inspect.isawaitable(result):
+                    await result
+
+        response = AIMessage(
+            content=response_text,
+            response_metadata={'ttft': ttft, 'duration': (datetime.now() - start_time).total_seconds()}
+        )
+        return response, None, None
+
     def _update_metrics(self, execution_time):
         """Update agent performance metrics."""
         self.num_calls += 1
@@ -147,6 +191,11 @@ class Agent:
         self.call_times.append(execution_time)
         self.avg_time = self.total_time / self.num_calls if self.num_calls > 0 else 0
 
+    def _update_ttft(self, ttft):
+        """Record the time to first token of a streamed response."""
+        self.last_ttft = ttft
+        self.ttft_times.append(ttft)
+
     async def execute_tools(self, mcp_manager, tool_calls):
         """
         Execute tool calls using an MCP manager.
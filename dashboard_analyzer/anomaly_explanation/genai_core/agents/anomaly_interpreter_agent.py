@@ -22,6 +22,7 @@ from ..llms.openai_llm import OpenAiLLM
 from ..llms.aws_llm import AWSLLM
 from ..utils.enums import LLMType, MessageType, AgentName
 from ..message_history import MessageHistory
+from ..utils.streaming import StreamHandler, invoke_agent, stream_events
 
 # Helper function to find a file from the project root
 def find_project_root(marker_file=".git"):
@@ -442,13 +443,28 @@ class AnomalyInterpreterAgent:
             self.logger.error(f"❌ Error during hierarchical interpretation: {e}")
             raise
 
-    async def interpret_anomaly_tree_hierarchical(self, tree_data: str, date: Optional[str] = None, segment: Optional[str] = None) -> str:
+    async def stream_anomaly_tree_hierarchical(self, tree_data: str, date: Optional[str] = None, segment: Optional[str] = None):
+        """
+        Streaming mode of interpret_anomaly_tree_hierarchical.
+        
+        Yields the chunk events of each diagnostic step, a section event when a step
+        completes (so it can be rendered right away), then {'type': 'result', 'text': <interpretation>}.
+        """
+        async for event in stream_events(
+            lambda handler: self.interpret_anomaly_tree_hierarchical(tree_data, date, segment, stream_handler=handler)
+        ):
+            yield event
+
+    async def interpret_anomaly_tree_hierarchical(self, tree_data: str, date: Optional[str] = None, segment: Optional[str] = None,
+                                                  stream_handler: Optional[StreamHandler] = None) -> str:
         """
         Perform hierarchical interpretation using conversational step-by-step reasoning.
         
         Args:
             tree_data: Combined explanations from multiple hierarchical nodes
             date: Optional date for context
+            segment: Optional segment the tree belongs to
+            stream_handler: Optional handler receiving the steps as they are generated (streaming mode)
             
         Returns:
             Comprehensive hierarchical interpretation with step-by-step analysis
@@ -542,8 +558,8 @@ class AnomalyInterpreterAgent:
                 })
                 
                 # Get AI response for this step
-                step_response, _, _ = await self.agent.invoke(
-                    messages=message_history.get_messages()
+                step_response, _, _ = await invoke_agent(
+                    self.agent, message_history.get_messages(), stream_handler, section=step_name
                 )
                 
                 step_content = step_response.content.strip()
@@ -21,6 +21,7 @@ from ..llms.openai_llm import OpenAiLLM
 from ..llms.aws_llm import AWSLLM
 from ..utils.enums import LLMType, MessageType, get_default_llm_type
 from ..message_history import MessageHistory
+from ..utils.streaming import StreamHandler, invoke_agent, stream_events
 
 
 class AnomalySummaryAgent:
@@ -219,11 +220,31 @@ class AnomalySummaryAgent:
             self.logger.error(f"❌ Error generating summary report: {str(e)}")
             return f"❌ Error generating summary: {str(e)}"
     
-    async def generate_comprehensive_summary(
+    async def stream_comprehensive_summary(
         self, 
         weekly_comparative_analysis: str, 
         daily_single_analyses: List[Dict[str, Any]],
         date_flight_local: str = None
+    ):
+        """
+        Streaming mode of generate_comprehensive_summary.
+        
+        Yields the chunk events of the summary as it is generated, a section event when it
+        completes, then {'type': 'result', 'text': <summary>}.
+        """
+        async for event in stream_events(
+            lambda handler: self.generate_comprehensive_summary(
+                weekly_comparative_analysis, daily_single_analyses, date_flight_local, stream_handler=handler
+            )
+        ):
+            yield event
+    
+    async def generate_comprehensive_summary(
+        self, 
+        weekly_comparative_analysis: str, 
+        daily_single_analyses: List[Dict[str, Any]],
+        date_flight_local: str = None,
+        stream_handler: Optional[StreamHandler] = None
     ) -> str:
         """
         Generate a comprehensive summary that combines weekly comparative analysis with daily single analyses.
@@ -232,6 +253,8 @@ class AnomalySummaryAgent:
             weekly_comparative_analysis: String containing the weekly comparative analysis
             daily_single_analyses: List of daily single analysis results
                                   Each dict should have: 'date', 'analysis', 'anomalies'
+            date_flight_local: Optional date used to name the exported conversation
+            stream_handler: Optional handler receiving the summary as it is generated (streaming mode)
         
         Returns:
             Comprehensive summary string
@@ -306,7 +329,9 @@ class AnomalySummaryAgent:
             )
             
             # Generate the comprehensive summary using the agent
-            response, structured_response, tool_calls = await self.agent.invoke(messages=message_history.get_messages())
+            response, structured_response, tool_calls = await invoke_agent(
+                self.agent, message_history.get_messages(), stream_handler, section="comprehensive_summary"
+            )
             comprehensive_response = response.content if hasattr(response, 'content') else str(response)
             
             # Export conversation for debugging
@@ -31,11 +31,19 @@ from dashboard_analyzer.anomaly_explanation.genai_core.llms.aws_llm import AWSLL
 from dashboard_analyzer.anomaly_explanation.genai_core.utils.enums import LLMType, MessageType, AgentName, get_default_llm_type
 from dashboard_analyzer.anomaly_explanation.genai_core.message_history import MessageHistory
 from dashboard_analyzer.anomaly_explanation.genai_core.agents.agent import Agent
+from dashboard_analyzer.anomaly_explanation.genai_core.utils.concurrency import get_concurrency_budget
+from dashboard_analyzer.anomaly_explanation.genai_core.utils.streaming import StreamHandler, invoke_agent, stream_events
+from dashboard_analyzer.anomaly_explanation.genai_core.utils.context_budget import ContextBudget
+from dashboard_analyzer.anomaly_explanation.genai_core.utils.tool_result import ToolResult
+from dashboard_analyzer.anomaly_explanation.genai_core.utils.ncs_text_index import get_ncs_text_index
+from dashboard_analyzer.anomaly_explanation.genai_core.utils.routes_frame import RoutesFrame
 
 # Data collection imports
 from dashboard_analyzer.data_collection.pbi_collector import PBIDataCollector
 from dashboard_analyzer.data_collection.chatbot_verbatims_collector import ChatbotVerbatimsCollector
 from dashboard_analyzer.data_collection.ncs_collector import NCSDataCollector
+from dashboard_analyzer.data_collection.data_plane import get_data_plane
+from dashboard_analyzer.data_collection.routes_dictionary import get_routes_dictionary
 
 # Additional imports needed for tools
 import time
@@ -43,6 +51,14 @@ import re
 from datetime import datetime
 import traceback
 
+# Tools whose data depends on what other tools collected: ncs_tool reads the explanatory
+# drivers (workflow type), routes_tool reads the drivers and the NCS affected routes
+COMPARATIVE_TOOL_DEPENDENCIES = {
+    "ncs_tool": ["explanatory_drivers_tool"],
+    "routes_tool": ["explanatory_drivers_tool", "ncs_tool"],
+}
+
+
 class CausalAnalysisResult(BaseModel):
     """Structured output for causal analysis results"""
     primary_cause: str = Field(description="Primary identified cause of the anomaly")
@@ -118,11 +134,12 @@ class CleanConversationTracker:
         """Add an explanation to the clean context"""
         self.previous_explanations.append(explanation)
     
-    def get_clean_context(self, system_prompt: str) -> List[Dict]:
-        """Get clean context: system prompt + previous explanations only"""
+    def get_clean_context(self, system_prompt: str, budget: Optional[ContextBudget] = None) -> List[Dict]:
+        """Get clean context: system prompt + previous explanations only (compacted to the token budget if given)"""
         messages = [{"role": "system", "content": system_prompt}]
         
-        for i, explanation in enumerate(self.previous_explanations):
+        explanations = budget.compact_explanations(self.previous_explanations) if budget else self.previous_explanations
+        for i, explanation in enumerate(explanations):
             messages.append({
                 "role": "assistant", 
                 "content": f"Previous analysis {i+1}: {explanation}"
@@ -134,7 +151,7 @@ class CleanConversationTracker:
         """Move to next iteration"""
         self.iteration_count += 1
 
-    def set_tool_context(self, tool_name: str, result: str):
+    def set_tool_context(self, tool_name: str, result):
         """Set context of last executed tool"""
         self.last_tool_context = {
             'tool_name': tool_name,
@@ -142,11 +159,14 @@ class CleanConversationTracker:
             'iteration': self.iteration_count
         }
         
-        # Extract routes if mentioned in NCS or verbatims results
+        self.add_routes_from_result(tool_name, result)
+    
+    def add_routes_from_result(self, tool_name: str, result):
+        """Track routes mentioned in NCS or verbatims results (each route only once)"""
         if tool_name in ['ncs_tool', 'verbatims_tool']:
-            routes = self._extract_routes_from_result(result)
-            if routes:
-                self.identified_routes.extend(routes)
+            # Structured results carry their routes; plain text results are parsed
+            routes = result.routes if isinstance(result, ToolResult) else self._extract_routes_from_result(result)
+            self.identified_routes.extend(route for route in dict.fromkeys(routes) if route not in self.identified_routes)
                 
     def _extract_routes_from_result(self, result: str) -> List[str]:
         """Extract route identifiers from tool results including Spanish city names"""
@@ -258,7 +278,8 @@ class CausalExplanationAgent:
         causal_filter: str = "vs L7d",
         comparison_start_date: datetime = None,
         comparison_end_date: datetime = None,
-        study_mode: str = "comparative"
+        study_mode: str = "comparative",
+        stream_handler: Optional[StreamHandler] = None
     ):
         # Use default LLM type if none provided
         if llm_type is None:
@@ -280,6 +301,8 @@ class CausalExplanationAgent:
         # Debug log the filter value
         self.logger.info(f"🔍 DEBUG CAUSAL_FILTER: Original: {causal_filter}, Processed: {self.causal_filter}")
         self.study_mode = study_mode
+        # Streaming mode: reflections and the final synthesis are emitted as they are generated
+        self.stream_handler = stream_handler
         
         # Load configuration
         self.config = self._load_prompt_config(config_path)
@@ -290,13 +313,16 @@ class CausalExplanationAgent:
         self.pbi_collector = PBIDataCollector()
         self.chatbot_collector = self._init_chatbot_collector()
         self.ncs_collector = self._init_ncs_collector()
+        # Raw tool data shared with the other nodes investigated for the same period
+        self.data_plane = get_data_plane()
         
         # Create LLM and agent
         self.llm = self._create_llm(llm_type)
         self.agent = Agent(llm=self.llm, logger=self.logger)
         
-        # Initialize tracker
+        # Initialize tracker and the token budgets of the reflection context
         self.tracker = CleanConversationTracker()
+        self.context_budget = ContextBudget(llm_type)
         
         # Current anomaly context
         self.current_anomaly_type = None
@@ -457,7 +483,7 @@ class CausalExplanationAgent:
     
     # Removed _create_tools method - tools are now implemented directly
 
-    async def _explanatory_drivers_tool(self, node_path: str, start_date: str, end_date: str, min_surveys: int = 10) -> str:
+    async def _explanatory_drivers_tool(self, node_path: str, start_date: str, end_date: str, min_surveys: int = 10) -> ToolResult:
         """Tool for analyzing explanatory drivers and SHAP values."""
         try:
             if not self.silent_mode:
@@ -477,7 +503,11 @@ class CausalExplanationAgent:
             )
             
             if df.empty:
-                return f"No explanatory drivers data found for {node_path} in date range {start_date} to {end_date}"
+                return ToolResult.from_text(
+                    "explanatory_drivers_tool",
+                    f"No explanatory drivers data found for {node_path} in date range {start_date} to {end_date}",
+                    status="no_data"
+                )
             
             # Calculate survey count
             survey_count = len(df)
@@ -606,10 +636,14 @@ class CausalExplanationAgent:
                     analysis_result.append("No SHAP drivers found at all")
                     analysis_result.append("RECOMMENDATION: Use verbatims_tool for qualitative insights and patterns")
             
-            return " | ".join(analysis_result)
+            return ToolResult(
+                "explanatory_drivers_tool",
+                data=self.collected_data.get('explanatory_drivers', {'survey_count': survey_count}),
+                parts=analysis_result
+            )
             
         except Exception as e:
-            return f"Error in explanatory drivers analysis: {str(e)}"
+            return ToolResult.from_text("explanatory_drivers_tool", f"Error in explanatory drivers analysis: {str(e)}", status="error")
 
     def _generate_investigative_guidance(self, tool_name: str, iteration: int, mode: str = "comparative") -> Optional[str]:
         """Generate investigative guidance for tool and mode"""
@@ -893,17 +927,14 @@ class CausalExplanationAgent:
             start_dt = datetime.strptime(start_date, '%Y-%m-%d')
             end_dt = datetime.strptime(end_date, '%Y-%m-%d')
             
-            # Get NCS data for the specific period only (without await - it's synchronous)
-            ncs_data = self.ncs_collector.collect_ncs_data_for_date_range(
-                start_date=start_dt,
-                end_date=end_dt
-            )
+            # Get NCS data for the specific period only (fetched once per period for all nodes)
+            ncs_data = await self._get_shared_ncs_data(start_dt, end_dt)
             
             if ncs_data.empty:
                 return f"No NCS data found for {node_path} from {start_date} to {end_date}"
 
-            # 2. Apply segment filtering BEFORE analysis
-            filtered_ncs_data = await self._filter_ncs_by_segment(ncs_data, node_path)
+            # 2. Apply segment filtering BEFORE analysis (node slice of the shared data)
+            filtered_ncs_data = await self._get_ncs_segment_data(start_dt, end_dt, node_path)
 
             if filtered_ncs_data.empty:
                 return f"No NCS incidents found for segment {node_path} from {start_date} to {end_date} after filtering"
@@ -983,7 +1014,7 @@ class CausalExplanationAgent:
             result_parts.append("")
             
             # 1. Get routes with NPS data (absolute values only, min_surveys >= 2)
-            routes_data = await self.pbi_collector.collect_routes_for_date_range(
+            routes_data = await self._get_shared_routes(
                 node_path=node_path,
                 start_date=start_dt,
                 end_date=end_dt,
@@ -1119,7 +1150,10 @@ class CausalExplanationAgent:
             # Add synthesis prompt to existing conversation context
             synthesis_messages = message_history.get_messages()
             synthesis_messages.append(HumanMessage(content=synthesis_prompt))
-            response = await self.llm(synthesis_messages)
+            if self.stream_handler:
+                response, _, _ = await invoke_agent(self.agent, synthesis_messages, self.stream_handler, section="final_synthesis")
+            else:
+                response = await self.llm(synthesis_messages)
             
             if response and hasattr(response, 'content'):
                 return f"🤖 **ANÁLISIS PERIODO ÚNICO**\n\n{response.content}"
@@ -1203,6 +1237,28 @@ class CausalExplanationAgent:
                 causal_filter, comparison_start_date, comparison_end_date
             )
     
+    async def stream_investigation(self, **investigation_kwargs):
+        """
+        Streaming mode of investigate_anomaly
+
+        Yields the chunk/section events of every reflection and of the final synthesis as
+        they are generated, then {'type': 'result', 'text': <final explanation>}.
+
+        Args:
+            investigation_kwargs: Arguments of investigate_anomaly
+        """
+        previous_handler = self.stream_handler
+
+        async def run(handler):
+            self.stream_handler = handler
+            try:
+                return await self.investigate_anomaly(**investigation_kwargs)
+            finally:
+                self.stream_handler = previous_handler
+
+        async for event in stream_events(run):
+            yield event
+
     async def _investigate_anomaly_single_period(
         self,
         node_path: str,
@@ -1304,10 +1360,11 @@ class CausalExplanationAgent:
                 
                 self.logger.info(f"🔧 Iteration {iteration}: Processing {current_tool} (single period)")
                 
-                # Execute tool with single period logic
-                tool_result = await self._execute_single_period_tool(
-                    current_tool, node_path, start_date, end_date, iteration
-                )
+                # Execute tool with single period logic (Power BI / S3 pulls share a run-wide budget)
+                async with get_concurrency_budget("data"):
+                    tool_result = await self._execute_single_period_tool(
+                        current_tool, node_path, start_date, end_date, iteration
+                    )
                 
                 # Store tool context
                 self.tracker.set_tool_context(current_tool, tool_result)
@@ -1318,7 +1375,7 @@ class CausalExplanationAgent:
                 # USER MESSAGE: Tool result + Helper guidance
                 tool_result_message = self._get_tool_result_message(mode="single").format(
                     tool_name=current_tool.upper(),
-                    tool_result=tool_result,
+                    tool_result=self.context_budget.fit_tool_result(tool_result),
                     investigative_guidance=investigative_guidance,
                     comparison_filter=self.causal_filter
                 )
@@ -1405,6 +1462,7 @@ class CausalExplanationAgent:
         6. Optional: Customer profile analysis
         """
         
+        prefetched_results: Dict[str, asyncio.Task] = {}
         try:
             self.logger.info("🎯 Starting comparative investigation (with comparison)")
             
@@ -1492,6 +1550,11 @@ class CausalExplanationAgent:
             max_iterations = len(comparative_sequence)
             iteration = 0
             
+            # Start every tool's data collection now; reflections consume the results in order
+            prefetched_results = self._prefetch_comparative_tools(
+                comparative_sequence, node_path, start_date, end_date
+            )
+            
             # Execute tools for comparative analysis
             for current_tool in comparative_sequence:
                 iteration += 1
@@ -1499,10 +1562,8 @@ class CausalExplanationAgent:
                 
                 self.logger.info(f"🔧 Iteration {iteration}: Processing {current_tool} (comparative)")
                 
-                # Execute tool with comparative logic
-                tool_result = await self._execute_tool_comparative(
-                    current_tool, node_path, start_date, end_date, iteration
-                )
+                # Tool data was prefetched (Power BI / S3 pulls share a run-wide budget)
+                tool_result = await prefetched_results[current_tool]
                 
                 # Store tool context
                 self.tracker.set_tool_context(current_tool, tool_result)
@@ -1514,7 +1575,7 @@ class CausalExplanationAgent:
                 safe_causal_filter = self.causal_filter if self.causal_filter else "período de referencia"
                 tool_result_message = self._get_tool_result_message(mode="comparative").format(
                     tool_name=current_tool.upper(),
-                    tool_result=tool_result,
+                    tool_result=self.context_budget.fit_tool_result(tool_result),
                     investigative_guidance=investigative_guidance,
                     causal_filter=safe_causal_filter,
                     comparison_filter=safe_causal_filter  # For backwards compatibility
@@ -1550,6 +1611,9 @@ class CausalExplanationAgent:
         except Exception as e:
             self.logger.error(f"❌ Error crítico en investigación comparativa: {type(e).__name__}: {e}")
             return self._build_collected_data_summary()
+        finally:
+            # Nothing is left running if the investigation failed or was cancelled (node timeout)
+            self._cancel_prefetched_tools(prefetched_results)
             
         # Final synthesis for comparative analysis
         try:
@@ -1662,6 +1726,49 @@ class CausalExplanationAgent:
                 
             return f"ERROR executing {tool_name}: {type(e).__name__}: {str(e)}"
     
+    def _prefetch_comparative_tools(
+        self,
+        tool_sequence: List[str],
+        node_path: str,
+        start_date: str,
+        end_date: str
+    ) -> Dict[str, asyncio.Task]:
+        """
+        Launch the data collection of every tool in the sequence concurrently
+        
+        Tools start as soon as the tools they depend on (COMPARATIVE_TOOL_DEPENDENCIES)
+        have finished, so collection overlaps with the LLM reflections of earlier tools.
+        
+        Returns:
+            tool_name -> task resolving to the tool result (ToolResult or text)
+        """
+        tasks: Dict[str, asyncio.Task] = {}
+        
+        async def run_tool(tool_name: str, iteration: int) -> str:
+            for dependency in COMPARATIVE_TOOL_DEPENDENCIES.get(tool_name, []):
+                if dependency in tasks:
+                    dependency_result = await tasks[dependency]
+                    # Routes found in NCS results feed the routes tool before the reflection loop reaches it
+                    self.tracker.add_routes_from_result(dependency, dependency_result)
+            
+            started = time.perf_counter()
+            async with get_concurrency_budget("data"):
+                tool_result = await self._execute_tool_comparative(
+                    tool_name, node_path, start_date, end_date, iteration
+                )
+            self.logger.info(f"📦 Prefetched {tool_name} in {time.perf_counter() - started:.1f}s")
+            return tool_result
+        
+        for iteration, tool_name in enumerate(tool_sequence, 1):
+            tasks[tool_name] = asyncio.create_task(run_tool(tool_name, iteration))
+        return tasks
+    
+    def _cancel_prefetched_tools(self, tasks: Dict[str, asyncio.Task]):
+        """Cancel prefetch tasks that are still running (investigation aborted)"""
+        for task in tasks.values():
+            if not task.done():
+                task.cancel()
+    
     async def _operative_data_tool(self, node_path: str, start_date, end_date, comparison_days: int = 7, comparison_mode: str = "mean") -> str:
         """
         Tool for analyzing operational metrics using parametrized comparison logic.
@@ -2473,7 +2580,7 @@ class CausalExplanationAgent:
         
         return result
     
-    async def _ncs_tool(self, node_path: str, start_date: str, end_date: str, analysis_focus: str = "flights", temporal_comparison: bool = True) -> str:
+    async def _ncs_tool(self, node_path: str, start_date: str, end_date: str, analysis_focus: str = "flights", temporal_comparison: bool = True) -> ToolResult:
         """
         Enhanced NCS tool for causal analysis that extracts:
         1. DISRUPTION CAUSES: Identifies root causes from incident patterns
@@ -2499,13 +2606,6 @@ class CausalExplanationAgent:
             total_days = (end_dt - start_dt).days + 1
             print(f"📅 DEBUG: Processing {total_days} days of NCS data (from {start_date} to {end_date})")
             
-            # Import NCS collector
-            from ....data_collection.ncs_collector import NCSDataCollector
-            
-            # Initialize NCS collector with temp credentials
-            temp_creds_file = "dashboard_analyzer/temp_aws_credentials.env"
-            ncs_collector = NCSDataCollector(temp_env_file=temp_creds_file)
-            
             # Calculate comparison period dates if temporal comparison is enabled
             comparison_data = None
             comparison_start_dt = None
@@ -2526,10 +2626,10 @@ class CausalExplanationAgent:
             print(f"🔍 DEBUG: Starting day-by-day NCS data collection for CURRENT period...")
             
             try:
-                ncs_data = ncs_collector.collect_ncs_data_for_date_range(start_dt, end_dt)
+                ncs_data = await self._get_shared_ncs_data(start_dt, end_dt)
                 print(f"✅ DEBUG: Current period data collected: {len(ncs_data)} rows")
                 # 🔄 Filter current period data by segment immediately
-                ncs_data = await self._filter_ncs_by_segment(ncs_data, node_path)
+                ncs_data = await self._get_ncs_segment_data(start_dt, end_dt, node_path)
                 print(f"🔧 DEBUG: After segment filter ({node_path}) rows: {len(ncs_data)}")
                 if ncs_data.empty:
                     print(f"⚠️ WARNING: Current period data is EMPTY - no incidents found for period {start_dt.strftime('%Y-%m-%d')} to {end_dt.strftime('%Y-%m-%d')}")
@@ -2558,10 +2658,10 @@ class CausalExplanationAgent:
                 print(f"🔍 DEBUG: Starting day-by-day NCS data collection for COMPARISON period...")
                 print(f"🔍 DEBUG: Comparison period dates: {comparison_start_dt.strftime('%Y-%m-%d')} to {comparison_end_dt.strftime('%Y-%m-%d')}")
                 try:
-                    comparison_data = ncs_collector.collect_ncs_data_for_date_range(comparison_start_dt, comparison_end_dt)
+                    comparison_data = await self._get_shared_ncs_data(comparison_start_dt, comparison_end_dt)
                     print(f"✅ DEBUG: Comparison data collected: {len(comparison_data)} rows")
                     # 🔄 Filter comparison data by segment immediately
-                    comparison_data = await self._filter_ncs_by_segment(comparison_data, node_path)
+                    comparison_data = await self._get_ncs_segment_data(comparison_start_dt, comparison_end_dt, node_path)
                     print(f"🔧 DEBUG: After segment filter ({node_path}) rows: {len(comparison_data)}")
                     if comparison_data.empty:
                         print(f"⚠️ WARNING: Comparison data is EMPTY - no incidents found for period {comparison_start_dt.strftime('%Y-%m-%d')} to {comparison_end_dt.strftime('%Y-%m-%d')}")
@@ -2603,7 +2703,12 @@ class CausalExplanationAgent:
                     'temporal_comparison_enabled': temporal_comparison,
                     'temporal_comparison_successful': False
                 }
-                return f"❌ NCS data source unavailable for the {total_days}-day period {start_date} to {end_date}. Access error prevents analysis of operational incidents. Technical details: {error_msg[:100] if error_msg else 'Unknown error'}"
+                return ToolResult.from_text(
+                    "ncs_tool",
+                    f"❌ NCS data source unavailable for the {total_days}-day period {start_date} to {end_date}. Access error prevents analysis of operational incidents. Technical details: {error_msg[:100] if error_msg else 'Unknown error'}",
+                    status="unavailable",
+                    data=self.collected_data['ncs_data']
+                )
             
             # CASE 1: No NCS data found for the entire period - could be good operational performance  
             if ncs_data.empty:
@@ -2620,7 +2725,12 @@ class CausalExplanationAgent:
                     'days_analyzed': total_days,
                     'date_range': f"{start_date} to {end_date}"
                 }
-                return f"📅 No NCS operational incidents found for the {total_days}-day period {start_date} to {end_date}. This could indicate good operational performance during the anomaly period."
+                return ToolResult.from_text(
+                    "ncs_tool",
+                    f"📅 No NCS operational incidents found for the {total_days}-day period {start_date} to {end_date}. This could indicate good operational performance during the anomaly period.",
+                    status="no_data",
+                    data=self.collected_data['ncs_data']
+                )
             
             # TEMPORAL COMPARISON ANALYSIS (NEW)
             temporal_analysis = None
@@ -2664,7 +2774,12 @@ class CausalExplanationAgent:
                     'days_analyzed': total_days,
                     'date_range': f"{start_date} to {end_date}"
                 }
-                return f"📊 Se encontraron {total_global_incidents} incidentes operacionales durante el período de {total_days} días ({start_date} a {end_date}), pero ninguno afectó las rutas del segmento {node_path}. Esto sugiere que los problemas operacionales ocurrieron en otros segmentos."
+                return ToolResult.from_text(
+                    "ncs_tool",
+                    f"📊 Se encontraron {total_global_incidents} incidentes operacionales durante el período de {total_days} días ({start_date} a {end_date}), pero ninguno afectó las rutas del segmento {node_path}. Esto sugiere que los problemas operacionales ocurrieron en otros segmentos.",
+                    status="no_data",
+                    data=self.collected_data['ncs_data']
+                )
             
             # EXTRACT STRUCTURED NCS DATA for multi-day aggregation analysis
             incident_col = self._find_column(filtered_ncs_data, ['incident', 'incidents', ''])
@@ -2855,16 +2970,24 @@ class CausalExplanationAgent:
             # Store comprehensive data
             self.collected_data['ncs_data'] = causal_analysis
             
-            result = " | ".join(analysis_result)
-            return result
+            # Routes read from the structured analysis (the routes tool uses them without re-parsing the text)
+            ncs_routes = list(causal_analysis.get('affected_routes', []))
+            if structured_breakdown:
+                ncs_routes += list(structured_breakdown.get('route_incident_breakdown', {}))
+                ncs_routes += list(structured_breakdown.get('route_disruptions', {}))
+                most_affected = structured_breakdown.get('summary', {}).get('most_affected_route')
+                if most_affected:
+                    ncs_routes.append(most_affected[0])
+            
+            return ToolResult("ncs_tool", data=causal_analysis, routes=ncs_routes, parts=analysis_result)
             
         except Exception as e:
             import traceback
             self.logger.error(f"💥 Error in NCS analysis: {str(e)}")
             self.logger.error(f"💥 Full traceback: {traceback.format_exc()}")
-            return f"Error in NCS analysis: {str(e)}"
+            return ToolResult.from_text("ncs_tool", f"Error in NCS analysis: {str(e)}", status="error")
 
-    async def _routes_tool(self, node_path: str, start_date: str, end_date: str, min_surveys: int = 2, anomaly_type: str = "unknown") -> str:
+    async def _routes_tool(self, node_path: str, start_date: str, end_date: str, min_surveys: int = 2, anomaly_type: str = "unknown") -> ToolResult:
         """
         Enhanced tool for analyzing route-specific NPS performance from ALL sources:
         1. Routes from explanatory drivers (ordered by NPS and touchpoint satisfactions)
@@ -2887,11 +3010,16 @@ class CausalExplanationAgent:
             # Store comprehensive data for cross-references
             self.collected_data['routes_data'] = all_routes_analysis
             
-            return all_routes_analysis['analysis_summary']
+            return ToolResult(
+                "routes_tool",
+                data=all_routes_analysis,
+                routes=list(all_routes_analysis.get('all_routes', {})),
+                renderer=lambda: all_routes_analysis['analysis_summary']
+            )
                 
         except Exception as e:
             self.logger.error(f"💥 Error in comprehensive routes analysis: {str(e)}")
-            return f"Error in comprehensive routes analysis: {str(e)}"
+            return ToolResult.from_text("routes_tool", f"Error in comprehensive routes analysis: {str(e)}", status="error")
 
     async def _consolidate_routes_from_all_sources(self, node_path: str, start_dt, end_dt, anomaly_type: str, min_surveys: int) -> dict:
         """
@@ -2905,19 +3033,22 @@ class CausalExplanationAgent:
         start_date = start_dt.strftime('%Y-%m-%d')
         end_date = end_dt.strftime('%Y-%m-%d')
         
+        # One routes query for the three sources (typed and indexed by route)
+        routes_frame = await self._get_routes_frame(node_path, start_dt, end_dt)
+        
         # 1. EXPLANATORY DRIVERS ROUTES - Get routes ordered by main touchpoint drivers
         exp_drivers_routes = await self._get_explanatory_drivers_routes(
-            node_path, cabins, companies, hauls, start_dt, end_dt, anomaly_type, min_surveys
+            node_path, cabins, companies, hauls, start_dt, end_dt, anomaly_type, min_surveys, routes_frame=routes_frame
         )
         
         # 2. NCS ROUTES - Get routes from operational incidents
         ncs_routes = await self._get_ncs_routes(
-            node_path, cabins, companies, hauls, start_dt, end_dt
+            node_path, cabins, companies, hauls, start_dt, end_dt, routes_frame=routes_frame
         )
         
         # 3. VERBATIMS ROUTES - Get routes from customer feedback
         verbatims_routes = await self._get_verbatims_routes(
-            node_path, cabins, companies, hauls, start_dt, end_dt
+            node_path, cabins, companies, hauls, start_dt, end_dt, routes_frame=routes_frame
         )
         
         # 4. CONSOLIDATE ALL ROUTES
@@ -2928,8 +3059,21 @@ class CausalExplanationAgent:
         
         return consolidated_analysis
 
+    async def _get_routes_frame(self, node_path: str, start_dt, end_dt) -> RoutesFrame:
+        """Routes of the node with the agent's comparison filter, typed and indexed by route"""
+        df = await self._get_shared_routes(
+            node_path=node_path,
+            start_date=start_dt,
+            end_date=end_dt,
+            comparison_filter=self.causal_filter,
+            comparison_start_date=self.comparison_start_date,
+            comparison_end_date=self.comparison_end_date
+        )
+        return RoutesFrame.from_raw(df)
+
     async def _get_explanatory_drivers_routes(self, node_path: str, cabins: List[str], companies: List[str], 
-                                            hauls: List[str], start_dt, end_dt, anomaly_type: str, min_surveys: int) -> dict:
+                                            hauls: List[str], start_dt, end_dt, anomaly_type: str, min_surveys: int,
+                                            routes_frame: RoutesFrame = None) -> dict:
         """
         Get routes analysis based on explanatory drivers touchpoints.
         For each significant driver, identify the top 5 routes with biggest CSAT changes vs comparison period.
@@ -2944,9 +3088,14 @@ class CausalExplanationAgent:
                 # significant_drivers is a list of strings (touchpoints), not dictionaries
                 main_touchpoints = significant_drivers[:3]  # Top 3 drivers
             
+            if routes_frame is None:
+                routes_frame = await self._get_routes_frame(node_path, start_dt, end_dt)
+            
             if not main_touchpoints:
-                self.logger.info("No main touchpoints found from explanatory drivers - using general routes query")
-                return await self._get_general_routes_with_touchpoints(cabins, companies, hauls, start_dt, end_dt, anomaly_type, min_surveys)
+                self.logger.info("No main touchpoints found from explanatory drivers - using general routes analysis")
+                return await self._get_general_routes_with_touchpoints(
+                    cabins, companies, hauls, start_dt, end_dt, anomaly_type, min_surveys, routes_frame=routes_frame
+                )
             
             self.logger.info(f"🎯 Analyzing routes based on main touchpoint drivers: {main_touchpoints}")
             
@@ -2955,39 +3104,19 @@ class CausalExplanationAgent:
             self.logger.info(f"🔍 DEBUG ROUTES: causal_filter={self.causal_filter}, comparison_start_date={self.comparison_start_date}, comparison_end_date={self.comparison_end_date}")
             self.logger.info(f"🔍 DEBUG ROUTES: cabins={cabins}, companies={companies}, hauls={hauls}")
             
-            # Use the pbi_collector method that properly handles comparison_filter
-            df = await self.pbi_collector.collect_routes_for_date_range(
-                node_path=node_path,
-                start_date=start_dt,
-                end_date=end_dt,
-                comparison_filter=self.causal_filter,  # Use the causal_filter from the agent
-                comparison_start_date=self.comparison_start_date,
-                comparison_end_date=self.comparison_end_date
-            )
-            
             # Debug logging for returned data
-            self.logger.info(f"🔍 DEBUG ROUTES: DataFrame shape={df.shape}, columns={list(df.columns) if not df.empty else 'empty'}")
-            if not df.empty:
-                self.logger.info(f"🔍 DEBUG ROUTES: First few rows: {df.head(3).to_dict('records')}")
+            self.logger.info(f"🔍 DEBUG ROUTES: DataFrame shape={routes_frame.df.shape}, columns={routes_frame.columns if not routes_frame.empty else 'empty'}")
+            if not routes_frame.empty:
+                self.logger.info(f"🔍 DEBUG ROUTES: First few rows: {routes_frame.df.head(3).to_dict('records')}")
             
-            if df.empty:
+            if routes_frame.empty:
                 return {"routes": [], "analysis": "❌ No explanatory drivers routes data found", "source": "explanatory_drivers"}
-                
-            # Clean column names
-            df.columns = [col.replace('[', '').replace(']', '') for col in df.columns]
-            
-            # Find key columns
-            route_col = self._find_column(df, ['route', 'Route', 'ROUTE'])
-            nps_col = self._find_column(df, ['nps', 'NPS', 'Nps'])
-            nps_diff_col = self._find_column(df, ['NPS diff', 'nps diff', 'nps_diff', 'vs'])
-            pax_col = self._find_column(df, ['pax', 'n (route)', 'Pax', 'PAX'])
             
-            if not route_col:
-                return {"routes": [], "analysis": f"❌ Missing route column. Available: {list(df.columns)}", "source": "explanatory_drivers"}
+            if not routes_frame.route_col:
+                return {"routes": [], "analysis": f"❌ Missing route column. Available: {routes_frame.columns}", "source": "explanatory_drivers"}
             
             # Filter by minimum surveys
-            if pax_col:
-                df = df[df[pax_col].fillna(0) >= min_surveys]
+            df = routes_frame.with_min_surveys(min_surveys)
             
             # Find touchpoint satisfaction columns for each driver (use CSAT diff for ordering)
             touchpoint_cols = {}
@@ -3101,19 +3230,17 @@ class CausalExplanationAgent:
                 
                 analysis_summary += f"\n   🔝 Top 5 routes by {touchpoint} ({sort_desc}):\n"
                 
-                for _, route in top_routes.iterrows():
-                    # Get absolute CSAT value for display
-                    abs_col = touchpoint_abs_cols.get(touchpoint)
-                    csat_abs = round(route[abs_col], 1) if abs_col and pd.notna(route[abs_col]) else None
-                    
+                # Absolute CSAT for display, CSAT diff (used for ordering)
+                top_records = routes_frame.records(top_routes, {'driver_score': touchpoint_abs_cols.get(touchpoint), 'driver_diff': col})
+                for record in top_records:
                     route_info = {
-                        "route": route[route_col],
+                        "route": record['route'],
                         "driver": touchpoint,
-                        "driver_score": csat_abs,  # Absolute CSAT for display
-                        "driver_diff": round(route[col], 1) if pd.notna(route[col]) else None,  # CSAT diff (used for ordering)
-                        "nps": round(route[nps_col], 1) if nps_col and pd.notna(route[nps_col]) else None,
-                        "nps_diff": round(route[nps_diff_col], 1) if nps_diff_col and pd.notna(route[nps_diff_col]) else None,
-                        "pax": int(route[pax_col]) if pax_col and pd.notna(route[pax_col]) else 0,
+                        "driver_score": record['driver_score'],
+                        "driver_diff": record['driver_diff'],
+                        "nps": record['nps'],
+                        "nps_diff": record['nps_diff'],
+                        "pax": record['pax'],
                         "source": "explanatory_drivers"
                     }
                     
@@ -3137,32 +3264,21 @@ class CausalExplanationAgent:
             return {"routes": [], "analysis": f"❌ Explanatory drivers routes error: {str(e)[:100]}", "source": "explanatory_drivers"}
 
     async def _get_general_routes_with_touchpoints(self, cabins: List[str], companies: List[str], 
-                                                 hauls: List[str], start_dt, end_dt, anomaly_type: str, min_surveys: int) -> dict:
+                                                 hauls: List[str], start_dt, end_dt, anomaly_type: str, min_surveys: int,
+                                                 routes_frame: RoutesFrame = None) -> dict:
         """Fallback method for general routes analysis when no specific touchpoints are available"""
         try:
-            # Use the pbi_collector method with comparison filter
-            df = await self.pbi_collector.collect_routes_for_date_range(
-                "Global", start_dt, end_dt,
-                comparison_filter=self.causal_filter,
-                comparison_start_date=self.comparison_start_date,
-                comparison_end_date=self.comparison_end_date
-            )
+            if routes_frame is None:
+                routes_frame = await self._get_routes_frame("Global", start_dt, end_dt)
             
-            if df.empty:
+            if routes_frame.empty:
                 return {"routes": [], "analysis": "❌ No general routes data found", "source": "explanatory_drivers"}
             
-            # Clean column names safely
-            df = self._safe_clean_columns(df, method="strip")
-            route_col = self._find_column(df, ['route'])
-            nps_col = self._find_column(df, ['nps'])
-            pax_col = self._find_column(df, ['pax', 'n (route)'])
-            
-            if pax_col:
-                df = df[df[pax_col].fillna(0) >= min_surveys]
+            nps_col = routes_frame.nps_col
+            nps_diff_col = routes_frame.nps_diff_col
+            df = routes_frame.with_min_surveys(min_surveys)
             
             # Sort by NPS and NPS diff if available
-            nps_diff_col = self._find_column(df, ['NPS diff', 'nps diff'])
-            
             if anomaly_type in ['-', 'negative', 'neg']:
                 sort_cols = [nps_col]
                 sort_ascending = [True]
@@ -3178,14 +3294,10 @@ class CausalExplanationAgent:
                     sort_ascending.append(False)  # Most positive diff first
                 df = df.sort_values(by=sort_cols, ascending=sort_ascending)
             
-            routes_analysis = []
-            for _, route in df.head(5).iterrows():
-                routes_analysis.append({
-                    "route": route[route_col],
-                    "nps": round(route[nps_col], 1),
-                    "pax": int(route[pax_col]) if pax_col else 0,
-                    "touchpoint_scores": {}
-                })
+            routes_analysis = [
+                {"route": record['route'], "nps": record['nps'], "pax": record['pax'], "touchpoint_scores": {}}
+                for record in routes_frame.records(df.head(5))
+            ]
             
             return {
                 "routes": routes_analysis,
@@ -3196,7 +3308,8 @@ class CausalExplanationAgent:
         except Exception as e:
             return {"routes": [], "analysis": f"❌ General routes error: {str(e)[:100]}", "source": "explanatory_drivers"}
 
-    async def _get_ncs_routes(self, node_path: str, cabins: List[str], companies: List[str], hauls: List[str], start_dt, end_dt) -> dict:
+    async def _get_ncs_routes(self, node_path: str, cabins: List[str], companies: List[str], hauls: List[str], start_dt, end_dt,
+                              routes_frame: RoutesFrame = None) -> dict:
         """Get routes from NCS operational incidents data"""
         try:
             # Get identified routes from NCS analysis
@@ -3212,44 +3325,22 @@ class CausalExplanationAgent:
             
             self.logger.info(f"🎯 Analyzing NCS-specific routes: {all_ncs_routes}")
             
-            # Get data for these specific routes using the same method as explanatory drivers
-            # to ensure we get the correct NPS_diff values
-            df_ncs = await self.pbi_collector.collect_routes_for_date_range(
-                node_path=node_path,
-                start_date=start_dt,
-                end_date=end_dt,
-                comparison_filter=self.causal_filter,
-                comparison_start_date=self.comparison_start_date,
-                comparison_end_date=self.comparison_end_date
-            )
+            # Same routes data as the explanatory drivers (correct NPS_diff values), filtered to the NCS routes
+            if routes_frame is None:
+                routes_frame = await self._get_routes_frame(node_path, start_dt, end_dt)
             
-            if df_ncs.empty:
+            if routes_frame.empty:
                 return {"routes": [], "analysis": f"❌ No data found for NCS routes: {', '.join(all_ncs_routes)}", "source": "ncs"}
             
-            # Clean column names safely
-            df_ncs = self._safe_clean_columns(df_ncs, method="replace")
-            
-            # Filter to only include the NCS routes
-            route_col = self._find_column(df_ncs, ['route', 'Route', 'ROUTE'])
-            if route_col:
-                df_ncs = df_ncs[df_ncs[route_col].isin(all_ncs_routes)]
+            df_ncs = routes_frame.for_routes(all_ncs_routes)
             
             if df_ncs.empty:
                 return {"routes": [], "analysis": f"❌ No data found for NCS routes after filtering: {', '.join(all_ncs_routes)}", "source": "ncs"}
             
-            nps_col = self._find_column(df_ncs, ['nps', 'NPS', 'Nps'])
-            nps_diff_col = self._find_column(df_ncs, ['NPS diff', 'nps diff', 'nps_diff', 'vs'])
-            pax_col = self._find_column(df_ncs, ['pax', 'n (route)', 'Pax', 'PAX'])
-            
-            routes_analysis = []
-            for _, route in df_ncs.iterrows():
-                route_info = {
-                    "route": route[route_col] if route_col else "Unknown",
-                    "nps": round(route[nps_col], 1) if nps_col and pd.notna(route[nps_col]) else None,
-                    "pax": int(route[pax_col]) if pax_col and pd.notna(route[pax_col]) else 0,
-                    "nps_diff": round(route[nps_diff_col], 1) if nps_diff_col and pd.notna(route[nps_diff_col]) else None
-                }
-                routes_analysis.append(route_info)
+            routes_analysis = [
+                {"route": record['route'], "nps": record['nps'], "pax": record['pax'], "nps_diff": record['nps_diff']}
+                for record in routes_frame.records(df_ncs)
+            ]
             
             analysis_summary = f"🚨 NCS OPERATIONAL INCIDENTS ROUTES:\n"
             analysis_summary += f"   📊 Routes found: {len(routes_analysis)}/{len(all_ncs_routes)}\n"
@@ -3273,7 +3364,8 @@ class CausalExplanationAgent:
             self.logger.error(f"Error in NCS routes analysis: {e}")
             return {"routes": [], "analysis": f"❌ NCS routes error: {str(e)[:100]}", "source": "ncs"}
 
-    async def _get_verbatims_routes(self, node_path: str, cabins: List[str], companies: List[str], hauls: List[str], start_dt, end_dt) -> dict:
+    async def _get_verbatims_routes(self, node_path: str, cabins: List[str], companies: List[str], hauls: List[str], start_dt, end_dt,
+                                    routes_frame: RoutesFrame = None) -> dict:
         """Get routes mentioned in verbatims/customer feedback"""
         try:
             # Get routes identified from verbatims conversation
@@ -3296,44 +3388,22 @@ class CausalExplanationAgent:
             
             self.logger.info(f"🎯 Analyzing verbatims-mentioned routes: {verbatims_routes}")
             
-            # Get data for these routes using the same method as explanatory drivers
-            # to ensure we get the correct NPS_diff values
-            df_verbatims = await self.pbi_collector.collect_routes_for_date_range(
-                node_path=node_path,
-                start_date=start_dt,
-                end_date=end_dt,
-                comparison_filter=self.causal_filter,
-                comparison_start_date=self.comparison_start_date,
-                comparison_end_date=self.comparison_end_date
-            )
+            # Same routes data as the explanatory drivers (correct NPS_diff values), filtered to the verbatims routes
+            if routes_frame is None:
+                routes_frame = await self._get_routes_frame(node_path, start_dt, end_dt)
             
-            if df_verbatims.empty:
+            if routes_frame.empty:
                 return {"routes": [], "analysis": f"❌ No data found for verbatims routes: {', '.join(verbatims_routes)}", "source": "verbatims"}
             
-            # Clean column names
-            df_verbatims.columns = [col.replace('[', '').replace(']', '') for col in df_verbatims.columns]
-            
-            # Filter to only include the verbatims routes
-            route_col = self._find_column(df_verbatims, ['route', 'Route', 'ROUTE'])
-            if route_col:
-                df_verbatims = df_verbatims[df_verbatims[route_col].isin(verbatims_routes)]
+            df_verbatims = routes_frame.for_routes(verbatims_routes)
             
             if df_verbatims.empty:
                 return {"routes": [], "analysis": f"❌ No data found for verbatims routes after filtering: {', '.join(verbatims_routes)}", "source": "verbatims"}
             
-            nps_col = self._find_column(df_verbatims, ['nps', 'NPS', 'Nps'])
-            nps_diff_col = self._find_column(df_verbatims, ['NPS diff', 'nps diff', 'nps_diff', 'vs'])
-            pax_col = self._find_column(df_verbatims, ['pax', 'n (route)', 'Pax', 'PAX'])
-            
-            routes_analysis = []
-            for _, route in df_verbatims.iterrows():
-                route_info = {
-                    "route": route[route_col] if route_col else "Unknown",
-                    "nps": round(route[nps_col], 1) if nps_col and pd.notna(route[nps_col]) else None,
-                    "pax": int(route[pax_col]) if pax_col and pd.notna(route[pax_col]) else 0,
-                    "nps_diff": round(route[nps_diff_col], 1) if nps_diff_col and pd.notna(route[nps_diff_col]) else None
-                }
-                routes_analysis.append(route_info)
+            routes_analysis = [
+                {"route": record['route'], "nps": record['nps'], "pax": record['pax'], "nps_diff": record['nps_diff']}
+                for record in routes_frame.records(df_verbatims)
+            ]
             
             analysis_summary = f"💬 CUSTOMER VERBATIMS ROUTES:\n"
             analysis_summary += f"   📊 Routes found: {len(routes_analysis)}/{len(verbatims_routes)}\n"
@@ -3555,7 +3625,7 @@ class CausalExplanationAgent:
                     return col
         return None
     
-    async def _customer_profile_tool(self, node_path: str, start_date: str, end_date: str, min_surveys: int = 3, profile_dimension: str = "Multiple", mode: str = "comparative") -> str:
+    async def _customer_profile_tool(self, node_path: str, start_date: str, end_date: str, min_surveys: int = 3, profile_dimension: str = "Multiple", mode: str = "comparative") -> ToolResult:
         """
         Tool for analyzing customer profile segments.
         - Comparative mode: NPS impact vs comparison filter (L7d, LM, etc.)
@@ -3574,32 +3644,37 @@ class CausalExplanationAgent:
             # Choosing reason, Business/Leisure, Travel reason, Fleet, CodeShare, Region, 
             # Channel, Demand spaces, Corporate, Connection, Fare Family, Issue Type, Travelling with
             if profile_dimension == "Multiple":
-                dimensions = ["Business/Leisure", "Fleet", "Residence Region", "CodeShare"]
+                # Collected in one round, so extra dimensions do not add latency (CUSTOMER_PROFILE_DIMENSIONS)
+                dimensions_env = os.getenv("CUSTOMER_PROFILE_DIMENSIONS", "")
+                dimensions = [d.strip() for d in dimensions_env.split(",") if d.strip()] or \
+                    ["Business/Leisure", "Fleet", "Residence Region", "CodeShare"]
             else:
                 dimensions = [profile_dimension]
             
             results = []
             nps_impact_summary = []
             
+            # All dimensions in one round (concurrent queries, or one multi-dimension query)
+            if mode == "comparative":
+                profiles = await self._get_shared_customer_profiles(
+                    node_path, start_dt, end_dt, dimensions,
+                    comparison_filter=self.causal_filter,
+                    comparison_start_date=self.comparison_start_date,
+                    comparison_end_date=self.comparison_end_date
+                )
+            else:  # single mode
+                profiles = await self._get_shared_customer_profiles(
+                    node_path, start_dt, end_dt, dimensions,
+                    comparison_filter=None,  # No comparison in single mode
+                    comparison_start_date=None,
+                    comparison_end_date=None
+                )
+            
             for dimension in dimensions:
                 try:
                     self.logger.info(f"Analyzing NPS impact for dimension: {dimension}")
                     
-                    # collect_customer_profile_for_date_range IS async
-                    if mode == "comparative":
-                        df = await self.pbi_collector.collect_customer_profile_for_date_range(
-                            node_path, start_dt, end_dt, dimension,
-                            comparison_filter=self.causal_filter,
-                            comparison_start_date=self.comparison_start_date,
-                            comparison_end_date=self.comparison_end_date
-                        )
-                    else:  # single mode
-                        df = await self.pbi_collector.collect_customer_profile_for_date_range(
-                            node_path, start_dt, end_dt, dimension,
-                            comparison_filter=None,  # No comparison in single mode
-                            comparison_start_date=None,
-                            comparison_end_date=None
-                    )
+                    df = profiles.get(dimension, pd.DataFrame())
                     
                     if df.empty:
                         results.append(f"❌ {dimension}: No data found")
@@ -3815,11 +3890,11 @@ class CausalExplanationAgent:
                 'nps_impact_data': nps_impact_summary,
                 'focus': 'nps_impact_vs_last_days'
             }
-            return result
+            return ToolResult.from_text("customer_profile_tool", result, data=self.collected_data['customer_profile'])
             
         except Exception as e:
             self.logger.error(f"💥 Error in customer profile NPS impact analysis: {str(e)}")
-            return f"Error in customer profile NPS impact analysis: {str(e)}"
+            return ToolResult.from_text("customer_profile_tool", f"Error in customer profile NPS impact analysis: {str(e)}", status="error")
     
     def _safe_clean_columns(self, df: pd.DataFrame, method: str = "strip") -> pd.DataFrame:
         """
@@ -4206,13 +4281,21 @@ class CausalExplanationAgent:
         else:
             return "⚪ Sin impacto en NPS"
     
-    async def _get_clean_reflection(self, system_prompt: str, tool_name: str, tool_result: str, helper_guidance: str, mode: str = "comparative") -> Optional[str]:
+    async def _get_clean_reflection(self, system_prompt: str, tool_name: str, tool_result, helper_guidance: str, mode: str = "comparative") -> Optional[str]:
         """Get AI reflection using clean context + helper prompt + tool results"""
         try:
             self.logger.info(f"🤔 Starting reflection for {tool_name}...")
             
             # Create clean message history for reflection
-            clean_messages = self.tracker.get_clean_context(system_prompt)
+            clean_messages = self.tracker.get_clean_context(system_prompt, self.context_budget)
+            
+            # Large tool results are compressed structurally to the token budget (top entries + omitted counts)
+            tool_result = str(tool_result)
+            result_tokens = self.context_budget.count(tool_result)
+            tool_result = self.context_budget.fit_tool_result(tool_result)
+            fitted_tokens = self.context_budget.count(tool_result)
+            if fitted_tokens < result_tokens:
+                self.logger.info(f"🗜️ {tool_name} result compacted for reflection: {result_tokens} → {fitted_tokens} tokens")
             
             # Add current tool context with helper prompt and results using new mode-specific template
             reflection_template = self._get_reflection_prompt(mode)
@@ -4229,27 +4312,7 @@ class CausalExplanationAgent:
             else:
                 reflection_prompt = f"Analiza los resultados de {tool_name.upper()}\n\n{helper_guidance}\n\n{tool_result}"
             
-            # Check reflection prompt size
-            prompt_size = len(reflection_prompt)
-            self.logger.debug(f"📏 Reflection prompt size: {prompt_size} chars")
-            
-            if prompt_size > 60000:  # 60KB limit for reflection
-                self.logger.warning(f"⚠️ Reflection prompt very large ({prompt_size} chars) - truncating tool result")
-                truncated_result = tool_result[:30000] + "\n\n[... TOOL RESULT TRUNCATED DUE TO SIZE ...]"
-                reflection_template = self._get_reflection_prompt(mode)
-                if reflection_template:
-                    # Ensure causal_filter has a safe value for template formatting
-                    safe_causal_filter = self.causal_filter if self.causal_filter else "período de referencia"
-                    reflection_prompt = reflection_template.format(
-                    tool_name=tool_name.upper(),
-                    helper_guidance=helper_guidance,
-                    tool_result=truncated_result,
-                        causal_filter=safe_causal_filter,
-                        comparison_filter=safe_causal_filter  # For backwards compatibility
-                )
-                else:
-                    reflection_prompt = f"Analiza los resultados de {tool_name.upper()}\n\n{helper_guidance}\n\n{truncated_result}"
-                self.logger.debug(f"📏 Truncated reflection prompt size: {len(reflection_prompt)} chars")
+            self.logger.debug(f"📏 Reflection prompt size: {self.context_budget.count(reflection_prompt)} tokens")
             
             clean_messages.append({
                 "role": "user",
@@ -4260,8 +4323,11 @@ class CausalExplanationAgent:
             self.logger.debug(f"🕒 Starting LLM call for {tool_name} reflection with 60s timeout")
             
             response, _, _ = await asyncio.wait_for(
-                self.agent.invoke(
-                    messages=clean_messages,
+                invoke_agent(
+                    self.agent,
+                    clean_messages,
+                    self.stream_handler,
+                    section=f"reflection:{tool_name}",
                     tools=[],  # No tools for reflection
                     structured_output=None  # No structured output for reflections
                 ),
@@ -4321,12 +4387,13 @@ class CausalExplanationAgent:
         
         # Check if request is too large
         request_size = len(enhanced_final_request)
-        self.logger.info(f"📏 Final request size: {request_size} chars")
+        summary_tokens = self.context_budget.count(data_summary)
+        self.logger.info(f"📏 Final request size: {request_size} chars (data summary: {summary_tokens} tokens)")
         
-        if request_size > 100000:  # 100KB limit
-            self.logger.warning(f"⚠️ Final request very large ({request_size} chars) - truncating data summary")
-            # Truncate data summary to prevent LLM overload
-            truncated_summary = data_summary[:25000] + "\n\n[... DATA TRUNCATED DUE TO SIZE ...]"
+        if summary_tokens > self.context_budget.synthesis_data_tokens:
+            self.logger.warning(f"⚠️ Data summary over budget ({summary_tokens} tokens) - compacting data summary")
+            # Compress the data summary structurally to the synthesis token budget
+            truncated_summary = self.context_budget.fit_tool_result(data_summary, self.context_budget.synthesis_data_tokens)
             enhanced_final_request = f"""
 {self.config.get('final_synthesis_prompt', 'Genera un informe causal consolidado basado en los datos recolectados.')}
 
@@ -4341,7 +4408,7 @@ class CausalExplanationAgent:
 - Integra los hallazgos de todas las herramientas ejecutadas
 - **IMPORTANTE**: Menciona los NPS específicos del período analizado y el período de comparación{nps_context}
 """
-            self.logger.info(f"📏 Truncated request size: {len(enhanced_final_request)} chars")
+            self.logger.info(f"📏 Compacted data summary: {self.context_budget.count(truncated_summary)} tokens")
         
         message_history.create_and_add_message(
             content=enhanced_final_request,
@@ -4359,8 +4426,11 @@ class CausalExplanationAgent:
             # Add timeout to prevent hanging
             import asyncio
             final_response, final_structured_response, _ = await asyncio.wait_for(
-                self.agent.invoke(
-                    messages=message_history.get_messages(),
+                invoke_agent(
+                    self.agent,
+                    message_history.get_messages(),
+                    self.stream_handler,
+                    section="final_synthesis",
                     tools=[],
                     structured_output=None  # Remove structured output to get narrative content
                 ),
@@ -4576,6 +4646,49 @@ class CausalExplanationAgent:
             summary[msg_type] = summary.get(msg_type, 0) + 1
         return summary
 
+    async def _get_shared_ncs_data(self, start_dt: datetime, end_dt: datetime) -> pd.DataFrame:
+        """Raw NCS incidents of a date range, fetched once for every node of the period (data plane)"""
+        return await self.data_plane.get(
+            "ncs", (start_dt, end_dt),
+            lambda: asyncio.to_thread(self.ncs_collector.collect_ncs_data_for_date_range, start_dt, end_dt)
+        )
+    
+    async def _get_ncs_segment_data(self, start_dt: datetime, end_dt: datetime, node_path: str) -> pd.DataFrame:
+        """NCS incidents of a date range narrowed to the node, sliced from the shared raw data"""
+        async def load_segment():
+            ncs_data = await self._get_shared_ncs_data(start_dt, end_dt)
+            return await self._filter_ncs_by_segment(ncs_data, node_path)
+        
+        return await self.data_plane.get("ncs_segment", (start_dt, end_dt, node_path), load_segment)
+    
+    async def _get_shared_routes(self, node_path: str, start_date: datetime, end_date: datetime, comparison_filter: str = "vs L7d",
+                                 comparison_start_date: datetime = None, comparison_end_date: datetime = None) -> pd.DataFrame:
+        """Routes of a node through the data plane (the same query is run once per period); returns a private copy"""
+        key = (node_path, start_date, end_date, comparison_filter, comparison_start_date, comparison_end_date)
+        df = await self.data_plane.get(
+            "routes", key,
+            lambda: self.pbi_collector.collect_routes_for_date_range(
+                node_path, start_date, end_date, comparison_filter, comparison_start_date, comparison_end_date
+            )
+        )
+        return df.copy()
+    
+    async def _get_shared_customer_profiles(self, node_path: str, start_date: datetime, end_date: datetime, dimensions: List[str],
+                                            comparison_filter: str = "vs L7d", comparison_start_date: datetime = None,
+                                            comparison_end_date: datetime = None) -> Dict[str, pd.DataFrame]:
+        """Customer profile of a node for several dimensions (collected concurrently) through the data plane; returns private copies"""
+        key = (node_path, start_date, end_date, tuple(dimensions), comparison_filter, comparison_start_date, comparison_end_date)
+        profiles = await self.data_plane.get(
+            "customer_profile", key,
+            lambda: self.pbi_collector.collect_customer_profile_dimensions(
+                node_path, start_date, end_date, dimensions,
+                comparison_filter=comparison_filter,
+                comparison_start_date=comparison_start_date,
+                comparison_end_date=comparison_end_date
+            )
+        )
+        return {dimension: df.copy() for dimension, df in profiles.items()}
+    
     async def _filter_ncs_by_segment(self, ncs_data: pd.DataFrame, node_path: str) -> pd.DataFrame:
         """
         Simple NCS filtering by segment characteristics without external dependencies.
@@ -4877,89 +4990,15 @@ class CausalExplanationAgent:
     
     def _identify_disruption_causes(self, incidents_text: str) -> list:
         """Extract disruption causes from incident text."""
-        causes = []
-        if 'delay' in incidents_text.lower():
-            causes.append('Flight delays')
-        if 'cancel' in incidents_text.lower():
-            causes.append('Flight cancellations')
-        if 'weather' in incidents_text.lower():
-            causes.append('Weather disruptions')
-        if 'maintenance' in incidents_text.lower():
-            causes.append('Maintenance issues')
-        return causes or ['Operational incidents detected']
+        return get_ncs_text_index(incidents_text).disruption_causes()
     
     def _extract_route_impacts(self, incidents_text: str) -> dict:
         """Extract affected routes from incident text with enhanced patterns for LH routes."""
-        import re
-        
-        routes = []
-        route_impact_summary = {}
-        
-        # Enhanced route patterns for long-haul routes
-        # Pattern 1: Standard XXX-YYY format
-        route_pattern = r'\b([A-Z]{3})\s*[-–]\s*([A-Z]{3})\b'
-        route_matches = re.findall(route_pattern, incidents_text, re.IGNORECASE)
-        
-        for origin, dest in route_matches:
-            route_code = f"{origin.upper()}-{dest.upper()}"
-            routes.append(route_code)
-            route_impact_summary[route_code] = 'Route-specific operational incidents'
-        
-        # Pattern 2: Individual airport codes mentioned (for LH segment)
-        lh_airports = {
-            # Americas
-            'JFK': 'New York', 'MIA': 'Miami', 'EZE': 'Buenos Aires', 'BOG': 'Bogotá',
-            'LIM': 'Lima', 'SCL': 'Santiago', 'GRU': 'São Paulo', 'MEX': 'Mexico City',
-            'ORD': 'Chicago', 'DFW': 'Dallas', 'LAX': 'Los Angeles', 'CCS': 'Caracas',
-            'SDQ': 'Santo Domingo', 'HAV': 'Havana', 'BOS': 'Boston', 'YUL': 'Montreal',
-            # Africa/Middle East  
-            'CAI': 'Cairo', 'JNB': 'Johannesburg', 'CMN': 'Casablanca', 'ALG': 'Algiers',
-            'TUN': 'Tunis', 'DAR': 'Dar es Salaam', 'ADD': 'Addis Ababa',
-            # Asia/Pacific
-            'NRT': 'Tokyo', 'PVG': 'Shanghai', 'ICN': 'Seoul', 'BKK': 'Bangkok',
-            'SIN': 'Singapore', 'HKG': 'Hong Kong', 'DEL': 'Delhi', 'BOM': 'Mumbai'
-        }
-        
-        # Look for specific LH airport mentions
-        for airport_code, city_name in lh_airports.items():
-            if re.search(rf'\b{airport_code}\b', incidents_text, re.IGNORECASE):
-                # Create route as MAD-XXX (assuming MAD as hub)
-                route_code = f"MAD-{airport_code}"
-                if route_code not in routes:
-                    routes.append(route_code)
-                    route_impact_summary[route_code] = f'Incidents affecting {city_name} route'
-        
-        # Pattern 3: City/country names to airport mapping
-        city_to_airport = {
-            'new york': 'JFK', 'miami': 'MIA', 'buenos aires': 'EZE', 'bogota': 'BOG',
-            'lima': 'LIM', 'santiago': 'SCL', 'sao paulo': 'GRU', 'mexico': 'MEX',
-            'chicago': 'ORD', 'dallas': 'DFW', 'los angeles': 'LAX', 'caracas': 'CCS',
-            'tokyo': 'NRT', 'shanghai': 'PVG', 'seoul': 'ICN', 'bangkok': 'BKK'
-        }
-        
-        for city_name, airport_code in city_to_airport.items():
-            if re.search(rf'\b{city_name}\b', incidents_text, re.IGNORECASE):
-                route_code = f"MAD-{airport_code}"
-                if route_code not in routes:
-                    routes.append(route_code)
-                    route_impact_summary[route_code] = f'Incidents mentioned for {city_name.title()}'
-        
-        # Deduplicate routes
-        unique_routes = list(dict.fromkeys(routes))
-        
-        return {
-            'affected_routes': unique_routes,
-            'route_impact_summary': route_impact_summary
-        }
+        return get_ncs_text_index(incidents_text).route_impacts()
     
     def _correlate_ncs_with_touchpoints(self, incidents_text: str) -> dict:
         """Correlate NCS incidents with known touchpoints."""
-        correlations = {}
-        if 'punctuality' in incidents_text.lower():
-            correlations['Punctuality'] = 'NCS incidents affecting punctuality'
-        if 'boarding' in incidents_text.lower():
-            correlations['Boarding'] = 'NCS incidents affecting boarding'
-        return correlations
+        return get_ncs_text_index(incidents_text).touchpoint_correlations()
     
     def _interpret_causes_by_anomaly_direction(self, identified_causes: list, incident_nature: str, anomaly_type: str) -> list:
         """Interpret causes based on anomaly direction."""
@@ -5292,205 +5331,11 @@ Proporciona análisis estructurado, específico y respaldado por números."""
 
     def _extract_structured_ncs_data(self, incidents_text: str) -> dict:
         """Extract structured NCS data with categories, motives, routes, and aggregated counts"""
-        import re
-        
-        structured_data = {
-            "categories": {},
-            "route_disruptions": {},
-            "motives_breakdown": {},
-            "operator_breakdown": {},
-            "passenger_impact": {"j_class": 0, "w_class": 0, "y_class": 0, "total": 0},
-            "delay_statistics": {"total_minutes": 0, "count": 0, "avg_delay": 0},
-            "summary": {}
-        }
-        
-        # Extract category totals (Cancelaciones, Retrasos, Desvíos, etc.)
-        category_patterns = {
-            "cancelaciones": r'Cancelaciones\s*Total\s*(\d+)',
-            "retrasos": r'Retrasos\s*Total\s*(\d+)', 
-            "desvios": r'Desvíos\s*Total\s*(\d+)',
-            "otras_incidencias": r'Otras incidencias\s*Total\s*(\d+)',
-            "limitacion_aeronave": r'Limitación de la aeronave\s*Total\s*(\d+)'
-        }
-        
-        for category, pattern in category_patterns.items():
-            match = re.search(pattern, incidents_text, re.IGNORECASE)
-            if match:
-                structured_data["categories"][category] = int(match.group(1))
-        
-        # Extract route patterns with incident type breakdown
-        route_pattern = r'\b([A-Z]{3})\s*[-–]\s*([A-Z]{3})\b'
-        
-        # Enhanced route extraction with incident type classification
-        route_incident_breakdown = {}
-        
-        # Split text into sections by incident type for better classification
-        sections = {
-            'cancelaciones': re.findall(r'Cancelaciones.*?(?=Desvíos|Retrasos|Otras incidencias|Limitación|\Z)', incidents_text, re.DOTALL | re.IGNORECASE),
-            'desvios': re.findall(r'Desvíos.*?(?=Cancelaciones|Retrasos|Otras incidencias|Limitación|\Z)', incidents_text, re.DOTALL | re.IGNORECASE),
-            'retrasos': re.findall(r'Retrasos.*?(?=Cancelaciones|Desvíos|Otras incidencias|Limitación|\Z)', incidents_text, re.DOTALL | re.IGNORECASE),
-            'otras_incidencias': re.findall(r'Otras incidencias.*?(?=Cancelaciones|Desvíos|Retrasos|Limitación|\Z)', incidents_text, re.DOTALL | re.IGNORECASE),
-            'limitacion_aeronave': re.findall(r'Limitación de la aeronave.*?(?=Cancelaciones|Desvíos|Retrasos|Otras incidencias|\Z)', incidents_text, re.DOTALL | re.IGNORECASE)
-        }
-        
-        # Process each section to extract routes by incident type
-        for incident_type, sections_text in sections.items():
-            for section in sections_text:
-                routes_in_section = re.findall(route_pattern, section, re.IGNORECASE)
-                for origin, dest in routes_in_section:
-                    route_code = f"{origin.upper()}-{dest.upper()}"
-                    
-                    if route_code not in route_incident_breakdown:
-                        route_incident_breakdown[route_code] = {
-                            'cancelaciones': 0, 'desvios': 0, 'retrasos': 0, 
-                            'otras_incidencias': 0, 'limitacion_aeronave': 0, 'total': 0
-                        }
-                    
-                    route_incident_breakdown[route_code][incident_type] += 1
-                    route_incident_breakdown[route_code]['total'] += 1
-        
-        # Fallback: if no structured sections found, do general route extraction
-        if not route_incident_breakdown:
-            route_matches = re.findall(route_pattern, incidents_text, re.IGNORECASE)
-            for origin, dest in route_matches:
-                route_code = f"{origin.upper()}-{dest.upper()}"
-                structured_data["route_disruptions"][route_code] = structured_data["route_disruptions"].get(route_code, 0) + 1
-        else:
-            # Use the detailed breakdown
-            for route, breakdown in route_incident_breakdown.items():
-                structured_data["route_disruptions"][route] = breakdown['total']
-            
-            # Store detailed breakdown separately
-            structured_data["route_incident_breakdown"] = route_incident_breakdown
-        
-        # Extract passenger impact by class
-        passenger_patterns = {
-            "j_class": r'J\s*(\d+)',
-            "w_class": r'W\s*(\d+)', 
-            "y_class": r'Y\s*(\d+)'
-        }
-        
-        for class_type, pattern in passenger_patterns.items():
-            matches = re.findall(pattern, incidents_text, re.IGNORECASE)
-            if matches:
-                structured_data["passenger_impact"][class_type] = sum(int(match) for match in matches)
-        
-        # Calculate total passengers
-        structured_data["passenger_impact"]["total"] = (
-            structured_data["passenger_impact"]["j_class"] + 
-            structured_data["passenger_impact"]["w_class"] + 
-            structured_data["passenger_impact"]["y_class"]
-        )
-        
-        # Extract delay minutes for statistics
-        delay_pattern = r'(\d+)\s*minutos'
-        delay_matches = re.findall(delay_pattern, incidents_text, re.IGNORECASE)
-        if delay_matches:
-            delays = [int(match) for match in delay_matches]
-            structured_data["delay_statistics"]["total_minutes"] = sum(delays)
-            structured_data["delay_statistics"]["count"] = len(delays)
-            structured_data["delay_statistics"]["avg_delay"] = round(sum(delays) / len(delays), 1) if delays else 0
-        
-        # Extract common motives
-        motive_patterns = {
-            "tecnicas": r'causas técnicas|técnicos|mantenimiento',
-            "operativas": r'causas operativas|operativo',
-            "meteorologia": r'meteorología|meteorológic',
-            "rotacion_avion": r'rotación de avión|rotación',
-            "atc": r'\bATC\b',
-            "equipaje": r'equipaje|maletas'
-        }
-        
-        for motive, pattern in motive_patterns.items():
-            count = len(re.findall(pattern, incidents_text, re.IGNORECASE))
-            if count > 0:
-                structured_data["motives_breakdown"][motive] = count
-        
-        # Extract operators (Privilege, Iberojet, etc.)
-        operator_patterns = {
-            "privilege": r'Privilege',
-            "iberojet": r'Iberojet', 
-            "iberia": r'IB\d+'  # Regular Iberia flights
-        }
-        
-        for operator, pattern in operator_patterns.items():
-            count = len(re.findall(pattern, incidents_text, re.IGNORECASE))
-            if count > 0:
-                structured_data["operator_breakdown"][operator] = count
-        
-        # Create summary with enhanced multi-day aggregation
-        total_incidents = sum(structured_data["categories"].values())
-        most_affected_route = max(structured_data["route_disruptions"].items(), key=lambda x: x[1]) if structured_data["route_disruptions"] else None
-        main_motive = max(structured_data["motives_breakdown"].items(), key=lambda x: x[1]) if structured_data["motives_breakdown"] else None
-        
-        # ENHANCED: Multi-day route prioritization for routes_tool
-        priority_routes_for_investigation = []
-        if structured_data["route_disruptions"]:
-            # Sort routes by frequency (most disrupted first)
-            sorted_routes = sorted(structured_data["route_disruptions"].items(), key=lambda x: x[1], reverse=True)
-            
-            # Categorize routes by disruption frequency for investigation priority
-            for route, count in sorted_routes:
-                if count >= 5:  # High priority: 5+ incidents
-                    priority_routes_for_investigation.append({"route": route, "incidents": count, "priority": "HIGH"})
-                elif count >= 3:  # Medium priority: 3-4 incidents  
-                    priority_routes_for_investigation.append({"route": route, "incidents": count, "priority": "MEDIUM"})
-                elif count >= 2:  # Low priority: 2 incidents
-                    priority_routes_for_investigation.append({"route": route, "incidents": count, "priority": "LOW"})
-        
-        structured_data["summary"] = {
-            "total_incidents": total_incidents,
-            "most_affected_route": most_affected_route,
-            "main_motive": main_motive,
-            "total_passengers_affected": structured_data["passenger_impact"]["total"],
-            "avg_delay_minutes": structured_data["delay_statistics"]["avg_delay"],
-            "priority_routes_for_investigation": priority_routes_for_investigation,
-            "routes_requiring_nps_analysis": [r["route"] for r in priority_routes_for_investigation if r["priority"] in ["HIGH", "MEDIUM"]]
-        }
-        
-        return structured_data
+        return get_ncs_text_index(incidents_text).structured_data()
 
     def _extract_route_disruption_counts(self, incidents_text: str) -> dict:
         """Extract route disruption counts from incident text for enhanced analysis"""
-        import re
-        
-        route_disruptions = {}
-        
-        # Enhanced route pattern to capture XXX-YYY format
-        route_pattern = r'\b([A-Z]{3})\s*[-–]\s*([A-Z]{3})\b'
-        route_matches = re.findall(route_pattern, incidents_text, re.IGNORECASE)
-        
-        for origin, dest in route_matches:
-            route_code = f"{origin.upper()}-{dest.upper()}"
-            route_disruptions[route_code] = route_disruptions.get(route_code, 0) + 1
-        
-        # Enhanced patterns for hub routes (MAD as origin/destination)
-        mad_patterns = [
-            r'MAD[O-]\s*([A-Z]{3})',  # MAD-XXX or MADO XXX
-            r'([A-Z]{3})\s*[-O]\s*MAD',  # XXX-MAD or XXX O MAD  
-            r'Madrid\s*[-–]\s*([A-Z]{3})',  # Madrid-XXX
-            r'([A-Z]{3})\s*[-–]\s*Madrid',  # XXX-Madrid
-        ]
-        
-        for pattern in mad_patterns:
-            matches = re.findall(pattern, incidents_text, re.IGNORECASE)
-            for match in matches:
-                if isinstance(match, tuple):
-                    # Handle tuple matches from multiple capture groups
-                    for airport in match:
-                        if airport and airport != 'MAD':
-                            route_code = f"MAD-{airport.upper()}"
-                            route_disruptions[route_code] = route_disruptions.get(route_code, 0) + 1
-                else:
-                    # Single airport code
-                    if match and match != 'MAD':
-                        route_code = f"MAD-{match.upper()}"
-                        route_disruptions[route_code] = route_disruptions.get(route_code, 0) + 1
-        
-        # Sort by disruption count (highest first)
-        sorted_disruptions = dict(sorted(route_disruptions.items(), key=lambda x: x[1], reverse=True))
-        
-        return sorted_disruptions
+        return get_ncs_text_index(incidents_text).route_disruption_counts()
 
     def _extract_causes_from_llm_response(self, llm_response: str) -> list:
         """Extract identified causes from LLM analysis response"""
@@ -5573,30 +5418,23 @@ Proporciona análisis estructurado, específico y respaldado por números."""
         try:
             self.logger.info(f"🗺️ Filtering NCS using routes dictionary for haul: {target_haul}")
             
-            # 1. Obtener diccionario de rutas
-            routes_dict = await self.pbi_collector.collect_routes_dictionary()
+            # 1. Obtener diccionario de rutas (cargado una vez por ejecución)
+            routes_dictionary = await get_routes_dictionary(self.pbi_collector)
             
-            if routes_dict.empty:
+            if routes_dictionary.empty:
                 self.logger.warning("❌ Routes dictionary is empty, falling back to original data")
                 return ncs_data
             
-            # 2. Filtrar rutas del haul objetivo
-            target_routes = routes_dict[routes_dict['haul_aggr'] == target_haul]
-            
-            if target_routes.empty:
+            # 2. Rutas del haul objetivo
+            route_count = routes_dictionary.route_count(target_haul)
+            if route_count == 0:
                 self.logger.warning(f"❌ No routes found for haul {target_haul} in dictionary")
                 return ncs_data
-                
-            target_route_codes = target_routes['route'].tolist()
-            self.logger.info(f"📊 Found {len(target_route_codes)} routes for {target_haul}")
             
-            # 3. Extraer códigos de aeropuerto de las rutas (MAD-BCN → MAD, BCN)
-            airport_codes = set()
-            for route in target_route_codes:
-                if '-' in route:
-                    origin, dest = route.split('-', 1)
-                    airport_codes.add(origin.strip().upper())
-                    airport_codes.add(dest.strip().upper())
+            self.logger.info(f"📊 Found {route_count} routes for {target_haul}")
+            
+            # 3. Códigos de aeropuerto del haul (MAD-BCN → MAD, BCN), precalculados por haul
+            airport_codes = routes_dictionary.airports_for_haul(target_haul)
             
             if not airport_codes:
                 self.logger.warning(f"❌ No airport codes extracted from {target_haul} routes")
@@ -5604,12 +5442,9 @@ Proporciona análisis estructurado, específico y respaldado por números."""
                 
             self.logger.info(f"✈️ Extracted {len(airport_codes)} airport codes for {target_haul}: {sorted(list(airport_codes))[:10]}...")
             
-            # 4. Crear patrón regex con códigos reales del diccionario
-            # Usar \b para word boundaries para evitar falsos positivos
-            pattern = '|'.join([f'\\b{code}\\b' for code in airport_codes])
-            
-            # 5. Filtrar incidentes que contengan estos códigos de aeropuerto
-            mask = ncs_data[incident_col].str.contains(pattern, na=False, regex=True, case=False)
+            # 4-5. Filtrar incidentes que mencionen estos códigos como palabra completa
+            # (búsqueda por tokens en un conjunto en lugar de una alternancia regex gigante)
+            mask = routes_dictionary.matcher(target_haul).mask(ncs_data[incident_col])
             filtered_data = ncs_data[mask]
             
             # 6. Log resultados
@@ -5739,33 +5574,7 @@ Proporciona análisis estructurado, específico y respaldado por números."""
     
     def _extract_operational_themes(self, incidents_text: str) -> List[str]:
         """Extract key operational themes from NCS incidents text"""
-        if not incidents_text or not incidents_text.strip():
-            return []
-        
-        themes = []
-        text_lower = incidents_text.lower()
-        
-        # Define theme keywords
-        theme_keywords = {
-            'cancelaciones': ['cancelado', 'cancelación', 'cancelados'],
-            'retrasos': ['retraso', 'retrasos', 'demora', 'demoras'],
-            'desvios': ['desvío', 'desvios', 'desviado'],
-            'equipos': ['a330', 'a350', 'a359', 'equipo', 'aircraft'],
-            'conexiones': ['conexión', 'conexiones', 'conecta'],
-            'técnicos': ['técnico', 'técnica', 'técnicas', 'técnicos'],
-            'operativos': ['operativo', 'operativa', 'operacional']
-        }
-        
-        # Count theme occurrences
-        theme_counts = {}
-        for theme, keywords in theme_keywords.items():
-            count = sum(1 for keyword in keywords if keyword in text_lower)
-            if count > 0:
-                theme_counts[theme] = count
-        
-        # Return top 3 themes by frequency
-        sorted_themes = sorted(theme_counts.items(), key=lambda x: x[1], reverse=True)
-        return [theme for theme, count in sorted_themes[:3]]
+        return get_ncs_text_index(incidents_text).operational_themes()
     
     def _generate_combined_narrative(self, current_incidents: str, comparison_incidents: str,
                                    current_start: str, current_end: str, 
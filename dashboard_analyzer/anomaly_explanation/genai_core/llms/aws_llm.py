@@ -2,11 +2,10 @@ import json
 import os
 
 from langchain_aws import ChatBedrock
-from botocore.config import Config
-import boto3
 
 from ..utils.enums import LLMType
 from .llm import LLM
+from ....data_collection.aws_clients import get_aws_client_registry
 
 # Make BEDROCK_MODELS optional to avoid errors when not using AWS
 try:
@@ -49,15 +48,22 @@ class AWSLLM(LLM):
         read_timeout = int(os.getenv("BEDROCK_READ_TIMEOUT", "300"))
         connect_timeout = int(os.getenv("BEDROCK_CONNECT_TIMEOUT", "15"))
         max_attempts = int(os.getenv("BEDROCK_MAX_RETRIES", "3"))
-        cfg = Config(read_timeout=read_timeout, connect_timeout=connect_timeout, retries={"max_attempts": max_attempts, "mode": "standard"})
+        config_options = {
+            "read_timeout": read_timeout,
+            "connect_timeout": connect_timeout,
+            "retries": {"max_attempts": max_attempts, "mode": "standard"},
+            "max_pool_connections": int(os.getenv("BEDROCK_MAX_POOL_CONNECTIONS", "10")),
+        }
 
-        session = boto3.Session(
+        # Bedrock clients are pooled process-wide, so every agent in a run shares one per credentials/region
+        bedrock_client = get_aws_client_registry().get_client(
+            "bedrock-runtime",
+            self.region_name,
             aws_access_key_id=credentials.get("aws_access_key_id"),
             aws_secret_access_key=credentials.get("aws_secret_access_key"),
             profile_name=credentials.get("profile_name"),
-            region_name=self.region_name,
+            config_options=config_options,
         )
-        bedrock_client = session.client("bedrock-runtime", config=cfg)
 
         # Create ChatBedrock client with custom boto3 client and tunable generation params
         max_tokens = int(os.getenv("BEDROCK_MAX_TOKENS", "15000"))
@@ -1,8 +1,12 @@
+import asyncio
 from abc import ABC, abstractmethod
 from langchain.schema import SystemMessage
+from langchain_core.messages import AIMessage, message_to_dict, messages_from_dict
 from langchain.tools import StructuredTool
 
 from ..utils.enums import LLMType
+from ..utils.llm_scheduler import get_llm_scheduler, estimate_prompt_tokens
+from ..utils.llm_cache import get_llm_response_cache
 from pydantic import BaseModel
 from typing import Type, Optional
 
@@ -31,8 +35,19 @@ class LLM(ABC):
 
         self.structured_output_prompt = SystemMessage(content='Responde siempre de forma estructurada con structured_output o llamando a otras tools')
 
+        # Opt-in (LLM_CACHE_ENABLED) local cache of responses to identical requests
+        self.response_cache = get_llm_response_cache()
+
         self.llm = self.create_llm()
 
+    def _cache_identity(self):
+        """(model id, temperature) of this LLM, part of the response cache key"""
+        model = getattr(self, 'model_id', None) or getattr(self, 'api_dep_gpt', None) or self.llm_type.value
+        temperature = getattr(self.llm, 'temperature', None)
+        if temperature is None:
+            temperature = (getattr(self.llm, 'model_kwargs', None) or {}).get('temperature')
+        return model, temperature
+
     async def __call__(self, prompt: list, tools: list = None, structured_output: Optional[Type[BaseModel]] = None):
         """
         Invokes the LLM with the given prompt, optional tools, and structured output requirement.
@@ -55,12 +70,28 @@ class LLM(ABC):
             prompt = prompt + [self.structured_output_prompt]
             tools = self._add_structured_output(tools, structured_output)
 
-        # Get response from LLM (which might include tool calls)
+        # Identical requests are replayed from the response cache when it is enabled (SQLite I/O runs off the event loop)
+        cache_key = None
+        if self.response_cache.enabled:
+            model, temperature = self._cache_identity()
+            cache_key = self.response_cache.make_key(model, temperature, prompt, tools)
+            cached = await asyncio.to_thread(self.response_cache.get, cache_key)
+            if cached is not None:
+                response_invoke = messages_from_dict([cached])[0]
+                response_invoke.response_metadata['cache_hit'] = True
+                return response_invoke
+
+        # Get response from LLM (which might include tool calls) through the shared scheduler,
+        # which bounds concurrency and tokens per minute for this LLMType and retries throttling
         if tools is not None:
             llm_with_tools = self.llm.bind_tools(tools)
-            response_invoke = await llm_with_tools.ainvoke(prompt)
+            call = lambda: llm_with_tools.ainvoke(prompt)
         else:
-            response_invoke = await self.llm.ainvoke(prompt)
+            call = lambda: self.llm.ainvoke(prompt)
+        response_invoke = await get_llm_scheduler().run(self.llm_type, prompt, call)
+
+        if cache_key is not None:
+            await asyncio.to_thread(self.response_cache.put, cache_key, model, message_to_dict(response_invoke))
         return response_invoke
 
     def _add_structured_output(self, tools, structured_output: Optional[Type[BaseModel]]):
@@ -94,25 +125,55 @@ class LLM(ABC):
 
         return tools
 
-    async def stream_response(self, prompt):
+    async def stream_response(self, prompt, include_final: bool = True, usage: Optional[dict] = None):
         """
         Streams the LLM's response for the given prompt.
 
         Args:
             prompt: The input message or sequence of messages (list of BaseMessage).
+            include_final: Whether the complete text is yielded again once the stream ends.
+            usage: Optional dict filled with the usage metadata reported by the provider
+                (input_tokens, output_tokens; cache_hit when replayed from the response cache).
 
         Yields:
             str: Chunks of the response content as they are generated.
-            str: The final, complete response text after the stream ends.
+            str: The final, complete response text after the stream ends (if include_final).
         """
         response_text = ""
         
-        async for chunk in self.llm.astream(prompt):
-            chunk_text = chunk.content
-            response_text += chunk_text
-            yield chunk_text
-
-        yield response_text
+        # A cached stream is replayed as a single chunk
+        cache_key = None
+        if self.response_cache.enabled:
+            model, temperature = self._cache_identity()
+            cache_key = self.response_cache.make_key(model, temperature, prompt, kind="stream")
+            cached = await asyncio.to_thread(self.response_cache.get, cache_key)
+            if cached is not None:
+                response_text = messages_from_dict([cached])[0].content
+                if usage is not None:
+                    usage['cache_hit'] = True
+                yield response_text
+                if include_final:
+                    yield response_text
+                return
+        
+        # Streams hold a scheduler slot for their whole duration (no retries once chunks were yielded)
+        scheduler = get_llm_scheduler()
+        full_message = None
+        async with scheduler.slot(self.llm_type, estimate_prompt_tokens(prompt)) as reservation:
+            async for chunk in self.llm.astream(prompt):
+                # Chunks add up to the full message, usage metadata included
+                full_message = chunk if full_message is None else full_message + chunk
+                chunk_text = chunk.content
+                response_text += chunk_text
+                yield chunk_text
+            scheduler.record_usage(reservation, full_message)
+
+        if usage is not None and getattr(full_message, 'usage_metadata', None):
+            usage.update(full_message.usage_metadata)
+        if cache_key is not None:
+            await asyncio.to_thread(self.response_cache.put, cache_key, model, message_to_dict(AIMessage(content=response_text)))
+        if include_final:
+            yield response_text
 
     @abstractmethod
     def create_llm(self):
@@ -0,0 +1,79 @@
+"""
+Concurrency budgets shared by every agent in a run.
+
+Parallel investigations fan out Power BI / S3 data pulls; the budgets cap how
+many are in flight process-wide so investigating several nodes at once does not
+overload the data sources. LLM requests are bounded by the LLM scheduler
+(llm_scheduler.py), which also enforces tokens per minute per model.
+"""
+
+import asyncio
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+# Default limits per budget name; override with INVESTIGATION_<NAME>_CONCURRENCY
+DEFAULT_LIMITS = {
+    "data": 4,
+}
+
+
+class ConcurrencyBudget:
+    """Async context manager limiting concurrent work of one kind"""
+
+    def __init__(self, name: str, limit: int):
+        self.name = name
+        self.limit = limit
+
+        # asyncio.Semaphore is bound to the loop it is first used on
+        self._loop = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.acquired = 0
+        self.total_wait_seconds = 0.0
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.limit)
+        return self._semaphore
+
+    async def __aenter__(self):
+        start = time.perf_counter()
+        await self._get_semaphore().acquire()
+        self.total_wait_seconds += time.perf_counter() - start
+        self.acquired += 1
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.in_flight -= 1
+        self._semaphore.release()
+        return False
+
+    def get_stats(self) -> Dict[str, float]:
+        return {
+            'limit': self.limit,
+            'in_flight': self.in_flight,
+            'peak_in_flight': self.peak_in_flight,
+            'acquired': self.acquired,
+            'total_wait_seconds': self.total_wait_seconds
+        }
+
+
+_budgets: Dict[str, ConcurrencyBudget] = {}
+_budgets_lock = threading.Lock()
+
+
+def get_concurrency_budget(name: str) -> ConcurrencyBudget:
+    """Get the process-wide budget with the given name (e.g. "data")"""
+    with _budgets_lock:
+        if name not in _budgets:
+            limit = int(os.getenv(f"INVESTIGATION_{name.upper()}_CONCURRENCY", str(DEFAULT_LIMITS.get(name, 4))))
+            _budgets[name] = ConcurrencyBudget(name, max(1, limit))
+        return _budgets[name]
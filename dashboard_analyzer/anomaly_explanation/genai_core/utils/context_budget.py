@@ -0,0 +1,231 @@
+"""
+Context Budget
+
+Token-aware compaction of the context sent to the causal agent reflections. Tokens are
+counted per model (tiktoken for OpenAI models when installed, a characters-per-token
+ratio otherwise). Tool results over budget are compressed structurally: ranked lists
+and list blocks keep their top entries plus an explicit count of what was left out,
+and as a last resort the middle of the text is replaced by a marker stating how much
+was omitted (the tail, usually totals and comparisons, is kept). Previous reflections
+are kept verbatim newest first and older ones are condensed to their key lines.
+"""
+
+import os
+import re
+from typing import Callable, List, Optional
+
+from .enums import LLMType
+
+try:
+    import tiktoken
+except ImportError:  # Optional: falls back to the characters-per-token estimate
+    tiktoken = None
+
+# OpenAI models and their tiktoken encodings
+OPENAI_ENCODINGS = {
+    LLMType.GPT3_5: "cl100k_base",
+    LLMType.GPT4: "cl100k_base",
+    LLMType.GPT4o: "o200k_base",
+    LLMType.GPT4o_MINI: "o200k_base",
+    LLMType.O1_MINI: "o200k_base",
+    LLMType.O3_MINI: "o200k_base",
+    LLMType.O3: "o200k_base",
+    LLMType.O4_MINI: "o200k_base",
+}
+
+# Characters per token for models without a local tokenizer (Claude, Llama)
+DEFAULT_CHARS_PER_TOKEN = 3.5
+
+# Line starting a list entry: bullets, numbered items, markdown table rows, indented emoji rows
+LIST_LINE_PATTERN = re.compile(r'^(\s*)([-•*▪·]|\d+[.)]|\|)\s')
+# "Label: item, item, item" ranked lists (routes, drivers, touchpoints)
+INLINE_LIST_PATTERN = re.compile(r'^(.*?:\s+)(.+?,\s.+)$')
+# Lines worth keeping when a previous analysis is condensed (headings and figures)
+KEY_LINE_PATTERN = re.compile(r'(^\s*#|\*\*|\d)')
+
+SEGMENT_SEPARATOR = " | "
+
+
+class TokenCounter:
+    """Token counting for one LLMType"""
+
+    def __init__(self, llm_type: Optional[LLMType] = None):
+        self.llm_type = llm_type
+        self._encoding = None
+        if tiktoken is not None and llm_type in OPENAI_ENCODINGS:
+            try:
+                self._encoding = tiktoken.get_encoding(OPENAI_ENCODINGS[llm_type])
+            except Exception:
+                self._encoding = None
+        self.chars_per_token = float(os.getenv("LLM_CHARS_PER_TOKEN", str(DEFAULT_CHARS_PER_TOKEN)))
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        if self._encoding is not None:
+            return len(self._encoding.encode(text, disallowed_special=()))
+        return int(len(text) / self.chars_per_token) + 1
+
+
+def _compress_inline_list(line: str, top_n: int) -> str:
+    """Keep the first top_n items of a "Label: a, b, c, ..." list (tools list them ranked)"""
+    match = INLINE_LIST_PATTERN.match(line)
+    if not match:
+        return line
+    prefix, items_text = match.groups()
+    items = items_text.split(", ")
+    if len(items) <= top_n:
+        return line
+    return f"{prefix}{', '.join(items[:top_n])} [... +{len(items) - top_n} more]"
+
+
+def _compress_line(line: str, top_n: int) -> str:
+    # Pipe-joined tool summaries: compress each segment (markdown table rows are left whole)
+    if SEGMENT_SEPARATOR in line and not line.lstrip().startswith("|"):
+        return SEGMENT_SEPARATOR.join(_compress_inline_list(segment, top_n) for segment in line.split(SEGMENT_SEPARATOR))
+    return _compress_inline_list(line, top_n)
+
+
+def _compress_list_blocks(lines: List[str], top_n: int) -> List[str]:
+    """Keep the first top_n lines of each run of list lines with the same indentation and marker"""
+    result = []
+    run_key, run_length, omitted = None, 0, 0
+
+    def close_run():
+        if omitted:
+            indent = run_key[0] if run_key else ""
+            result.append(f"{indent}[... +{omitted} more lines of this list]")
+
+    for line in lines:
+        match = LIST_LINE_PATTERN.match(line)
+        key = (match.group(1), match.group(2)[0] if not match.group(2)[0].isdigit() else "n") if match else None
+        if key is not None and key == run_key:
+            run_length += 1
+            if run_length > top_n:
+                omitted += 1
+                continue
+        else:
+            close_run()
+            run_key, run_length, omitted = key, 1, 0
+        result.append(line)
+    close_run()
+    return result
+
+
+def compress_text(text: str, max_tokens: int, count: Callable[[str], int], top_n_steps=(15, 10, 5, 3)) -> str:
+    """
+    Structurally compress a text until it fits max_tokens
+
+    Ranked lists and list blocks are cut to their top entries (with the number of
+    omitted entries); if that is not enough, the middle lines are replaced by a marker
+    with the number of omitted lines and tokens, keeping the head and the tail.
+    """
+    if not text or count(text) <= max_tokens:
+        return text
+
+    lines = text.split("\n")
+    for top_n in top_n_steps:
+        compressed = "\n".join(_compress_list_blocks([_compress_line(line, top_n) for line in lines], top_n))
+        if count(compressed) <= max_tokens:
+            return compressed
+    lines = compressed.split("\n")
+
+    # Head and tail within budget (about 2/3 head, 1/3 tail)
+    marker_tokens = 30
+    head_budget = int((max_tokens - marker_tokens) * 2 / 3)
+    tail_budget = max_tokens - marker_tokens - head_budget
+    line_tokens = [count(line) + 1 for line in lines]
+
+    head_end, used = 0, 0
+    while head_end < len(lines) and used + line_tokens[head_end] <= head_budget:
+        used += line_tokens[head_end]
+        head_end += 1
+    tail_start, used = len(lines), 0
+    while tail_start > head_end and used + line_tokens[tail_start - 1] <= tail_budget:
+        used += line_tokens[tail_start - 1]
+        tail_start -= 1
+
+    head, tail = lines[:head_end], lines[tail_start:]
+    omitted = lines[head_end:tail_start]
+    if not head and not tail:
+        # A single huge line: cut by characters, with the same explicit marker
+        chars = int(len(text) * max_tokens / max(count(text), 1))
+        return text[:chars * 2 // 3] + f"\n[... ~{count(text) - max_tokens} tokens omitted to fit the context budget ...]\n" + text[-(chars // 3):]
+    marker = f"[... {len(omitted)} lines (~{sum(line_tokens[head_end:tail_start])} tokens) omitted to fit the context budget ...]"
+    return "\n".join(head + [marker] + tail)
+
+
+def condense_text(text: str, max_tokens: int, count: Callable[[str], int]) -> str:
+    """Condense a previous analysis to its first line plus headings and lines with figures"""
+    if count(text) <= max_tokens:
+        return text
+    lines = [line for line in text.split("\n") if line.strip()]
+    if not lines:
+        return ""
+    kept, used = [lines[0]], count(lines[0])
+    for line in lines[1:]:
+        if not KEY_LINE_PATTERN.search(line):
+            continue
+        tokens = count(line) + 1
+        if used + tokens > max_tokens:
+            break
+        kept.append(line)
+        used += tokens
+    condensed = "\n".join(kept)
+    return compress_text(condensed, max_tokens, count) + "\n[condensed]"
+
+
+class ContextBudget:
+    """Token budgets of the reflection context for one model"""
+
+    def __init__(self, llm_type: Optional[LLMType] = None, context_tokens: int = None,
+                 tool_result_tokens: int = None, condensed_analysis_tokens: int = None,
+                 synthesis_data_tokens: int = None):
+        """
+        Args:
+            llm_type: Model whose tokenizer is used for counting
+            context_tokens: Budget of the previous analyses (default: CAUSAL_CONTEXT_MAX_TOKENS or 12000)
+            tool_result_tokens: Budget of one tool result (default: CAUSAL_TOOL_RESULT_MAX_TOKENS or 8000)
+            condensed_analysis_tokens: Size of a condensed older analysis (default: CAUSAL_CONDENSED_ANALYSIS_TOKENS or 600)
+            synthesis_data_tokens: Budget of the data summary of the final synthesis (default: CAUSAL_SYNTHESIS_MAX_TOKENS or 25000)
+        """
+        self.counter = TokenCounter(llm_type)
+        self.context_tokens = context_tokens or int(os.getenv("CAUSAL_CONTEXT_MAX_TOKENS", "12000"))
+        self.tool_result_tokens = tool_result_tokens or int(os.getenv("CAUSAL_TOOL_RESULT_MAX_TOKENS", "8000"))
+        self.condensed_analysis_tokens = condensed_analysis_tokens or int(os.getenv("CAUSAL_CONDENSED_ANALYSIS_TOKENS", "600"))
+        self.synthesis_data_tokens = synthesis_data_tokens or int(os.getenv("CAUSAL_SYNTHESIS_MAX_TOKENS", "25000"))
+
+    def count(self, text: str) -> int:
+        return self.counter.count(text)
+
+    def fit_tool_result(self, text: str, max_tokens: int = None) -> str:
+        """Text of a tool result compressed to the tool result budget (unchanged when it fits)"""
+        return compress_text(str(text), max_tokens or self.tool_result_tokens, self.count)
+
+    def compact_explanations(self, explanations: List[str], max_tokens: int = None) -> List[str]:
+        """
+        Previous analyses within the context budget, in their original order
+
+        The newest analyses are kept verbatim while they fit; older ones are condensed,
+        and replaced by a placeholder once even the condensed form no longer fits.
+        """
+        budget = max_tokens or self.context_tokens
+        compacted = list(explanations)
+        used = 0
+        verbatim = True
+        for index in range(len(explanations) - 1, -1, -1):
+            explanation = explanations[index]
+            tokens = self.count(explanation)
+            if verbatim and used + tokens <= budget:
+                used += tokens
+                continue
+            verbatim = False
+            if index == len(explanations) - 1:
+                # The latest analysis alone exceeds the budget: compress it, do not condense it
+                compacted[index] = compress_text(explanation, budget, self.count)
+            else:
+                allowance = min(self.condensed_analysis_tokens, budget - used)
+                compacted[index] = condense_text(explanation, allowance, self.count) if allowance > 0 \
+                    else "[analysis omitted to fit the context budget]"
+            used += self.count(compacted[index])
+        return compacted
@@ -0,0 +1,203 @@
+"""
+LLM Response Cache
+
+Opt-in local cache of LLM responses. Requests are keyed by model id, temperature,
+the normalized message list and the tools schema, so repeated runs for the same
+date and segment (debug re-runs, regression runs) replay the stored responses
+instead of paying for identical calls. The SQLite store is bounded by size and
+evicts the least recently used responses first.
+"""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS llm_responses (
+    key TEXT PRIMARY KEY,
+    model TEXT,
+    response TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    last_used_at REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_llm_responses_last_used ON llm_responses (last_used_at);
+"""
+
+WHITESPACE_PATTERN = re.compile(r'\s+')
+
+
+def normalize_messages(prompt: list) -> List[List[str]]:
+    """[type, content(, tool calls)] per message with whitespace collapsed (formatting-only differences share a key)"""
+    normalized = []
+    for message in prompt or []:
+        content = getattr(message, 'content', message)
+        if not isinstance(content, str):
+            content = json.dumps(content, sort_keys=True, default=str)
+        entry = [getattr(message, 'type', type(message).__name__), WHITESPACE_PATTERN.sub(' ', content).strip()]
+        # Tool calls of previous AI turns are part of the conversation state
+        tool_calls = getattr(message, 'tool_calls', None)
+        if tool_calls:
+            entry.append(json.dumps([[call.get('name'), call.get('args')] for call in tool_calls], sort_keys=True, default=str))
+        normalized.append(entry)
+    return normalized
+
+
+def tools_schema(tools: Optional[list]) -> List[Any]:
+    """JSON schema of the bound tools (structured_output included)"""
+    if not tools:
+        return []
+    try:
+        from langchain_core.utils.function_calling import convert_to_openai_tool
+    except ImportError:
+        convert_to_openai_tool = None
+
+    schemas = []
+    for tool in tools:
+        try:
+            schemas.append(convert_to_openai_tool(tool) if convert_to_openai_tool else getattr(tool, 'name', str(tool)))
+        except Exception:
+            schemas.append(getattr(tool, 'name', str(tool)))
+    return schemas
+
+
+class LLMResponseCache:
+    """
+    SQLite-backed, size-bounded LRU cache of LLM responses
+
+    get/put block on SQLite; async callers run them with asyncio.to_thread.
+    """
+
+    def __init__(self, db_path: str = None, enabled: bool = None, max_mb: float = None):
+        """
+        Initialize the cache
+
+        Args:
+            db_path: SQLite file (default: LLM_CACHE_PATH or <repo>/.cache/llm/llm_responses.sqlite)
+            enabled: Whether responses are cached (default: LLM_CACHE_ENABLED, off unless set to true)
+            max_mb: Size limit of the stored responses in MB (default: LLM_CACHE_MAX_MB or 200)
+        """
+        default_path = Path(__file__).parent.parent.parent.parent.parent / '.cache' / 'llm' / 'llm_responses.sqlite'
+        self.db_path = Path(db_path or os.getenv("LLM_CACHE_PATH", str(default_path)))
+
+        if enabled is None:
+            enabled = os.getenv("LLM_CACHE_ENABLED", "false").lower() in ("true", "1", "yes")
+        self.enabled = enabled
+        self.max_bytes = int(float(max_mb if max_mb is not None else os.getenv("LLM_CACHE_MAX_MB", "200")) * 1024 * 1024)
+
+        self._lock = threading.Lock()
+        self._initialized = False
+        self.stats = {'hits': 0, 'misses': 0, 'writes': 0, 'evicted': 0}
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._initialized:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            try:
+                # WAL lets lookups proceed while another process writes
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.executescript(SCHEMA)
+            finally:
+                conn.close()
+            self._initialized = True
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def make_key(self, model: str, temperature: Any, prompt: list, tools: Optional[list] = None, kind: str = "invoke") -> str:
+        """Hash of (model id, temperature, normalized messages, tools schema, call kind)"""
+        payload = json.dumps({
+            'kind': kind,
+            'model': model,
+            'temperature': temperature,
+            'messages': normalize_messages(prompt),
+            'tools': tools_schema(tools)
+        }, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Stored response dict for a key (None on miss); a hit refreshes its LRU position"""
+        if not self.enabled:
+            return None
+        with self._lock:
+            conn = self._connect()
+            try:
+                row = conn.execute("SELECT response FROM llm_responses WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    self.stats['misses'] += 1
+                    return None
+                conn.execute("UPDATE llm_responses SET last_used_at = ?, hits = hits + 1 WHERE key = ?", (time.time(), key))
+                conn.commit()
+            finally:
+                conn.close()
+        self.stats['hits'] += 1
+        return json.loads(row[0])
+
+    def put(self, key: str, model: str, response: Dict):
+        """Store a response dict and evict least recently used responses beyond the size limit"""
+        if not self.enabled:
+            return
+        data = json.dumps(response, default=str)
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            try:
+                conn.execute(
+                    "INSERT OR REPLACE INTO llm_responses (key, model, response, size, created_at, last_used_at, hits) "
+                    "VALUES (?, ?, ?, ?, ?, ?, 0)",
+                    (key, model, data, len(data), now, now)
+                )
+                self.stats['writes'] += 1
+                self._evict(conn)
+                conn.commit()
+            finally:
+                conn.close()
+
+    def _evict(self, conn: sqlite3.Connection):
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM llm_responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in conn.execute("SELECT key, size FROM llm_responses ORDER BY last_used_at ASC").fetchall():
+            if total <= self.max_bytes:
+                break
+            conn.execute("DELETE FROM llm_responses WHERE key = ?", (key,))
+            total -= size
+            self.stats['evicted'] += 1
+
+    def clear(self):
+        """Remove every stored response"""
+        with self._lock:
+            conn = self._connect()
+            try:
+                conn.execute("DELETE FROM llm_responses")
+                conn.commit()
+            finally:
+                conn.close()
+
+    def get_stats(self) -> Dict[str, int]:
+        stats = dict(self.stats)
+        if self.enabled and self.db_path.exists():
+            with self._lock:
+                conn = self._connect()
+                try:
+                    count, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_responses").fetchone()
+                finally:
+                    conn.close()
+            stats.update({'entries': count, 'bytes': size})
+        return stats
+
+
+_shared_cache: Optional[LLMResponseCache] = None
+
+
+def get_llm_response_cache() -> LLMResponseCache:
+    """Get the process-wide LLM response cache"""
+    global _shared_cache
+    if _shared_cache is None:
+        _shared_cache = LLMResponseCache()
+    return _shared_cache
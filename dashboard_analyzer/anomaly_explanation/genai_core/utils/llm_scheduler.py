@@ -0,0 +1,317 @@
+"""
+LLM Scheduler
+
+Shared scheduler for every LLM request of the run (LLM.__call__ and
+LLM.stream_response). Per LLMType it bounds the number of requests in flight,
+keeps the tokens started per minute under the provider quota, retries throttled
+requests with jittered exponential backoff, optionally hedges slow requests
+with a duplicate (the loser is cancelled) and reports queue depth and latency.
+"""
+
+import asyncio
+import os
+import random
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Dict, List, Optional
+
+from .enums import LLMType
+
+# Error fragments that mean "slow down" (Bedrock throttling, Azure OpenAI 429, overloaded endpoints)
+THROTTLING_MARKERS = (
+    'throttl', 'too many requests', 'rate limit', 'ratelimit', '429',
+    'serviceunavailable', 'service unavailable', '503', 'overloaded', 'modelnotready'
+)
+
+
+def is_throttling_error(error: BaseException) -> bool:
+    """Whether an LLM error is a throttling/overload error worth retrying"""
+    text = f"{type(error).__name__} {error}".lower()
+    return any(marker in text for marker in THROTTLING_MARKERS)
+
+
+def estimate_prompt_tokens(prompt: list) -> int:
+    """Rough token count of a list of LangChain messages (about 4 characters per token)"""
+    chars = 0
+    for message in prompt or []:
+        content = getattr(message, 'content', message)
+        if isinstance(content, list):
+            chars += sum(len(str(part.get('text', part)) if isinstance(part, dict) else str(part)) for part in content)
+        else:
+            chars += len(str(content))
+    return max(1, chars // 4)
+
+
+def _env_int(name: str, llm_type: LLMType, default: str) -> int:
+    """Per-model override (LLM_<TYPE>_<NAME>) falling back to LLM_<NAME>"""
+    value = os.getenv(f"LLM_{llm_type.value}_{name}") or os.getenv(f"LLM_{name}", default)
+    return int(value)
+
+
+class _Lane:
+    """Concurrency slots and token window of one LLMType"""
+
+    def __init__(self, llm_type: LLMType):
+        self.llm_type = llm_type
+        self.max_concurrency = max(1, _env_int("MAX_CONCURRENCY", llm_type, "4"))
+        self.tokens_per_minute = _env_int("TOKENS_PER_MINUTE", llm_type, "0")  # 0 = no token limit
+
+        self.semaphore: Optional[asyncio.Semaphore] = None
+        self.token_lock: Optional[asyncio.Lock] = None
+        self.token_window: deque = deque()  # [started_at, tokens] per request
+
+        self.queued = 0
+        self.in_flight = 0
+        self.peak_queued = 0
+        self.peak_in_flight = 0
+
+    def bind(self):
+        self.semaphore = asyncio.Semaphore(self.max_concurrency)
+        self.token_lock = asyncio.Lock()
+
+    def _window_tokens(self, now: float) -> int:
+        while self.token_window and now - self.token_window[0][0] >= 60:
+            self.token_window.popleft()
+        return sum(entry[1] for entry in self.token_window)
+
+    async def reserve_tokens(self, tokens: int) -> Optional[list]:
+        """Wait until the tokens fit in the per-minute budget and record them"""
+        if self.tokens_per_minute <= 0:
+            return None
+        async with self.token_lock:
+            while True:
+                now = time.monotonic()
+                used = self._window_tokens(now)
+                # A single request larger than the whole budget goes through once the window is empty
+                if used + tokens <= self.tokens_per_minute or not self.token_window:
+                    entry = [now, tokens]
+                    self.token_window.append(entry)
+                    return entry
+                await asyncio.sleep(max(0.05, 60 - (now - self.token_window[0][0])))
+
+    def can_start_now(self, tokens: int) -> bool:
+        """Whether a request could start without waiting (used to decide on hedging)"""
+        if self.semaphore.locked():
+            return False
+        if self.tokens_per_minute <= 0:
+            return True
+        return self._window_tokens(time.monotonic()) + tokens <= self.tokens_per_minute
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'max_concurrency': self.max_concurrency,
+            'tokens_per_minute': self.tokens_per_minute,
+            'queued': self.queued,
+            'in_flight': self.in_flight,
+            'peak_queued': self.peak_queued,
+            'peak_in_flight': self.peak_in_flight,
+            'tokens_last_minute': self._window_tokens(time.monotonic())
+        }
+
+
+class LLMScheduler:
+    """Bounded-concurrency, token-rate-limited scheduler for LLM requests"""
+
+    def __init__(self, max_retries: int = None, base_delay: float = None, max_delay: float = None,
+                 hedge_after: float = None, expected_output_tokens: int = None):
+        """
+        Initialize the scheduler
+
+        Args:
+            max_retries: Retries of throttled requests (default: LLM_MAX_RETRIES or 5)
+            base_delay: First backoff delay in seconds (default: LLM_RETRY_BASE_DELAY or 2)
+            max_delay: Backoff cap in seconds (default: LLM_RETRY_MAX_DELAY or 60)
+            hedge_after: Seconds after which a still running request is duplicated, 0 disables hedging
+                         (default: LLM_HEDGE_AFTER or 0)
+            expected_output_tokens: Output tokens reserved per request before the real usage is known
+                                    (default: LLM_EXPECTED_OUTPUT_TOKENS or 1000)
+        """
+        self.max_retries = max_retries if max_retries is not None else int(os.getenv("LLM_MAX_RETRIES", "5"))
+        self.base_delay = base_delay if base_delay is not None else float(os.getenv("LLM_RETRY_BASE_DELAY", "2"))
+        self.max_delay = max_delay if max_delay is not None else float(os.getenv("LLM_RETRY_MAX_DELAY", "60"))
+        self.hedge_after = hedge_after if hedge_after is not None else float(os.getenv("LLM_HEDGE_AFTER", "0"))
+        self.expected_output_tokens = expected_output_tokens or int(os.getenv("LLM_EXPECTED_OUTPUT_TOKENS", "1000"))
+
+        # asyncio primitives are bound to the loop they are first used on,
+        # so they are (re)created lazily for the running loop
+        self._loop = None
+        self._lanes: Dict[LLMType, _Lane] = {}
+
+        self.retries = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.latencies: List[Dict] = []
+
+    def _lane(self, llm_type: LLMType) -> _Lane:
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            for lane in self._lanes.values():
+                lane.bind()
+        lane = self._lanes.get(llm_type)
+        if lane is None:
+            lane = _Lane(llm_type)
+            lane.bind()
+            self._lanes[llm_type] = lane
+        return lane
+
+    def _backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    @asynccontextmanager
+    async def slot(self, llm_type: LLMType, estimated_tokens: int):
+        """
+        Hold one request slot of the model's lane (waits for concurrency and token budget)
+
+        Yields the token reservation; pass it to record_usage once the real usage is known.
+        """
+        lane = self._lane(llm_type)
+        lane.queued += 1
+        lane.peak_queued = max(lane.peak_queued, lane.queued)
+        try:
+            await lane.semaphore.acquire()
+        finally:
+            lane.queued -= 1
+        try:
+            reservation = await lane.reserve_tokens(estimated_tokens + self.expected_output_tokens)
+            lane.in_flight += 1
+            lane.peak_in_flight = max(lane.peak_in_flight, lane.in_flight)
+            try:
+                yield reservation
+            finally:
+                lane.in_flight -= 1
+        finally:
+            lane.semaphore.release()
+
+    def record_usage(self, reservation: Optional[list], response: Any):
+        """Replace a token reservation with the usage reported by the provider"""
+        usage = getattr(response, 'usage_metadata', None)
+        if reservation is None or not usage:
+            return
+        try:
+            reservation[1] = int(usage.get('input_tokens', 0)) + int(usage.get('output_tokens', 0))
+        except (TypeError, ValueError, AttributeError):
+            pass
+
+    async def _attempt(self, llm_type: LLMType, estimated_tokens: int, call_factory: Callable):
+        async with self.slot(llm_type, estimated_tokens) as reservation:
+            response = await call_factory()
+            self.record_usage(reservation, response)
+            return response
+
+    async def _hedged_attempt(self, llm_type: LLMType, estimated_tokens: int, call_factory: Callable):
+        """Run one attempt; if it is still running after hedge_after seconds, race a duplicate against it"""
+        primary = asyncio.ensure_future(self._attempt(llm_type, estimated_tokens, call_factory))
+        hedge = None
+        try:
+            if self.hedge_after > 0:
+                await asyncio.wait({primary}, timeout=self.hedge_after)
+                # Only hedge when a slot and tokens are free right now: hedging must never exceed the quota
+                if not primary.done() and self._lane(llm_type).can_start_now(estimated_tokens + self.expected_output_tokens):
+                    self.hedges += 1
+                    hedge = asyncio.ensure_future(self._attempt(llm_type, estimated_tokens, call_factory))
+
+            if hedge is None:
+                return await primary
+
+            pending = {primary, hedge}
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if not task.cancelled() and task.exception() is None:
+                        if task is hedge:
+                            self.hedge_wins += 1
+                        return task.result()
+            # Both failed: surface the primary's error
+            return primary.result()
+        finally:
+            # The losing duplicate (or everything, if the caller was cancelled) is cancelled
+            for task in (primary, hedge):
+                if task is not None and not task.done():
+                    task.cancel()
+
+    async def run(self, llm_type: LLMType, prompt: list, call_factory: Callable, label: str = "llm"):
+        """
+        Run an LLM request through the scheduler
+
+        Args:
+            llm_type: Model of the request (limits are per LLMType)
+            prompt: Messages sent, used to estimate the tokens to reserve
+            call_factory: Zero-argument callable returning the coroutine that performs the request
+            label: Label used in the latency records
+
+        Returns:
+            Whatever the request coroutine returns
+        """
+        estimated_tokens = estimate_prompt_tokens(prompt)
+        start = time.perf_counter()
+        attempt = 0
+        ok = False
+        try:
+            while True:
+                try:
+                    response = await self._hedged_attempt(llm_type, estimated_tokens, call_factory)
+                    ok = True
+                    return response
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    if attempt >= self.max_retries or not is_throttling_error(e):
+                        raise
+                    delay = self._backoff(attempt)
+                    attempt += 1
+                    self.retries += 1
+                    print(f"⏳ LLM throttled ({llm_type.value}), retry {attempt}/{self.max_retries} in {delay:.1f}s: {type(e).__name__}")
+                    await asyncio.sleep(delay)
+        finally:
+            self.latencies.append({
+                'label': label,
+                'llm_type': llm_type.value,
+                'seconds': time.perf_counter() - start,
+                'retries': attempt,
+                'ok': ok
+            })
+
+    def queue_depth(self, llm_type: LLMType = None) -> int:
+        """Requests waiting for a slot (for one model, or all)"""
+        if llm_type is not None:
+            lane = self._lanes.get(llm_type)
+            return lane.queued if lane else 0
+        return sum(lane.queued for lane in self._lanes.values())
+
+    def get_stats(self) -> Dict[str, Any]:
+        seconds = sorted(entry['seconds'] for entry in self.latencies)
+        return {
+            'requests': len(seconds),
+            'failed': sum(1 for entry in self.latencies if not entry['ok']),
+            'retries': self.retries,
+            'hedges': self.hedges,
+            'hedge_wins': self.hedge_wins,
+            'p50_seconds': seconds[len(seconds) // 2] if seconds else 0.0,
+            'max_seconds': seconds[-1] if seconds else 0.0,
+            'lanes': {llm_type.value: lane.get_stats() for llm_type, lane in self._lanes.items()}
+        }
+
+    def print_report(self):
+        """Print request, retry and hedge counts plus the per-model queue depth"""
+        stats = self.get_stats()
+        print(f"\n🧠 LLM scheduler: {stats['requests']} requests ({stats['failed']} failed), "
+              f"{stats['retries']} throttling retries, {stats['hedges']} hedges ({stats['hedge_wins']} won) | "
+              f"p50: {stats['p50_seconds']:.1f}s | slowest: {stats['max_seconds']:.1f}s")
+        for name, lane in stats['lanes'].items():
+            tpm = lane['tokens_per_minute'] or 'unlimited'
+            print(f"   {name}: peak {lane['peak_in_flight']}/{lane['max_concurrency']} in flight, "
+                  f"peak queue depth {lane['peak_queued']}, {lane['tokens_last_minute']} tokens in the last minute (limit {tpm})")
+
+
+_shared_scheduler: Optional[LLMScheduler] = None
+
+
+def get_llm_scheduler() -> LLMScheduler:
+    """Get the process-wide LLM scheduler shared by all agents"""
+    global _shared_scheduler
+    if _shared_scheduler is None:
+        _shared_scheduler = LLMScheduler()
+    return _shared_scheduler
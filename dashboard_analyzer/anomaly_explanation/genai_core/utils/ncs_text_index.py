@@ -0,0 +1,368 @@
+"""
+NCS Text Index
+
+Text mining of the NCS incident corpus shared by the causal agent extractors. The
+corpus is indexed once: the text is lowercased once and every precompiled pattern
+family (routes, section headers, category totals, passengers, delays, motives,
+operators, hub mentions, airport and city mentions) is scanned over it a single
+time, on first use. Structured data, route counts, route impacts, causes, themes
+and touchpoint correlations are all derived from those shared matches, and the
+index of a corpus is reused by every extractor that receives the same text.
+"""
+
+import os
+import re
+from bisect import bisect_left
+from functools import cached_property, lru_cache
+from typing import Dict, List, Optional, Tuple
+
+# XXX-YYY routes
+ROUTE_PATTERN = re.compile(r'\b([A-Z]{3})\s*[-–]\s*([A-Z]{3})\b', re.IGNORECASE)
+
+# Incident type section headers of the NCS emails ("Limitación" alone only ends a section)
+SECTION_HEADER_PATTERN = re.compile(
+    r'Cancelaciones|Desvíos|Retrasos|Otras incidencias|Limitación de la aeronave|Limitación', re.IGNORECASE
+)
+SECTION_HEADERS = {
+    'cancelaciones': 'cancelaciones',
+    'desvíos': 'desvios',
+    'retrasos': 'retrasos',
+    'otras incidencias': 'otras_incidencias',
+    'limitación de la aeronave': 'limitacion_aeronave',
+    'limitación': 'limitacion',
+}
+INCIDENT_TYPES = ['cancelaciones', 'desvios', 'retrasos', 'otras_incidencias', 'limitacion_aeronave']
+# Headers that end a section of each incident type (a section runs until the next header of another type)
+SECTION_TERMINATORS = {
+    'cancelaciones': {'desvios', 'retrasos', 'otras_incidencias', 'limitacion_aeronave', 'limitacion'},
+    'desvios': {'cancelaciones', 'retrasos', 'otras_incidencias', 'limitacion_aeronave', 'limitacion'},
+    'retrasos': {'cancelaciones', 'desvios', 'otras_incidencias', 'limitacion_aeronave', 'limitacion'},
+    'otras_incidencias': {'cancelaciones', 'desvios', 'retrasos', 'limitacion_aeronave', 'limitacion'},
+    'limitacion_aeronave': {'cancelaciones', 'desvios', 'retrasos', 'otras_incidencias'},
+}
+
+# "<Category> Total N" lines
+CATEGORY_TOTAL_PATTERN = re.compile(
+    r'(Cancelaciones|Retrasos|Desvíos|Otras incidencias|Limitación de la aeronave)\s*Total\s*(\d+)', re.IGNORECASE
+)
+CATEGORY_ORDER = ['cancelaciones', 'retrasos', 'desvios', 'otras_incidencias', 'limitacion_aeronave']
+
+PASSENGER_PATTERN = re.compile(r'([JWY])\s*(\d+)', re.IGNORECASE)
+PASSENGER_CLASSES = {'j': 'j_class', 'w': 'w_class', 'y': 'y_class'}
+
+DELAY_PATTERN = re.compile(r'(\d+)\s*minutos', re.IGNORECASE)
+
+# Motives and operators: the alternatives of different groups never overlap, so one scan counts them all
+MOTIVE_PATTERN = re.compile(
+    r'(?P<tecnicas>causas técnicas|técnicos|mantenimiento)'
+    r'|(?P<operativas>causas operativas|operativo)'
+    r'|(?P<meteorologia>meteorología|meteorológic)'
+    r'|(?P<rotacion_avion>rotación de avión|rotación)'
+    r'|(?P<atc>\bATC\b)'
+    r'|(?P<equipaje>equipaje|maletas)',
+    re.IGNORECASE
+)
+OPERATOR_PATTERN = re.compile(r'(?P<privilege>Privilege)|(?P<iberojet>Iberojet)|(?P<iberia>IB\d+)', re.IGNORECASE)
+
+# Routes to or from the MAD hub written without a full XXX-YYY code
+HUB_ROUTE_PATTERNS = [
+    re.compile(r'MAD[O-]\s*([A-Z]{3})', re.IGNORECASE),     # MAD-XXX or MADO XXX
+    re.compile(r'([A-Z]{3})\s*[-O]\s*MAD', re.IGNORECASE),  # XXX-MAD or XXX O MAD
+    re.compile(r'Madrid\s*[-–]\s*([A-Z]{3})', re.IGNORECASE),  # Madrid-XXX
+    re.compile(r'([A-Z]{3})\s*[-–]\s*Madrid', re.IGNORECASE),  # XXX-Madrid
+]
+
+# Long-haul airports mentioned on their own (routed from the MAD hub)
+LH_AIRPORTS = {
+    # Americas
+    'JFK': 'New York', 'MIA': 'Miami', 'EZE': 'Buenos Aires', 'BOG': 'Bogotá',
+    'LIM': 'Lima', 'SCL': 'Santiago', 'GRU': 'São Paulo', 'MEX': 'Mexico City',
+    'ORD': 'Chicago', 'DFW': 'Dallas', 'LAX': 'Los Angeles', 'CCS': 'Caracas',
+    'SDQ': 'Santo Domingo', 'HAV': 'Havana', 'BOS': 'Boston', 'YUL': 'Montreal',
+    # Africa/Middle East
+    'CAI': 'Cairo', 'JNB': 'Johannesburg', 'CMN': 'Casablanca', 'ALG': 'Algiers',
+    'TUN': 'Tunis', 'DAR': 'Dar es Salaam', 'ADD': 'Addis Ababa',
+    # Asia/Pacific
+    'NRT': 'Tokyo', 'PVG': 'Shanghai', 'ICN': 'Seoul', 'BKK': 'Bangkok',
+    'SIN': 'Singapore', 'HKG': 'Hong Kong', 'DEL': 'Delhi', 'BOM': 'Mumbai'
+}
+WORD_PATTERN = re.compile(r'\w+')
+
+CITY_TO_AIRPORT = {
+    'new york': 'JFK', 'miami': 'MIA', 'buenos aires': 'EZE', 'bogota': 'BOG',
+    'lima': 'LIM', 'santiago': 'SCL', 'sao paulo': 'GRU', 'mexico': 'MEX',
+    'chicago': 'ORD', 'dallas': 'DFW', 'los angeles': 'LAX', 'caracas': 'CCS',
+    'tokyo': 'NRT', 'shanghai': 'PVG', 'seoul': 'ICN', 'bangkok': 'BKK'
+}
+CITY_PATTERN = re.compile(r'\b(' + '|'.join(re.escape(city) for city in CITY_TO_AIRPORT) + r')\b')
+
+DISRUPTION_CAUSES = [
+    ('delay', 'Flight delays'),
+    ('cancel', 'Flight cancellations'),
+    ('weather', 'Weather disruptions'),
+    ('maintenance', 'Maintenance issues'),
+]
+
+TOUCHPOINT_KEYWORDS = [
+    ('punctuality', 'Punctuality', 'NCS incidents affecting punctuality'),
+    ('boarding', 'Boarding', 'NCS incidents affecting boarding'),
+]
+
+THEME_KEYWORDS = {
+    'cancelaciones': ['cancelado', 'cancelación', 'cancelados'],
+    'retrasos': ['retraso', 'retrasos', 'demora', 'demoras'],
+    'desvios': ['desvío', 'desvios', 'desviado'],
+    'equipos': ['a330', 'a350', 'a359', 'equipo', 'aircraft'],
+    'conexiones': ['conexión', 'conexiones', 'conecta'],
+    'técnicos': ['técnico', 'técnica', 'técnicas', 'técnicos'],
+    'operativos': ['operativo', 'operativa', 'operacional']
+}
+
+
+class NCSTextIndex:
+    """Shared matches of the NCS patterns over one incident corpus"""
+
+    def __init__(self, text: str):
+        self.text = text or ""
+        self.lower = self.text.lower()
+        self._keywords: Dict[str, bool] = {}
+
+    # ---- Shared scans (each pattern family runs once per corpus) ----
+
+    @cached_property
+    def route_matches(self) -> List[Tuple[int, int, str]]:
+        """(start, end, ORIG-DEST) of every XXX-YYY route, in text order"""
+        return [(match.start(), match.end(), f"{match.group(1).upper()}-{match.group(2).upper()}")
+                for match in ROUTE_PATTERN.finditer(self.text)]
+
+    @cached_property
+    def _route_starts(self) -> List[int]:
+        return [start for start, _, _ in self.route_matches]
+
+    @cached_property
+    def section_spans(self) -> Dict[str, List[Tuple[int, int]]]:
+        """(start, end) of the sections of each incident type, from one scan of the headers"""
+        headers = [(match.start(), match.end(), SECTION_HEADERS[match.group(0).lower()])
+                   for match in SECTION_HEADER_PATTERN.finditer(self.text)]
+        spans = {}
+        for incident_type in INCIDENT_TYPES:
+            terminators = SECTION_TERMINATORS[incident_type]
+            type_spans, cursor = [], 0
+            for index, (start, header_end, kind) in enumerate(headers):
+                if kind != incident_type or start < cursor:
+                    continue
+                end = next((other_start for other_start, _, other_kind in headers[index + 1:]
+                            if other_start >= header_end and other_kind in terminators), len(self.text))
+                type_spans.append((start, end))
+                cursor = end
+            spans[incident_type] = type_spans
+        return spans
+
+    @cached_property
+    def category_totals(self) -> Dict[str, int]:
+        """First "<Category> Total N" figure of each incident category"""
+        found = {}
+        for match in CATEGORY_TOTAL_PATTERN.finditer(self.text):
+            category = SECTION_HEADERS[match.group(1).lower()]
+            found.setdefault(category, int(match.group(2)))
+        return {category: found[category] for category in CATEGORY_ORDER if category in found}
+
+    @cached_property
+    def passenger_totals(self) -> Dict[str, int]:
+        totals = {}
+        for match in PASSENGER_PATTERN.finditer(self.text):
+            class_type = PASSENGER_CLASSES[match.group(1).lower()]
+            totals[class_type] = totals.get(class_type, 0) + int(match.group(2))
+        return totals
+
+    @cached_property
+    def delay_minutes(self) -> List[int]:
+        return [int(match.group(1)) for match in DELAY_PATTERN.finditer(self.text)]
+
+    @cached_property
+    def motive_counts(self) -> Dict[str, int]:
+        return self._group_counts(MOTIVE_PATTERN)
+
+    @cached_property
+    def operator_counts(self) -> Dict[str, int]:
+        return self._group_counts(OPERATOR_PATTERN)
+
+    def _group_counts(self, pattern: re.Pattern) -> Dict[str, int]:
+        counts = {}
+        for match in pattern.finditer(self.text):
+            counts[match.lastgroup] = counts.get(match.lastgroup, 0) + 1
+        # Same key order as the pattern groups
+        return {group: counts[group] for group in pattern.groupindex if group in counts}
+
+    @cached_property
+    def hub_airports(self) -> List[str]:
+        """Airports of the MAD hub mentions, pattern by pattern"""
+        airports = []
+        for pattern in HUB_ROUTE_PATTERNS:
+            airports.extend(pattern.findall(self.text))
+        return airports
+
+    @cached_property
+    def words(self) -> frozenset:
+        """Upper-case words of the corpus (airport code mentions)"""
+        return frozenset(word.upper() for word in WORD_PATTERN.findall(self.text))
+
+    @cached_property
+    def cities(self) -> frozenset:
+        return frozenset(CITY_PATTERN.findall(self.lower))
+
+    def has_keyword(self, keyword: str) -> bool:
+        """Whether a lower-case keyword appears anywhere in the corpus"""
+        if keyword not in self._keywords:
+            self._keywords[keyword] = keyword in self.lower
+        return self._keywords[keyword]
+
+    # ---- Extractors ----
+
+    def routes_in_span(self, start: int, end: int) -> List[str]:
+        index = bisect_left(self._route_starts, start)
+        routes = []
+        while index < len(self.route_matches) and self.route_matches[index][1] <= end:
+            routes.append(self.route_matches[index][2])
+            index += 1
+        return routes
+
+    def route_counts(self) -> Dict[str, int]:
+        """Mentions of each XXX-YYY route (first-seen order)"""
+        counts = {}
+        for _, _, route_code in self.route_matches:
+            counts[route_code] = counts.get(route_code, 0) + 1
+        return counts
+
+    def route_incident_breakdown(self) -> Dict[str, Dict[str, int]]:
+        """Route mentions per incident type section"""
+        breakdown = {}
+        for incident_type, spans in self.section_spans.items():
+            for start, end in spans:
+                for route_code in self.routes_in_span(start, end):
+                    if route_code not in breakdown:
+                        breakdown[route_code] = {
+                            'cancelaciones': 0, 'desvios': 0, 'retrasos': 0,
+                            'otras_incidencias': 0, 'limitacion_aeronave': 0, 'total': 0
+                        }
+                    breakdown[route_code][incident_type] += 1
+                    breakdown[route_code]['total'] += 1
+        return breakdown
+
+    def structured_data(self) -> dict:
+        """Categories, routes (per incident type), passengers, delays, motives, operators and summary"""
+        structured_data = {
+            "categories": dict(self.category_totals),
+            "route_disruptions": {},
+            "motives_breakdown": dict(self.motive_counts),
+            "operator_breakdown": dict(self.operator_counts),
+            "passenger_impact": {"j_class": 0, "w_class": 0, "y_class": 0, "total": 0},
+            "delay_statistics": {"total_minutes": 0, "count": 0, "avg_delay": 0},
+            "summary": {}
+        }
+
+        route_incident_breakdown = self.route_incident_breakdown()
+        if not route_incident_breakdown:
+            # No structured sections: general route extraction
+            structured_data["route_disruptions"] = self.route_counts()
+        else:
+            for route, breakdown in route_incident_breakdown.items():
+                structured_data["route_disruptions"][route] = breakdown['total']
+            structured_data["route_incident_breakdown"] = route_incident_breakdown
+
+        passenger_impact = structured_data["passenger_impact"]
+        passenger_impact.update(self.passenger_totals)
+        passenger_impact["total"] = passenger_impact["j_class"] + passenger_impact["w_class"] + passenger_impact["y_class"]
+
+        delays = self.delay_minutes
+        if delays:
+            structured_data["delay_statistics"] = {
+                "total_minutes": sum(delays),
+                "count": len(delays),
+                "avg_delay": round(sum(delays) / len(delays), 1)
+            }
+
+        route_disruptions = structured_data["route_disruptions"]
+        most_affected_route = max(route_disruptions.items(), key=lambda x: x[1]) if route_disruptions else None
+        main_motive = max(structured_data["motives_breakdown"].items(), key=lambda x: x[1]) if structured_data["motives_breakdown"] else None
+
+        # Routes for the routes tool by disruption frequency (5+ HIGH, 3-4 MEDIUM, 2 LOW)
+        priority_routes_for_investigation = []
+        for route, count in sorted(route_disruptions.items(), key=lambda x: x[1], reverse=True):
+            if count >= 5:
+                priority_routes_for_investigation.append({"route": route, "incidents": count, "priority": "HIGH"})
+            elif count >= 3:
+                priority_routes_for_investigation.append({"route": route, "incidents": count, "priority": "MEDIUM"})
+            elif count >= 2:
+                priority_routes_for_investigation.append({"route": route, "incidents": count, "priority": "LOW"})
+
+        structured_data["summary"] = {
+            "total_incidents": sum(structured_data["categories"].values()),
+            "most_affected_route": most_affected_route,
+            "main_motive": main_motive,
+            "total_passengers_affected": passenger_impact["total"],
+            "avg_delay_minutes": structured_data["delay_statistics"]["avg_delay"],
+            "priority_routes_for_investigation": priority_routes_for_investigation,
+            "routes_requiring_nps_analysis": [r["route"] for r in priority_routes_for_investigation if r["priority"] in ["HIGH", "MEDIUM"]]
+        }
+        return structured_data
+
+    def route_disruption_counts(self) -> Dict[str, int]:
+        """Route mentions plus MAD hub mentions, highest count first"""
+        route_disruptions = self.route_counts()
+        for airport in self.hub_airports:
+            if airport and airport != 'MAD':
+                route_code = f"MAD-{airport.upper()}"
+                route_disruptions[route_code] = route_disruptions.get(route_code, 0) + 1
+        return dict(sorted(route_disruptions.items(), key=lambda x: x[1], reverse=True))
+
+    def route_impacts(self) -> dict:
+        """Affected routes (XXX-YYY codes, then MAD routes of long-haul airports and cities) with their summary"""
+        routes = []
+        route_impact_summary = {}
+        for _, _, route_code in self.route_matches:
+            routes.append(route_code)
+            route_impact_summary[route_code] = 'Route-specific operational incidents'
+
+        for airport_code, city_name in LH_AIRPORTS.items():
+            route_code = f"MAD-{airport_code}"
+            if airport_code in self.words and route_code not in routes:
+                routes.append(route_code)
+                route_impact_summary[route_code] = f'Incidents affecting {city_name} route'
+
+        for city_name, airport_code in CITY_TO_AIRPORT.items():
+            route_code = f"MAD-{airport_code}"
+            if city_name in self.cities and route_code not in routes:
+                routes.append(route_code)
+                route_impact_summary[route_code] = f'Incidents mentioned for {city_name.title()}'
+
+        return {
+            'affected_routes': list(dict.fromkeys(routes)),
+            'route_impact_summary': route_impact_summary
+        }
+
+    def disruption_causes(self) -> List[str]:
+        causes = [cause for keyword, cause in DISRUPTION_CAUSES if self.has_keyword(keyword)]
+        return causes or ['Operational incidents detected']
+
+    def touchpoint_correlations(self) -> Dict[str, str]:
+        return {touchpoint: description for keyword, touchpoint, description in TOUCHPOINT_KEYWORDS
+                if self.has_keyword(keyword)}
+
+    def operational_themes(self, top_n: int = 3) -> List[str]:
+        """Top themes by number of their keywords present in the corpus"""
+        if not self.text.strip():
+            return []
+        theme_counts = {}
+        for theme, keywords in THEME_KEYWORDS.items():
+            count = sum(1 for keyword in keywords if self.has_keyword(keyword))
+            if count > 0:
+                theme_counts[theme] = count
+        sorted_themes = sorted(theme_counts.items(), key=lambda x: x[1], reverse=True)
+        return [theme for theme, _ in sorted_themes[:top_n]]
+
+
+@lru_cache(maxsize=int(os.getenv("NCS_TEXT_INDEX_CACHE_SIZE", "16")))
+def get_ncs_text_index(text: Optional[str]) -> NCSTextIndex:
+    """Index of an incident corpus (the same text shares one index across extractors)"""
+    return NCSTextIndex(text or "")
@@ -0,0 +1,116 @@
+"""
+Routes Frame
+
+Routes (Rutas) query result of one node and period, materialized once per routes
+investigation: bracketed column names cleaned, metric columns converted to numbers,
+route codes normalized and used as the index. The route sources of the causal agent
+(explanatory drivers, NCS incidents, verbatims) read their rows from it with
+vectorized filters instead of each re-querying and iterating the raw frame.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional
+
+import pandas as pd
+
+ROUTE_COLUMN_NAMES = ['route']
+NPS_COLUMN_NAMES = ['nps']
+NPS_DIFF_COLUMN_NAMES = ['NPS diff', 'nps diff', 'nps_diff', 'vs']
+PAX_COLUMN_NAMES = ['pax', 'n (route)']
+
+
+def find_column(columns: Iterable[str], possible_names: List[str]) -> Optional[str]:
+    """First column containing any of the names (case-insensitive), as CausalExplanationAgent._find_column"""
+    for col in columns:
+        for name in possible_names:
+            if name.lower() in col.lower():
+                return col
+    return None
+
+
+@dataclass
+class RoutesFrame:
+    """Typed routes data indexed by route code, plus the names of its key columns"""
+
+    df: pd.DataFrame
+    route_col: Optional[str] = None
+    nps_col: Optional[str] = None
+    nps_diff_col: Optional[str] = None
+    pax_col: Optional[str] = None
+
+    @classmethod
+    def from_raw(cls, raw: pd.DataFrame) -> "RoutesFrame":
+        """Clean, type and index a raw routes query result (the raw frame is not modified)"""
+        if raw is None or raw.empty:
+            return cls(pd.DataFrame())
+
+        df = raw.copy()
+        df.columns = [str(col).replace('[', '').replace(']', '') for col in df.columns]
+        route_col = find_column(df.columns, ROUTE_COLUMN_NAMES)
+
+        for col in df.columns:
+            if col == route_col or df[col].dtype != object:
+                continue
+            # Numeric columns that came back as text; genuinely textual columns are kept
+            converted = pd.to_numeric(df[col], errors='coerce')
+            if converted.notna().sum() >= df[col].notna().sum():
+                df[col] = converted
+
+        if route_col:
+            df[route_col] = df[route_col].astype(str).str.strip().str.upper()
+            df.index = pd.Index(df[route_col].values)
+
+        return cls(
+            df=df,
+            route_col=route_col,
+            nps_col=find_column(df.columns, NPS_COLUMN_NAMES),
+            nps_diff_col=find_column(df.columns, NPS_DIFF_COLUMN_NAMES),
+            pax_col=find_column(df.columns, PAX_COLUMN_NAMES)
+        )
+
+    @property
+    def empty(self) -> bool:
+        return self.df.empty
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self.df.columns)
+
+    def with_min_surveys(self, min_surveys: int) -> pd.DataFrame:
+        """Routes with at least min_surveys surveys (all routes when there is no pax column)"""
+        if not self.pax_col:
+            return self.df
+        return self.df[self.df[self.pax_col].fillna(0) >= min_surveys]
+
+    def for_routes(self, routes: Iterable[str]) -> pd.DataFrame:
+        """Rows of the given route codes, in frame order"""
+        if not self.route_col:
+            return self.df
+        wanted = {str(route).strip().upper() for route in routes}
+        return self.df[self.df.index.isin(wanted)]
+
+    def records(self, rows: pd.DataFrame, extra_columns: Dict[str, Optional[str]] = None) -> List[Dict]:
+        """
+        Route dicts of some rows: route, nps and nps_diff rounded to 1 decimal (None when
+        missing), pax as int (0 when missing), plus extra_columns {key: column} rounded the same way
+        """
+        if rows.empty:
+            return []
+
+        def rounded(col: Optional[str]) -> pd.Series:
+            if not col or col not in rows.columns:
+                return pd.Series([None] * len(rows), index=rows.index, dtype=object)
+            values = pd.to_numeric(rows[col], errors='coerce').round(1).astype(object)
+            return values.where(values.notna(), None)
+
+        columns = {
+            'route': rows[self.route_col] if self.route_col else pd.Series(["Unknown"] * len(rows), index=rows.index),
+            'nps': rounded(self.nps_col),
+            'nps_diff': rounded(self.nps_diff_col),
+            'pax': pd.to_numeric(rows[self.pax_col], errors='coerce').fillna(0).astype(int)
+                   if self.pax_col else pd.Series([0] * len(rows), index=rows.index)
+        }
+        for key, col in (extra_columns or {}).items():
+            columns[key] = rounded(col)
+
+        return pd.DataFrame(columns, index=rows.index).to_dict('records')
@@ -0,0 +1,115 @@
+"""
+Streaming Events
+
+Streaming mode shared by the agents that produce long narratives (causal reflections
+and synthesis, hierarchical interpretation, executive summary). A stream handler is a
+callable (sync or async) receiving event dicts:
+
+    {'type': 'chunk', 'section': ..., 'text': ...}     partial text of a section
+    {'type': 'section', 'section': ..., 'text': ..., 'ttft': ..., 'duration': ...}
+                                                       a section has completed
+    {'type': 'result', 'text': ...}                    final value (stream_events only)
+
+Sections complete one after another, so callers can render or write each of them as
+soon as its 'section' event arrives instead of waiting for the whole answer.
+"""
+
+import asyncio
+import inspect
+import os
+import sys
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional
+
+StreamHandler = Callable[[Dict[str, Any]], Any]
+
+
+def streaming_enabled() -> bool:
+    """Whether the CLI prints agent output as it is generated (LLM_STREAM_OUTPUT, off by default)"""
+    return os.getenv("LLM_STREAM_OUTPUT", "false").lower() in ("true", "1", "yes")
+
+
+async def emit(handler: Optional[StreamHandler], event: Dict[str, Any]):
+    """Send an event to a stream handler (no-op without handler)"""
+    if handler is None:
+        return
+    result = handler(event)
+    if inspect.isawaitable(result):
+        await result
+
+
+async def invoke_agent(agent, messages: list, stream_handler: Optional[StreamHandler] = None,
+                       section: str = "response", **invoke_kwargs):
+    """
+    Call an Agent, streaming the response when a handler is given
+
+    Without handler this is agent.invoke(messages, **invoke_kwargs). With a handler the
+    response is streamed (no tools or structured output): every chunk is emitted as a
+    'chunk' event and the completed text as a 'section' event.
+
+    Returns:
+        response, structured_response, tool_calls (as Agent.invoke)
+    """
+    if stream_handler is None:
+        return await agent.invoke(messages=messages, **invoke_kwargs)
+
+    async def on_chunk(text: str):
+        await emit(stream_handler, {'type': 'chunk', 'section': section, 'text': text})
+
+    response, structured_response, tool_calls = await agent.invoke_stream(messages, on_chunk=on_chunk)
+    await emit(stream_handler, {
+        'type': 'section',
+        'section': section,
+        'text': response.content,
+        'ttft': response.response_metadata.get('ttft'),
+        'duration': response.response_metadata.get('duration')
+    })
+    return response, structured_response, tool_calls
+
+
+async def stream_events(run: Callable[[StreamHandler], Awaitable[Any]]) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Turn a method taking a stream handler into an async generator of its events
+
+    Args:
+        run: Coroutine function called with the handler (e.g. lambda handler: agent.method(..., stream_handler=handler))
+
+    Yields:
+        The chunk and section events, then {'type': 'result', 'text': <return value>}
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+    done = object()
+
+    task = asyncio.ensure_future(run(queue.put_nowait))
+    task.add_done_callback(lambda _: queue.put_nowait(done))
+    try:
+        while True:
+            event = await queue.get()
+            if event is done:
+                break
+            yield event
+        yield {'type': 'result', 'text': task.result()}
+    finally:
+        # The consumer stopped early (or was cancelled): stop the producer too
+        if not task.done():
+            task.cancel()
+
+
+def console_stream_handler(stream=None) -> StreamHandler:
+    """Handler printing chunks as they arrive, with a header per section"""
+    stream = stream or sys.stdout
+    current = {'section': None}
+
+    def handler(event: Dict[str, Any]):
+        if event['type'] == 'chunk':
+            if event['section'] != current['section']:
+                current['section'] = event['section']
+                stream.write(f"\n--- {event['section']} ---\n")
+            stream.write(event['text'])
+            stream.flush()
+        elif event['type'] == 'section':
+            ttft = event.get('ttft')
+            stream.write(f"\n--- {event['section']} completed" + (f" (TTFT {ttft:.1f}s)" if ttft is not None else "") + " ---\n")
+            stream.flush()
+            current['section'] = None
+
+    return handler
@@ -0,0 +1,66 @@
+"""
+Tool Result
+
+Typed result of the causal agent tools. Downstream code reads the structured fields
+(data, routes) directly; the human-readable text sent to the LLM is rendered lazily,
+once, the first time it is needed. A ToolResult formats, compares with `in` and
+measures like its text, so prompt templates and logs keep working unchanged.
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+
+@dataclass
+class ToolResult:
+    """Structured fields of a tool run plus its lazily rendered text view"""
+
+    tool_name: str
+    data: Dict[str, Any] = field(default_factory=dict)
+    routes: List[str] = field(default_factory=list)
+    parts: Optional[List[str]] = None
+    separator: str = " | "
+    renderer: Optional[Callable[[], str]] = None
+    status: str = "ok"
+    _text: Optional[str] = field(default=None, init=False, repr=False)
+
+    def __post_init__(self):
+        # Routes as the old regex extraction produced them (upper case, unique, tool order kept)
+        self.routes = list(dict.fromkeys(
+            str(route).strip().upper() for route in self.routes if route and '-' in str(route)
+        ))
+
+    @classmethod
+    def from_text(cls, tool_name: str, text: str, status: str = "ok", **fields) -> "ToolResult":
+        """Result whose text is already built (empty data, errors)"""
+        result = cls(tool_name=tool_name, status=status, **fields)
+        result._text = text
+        return result
+
+    @property
+    def text(self) -> str:
+        """Text view of the result (rendered on first access)"""
+        if self._text is None:
+            if self.renderer is not None:
+                self._text = self.renderer()
+            elif self.parts is not None:
+                self._text = self.separator.join(self.parts)
+            else:
+                self._text = ""
+        return self._text
+
+    @property
+    def ok(self) -> bool:
+        return self.status == "ok"
+
+    def __str__(self) -> str:
+        return self.text
+
+    def __format__(self, format_spec: str) -> str:
+        return format(self.text, format_spec)
+
+    def __len__(self) -> int:
+        return len(self.text)
+
+    def __contains__(self, item: str) -> bool:
+        return item in self.text
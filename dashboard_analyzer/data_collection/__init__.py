@@ -5,5 +5,16 @@ Contains collectors for various data sources including Power BI, NCS, and verbat
 """
 
 from .pbi_collector import PBIDataCollector
+from .query_scheduler import QueryScheduler, get_query_scheduler
+from .pbi_connection import PBIConnectionPool, PBITokenProvider, get_connection_pool, get_token_provider
+from .query_cache import QueryCache, get_query_cache
+from .aws_clients import AWSClientRegistry, get_aws_client_registry
+from .data_plane import SharedDataPlane, get_data_plane
+from .routes_dictionary import RoutesDictionary, AirportCodeMatcher, get_routes_dictionary
 
-__all__ = ['PBIDataCollector'] 
\ No newline at end of file
+__all__ = ['PBIDataCollector', 'QueryScheduler', 'get_query_scheduler',
+           'PBIConnectionPool', 'PBITokenProvider', 'get_connection_pool', 'get_token_provider',
+           'QueryCache', 'get_query_cache',
+           'AWSClientRegistry', 'get_aws_client_registry',
+           'SharedDataPlane', 'get_data_plane',
+           'RoutesDictionary', 'AirportCodeMatcher', 'get_routes_dictionary'] 
\ No newline at end of file
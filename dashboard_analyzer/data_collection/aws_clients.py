@@ -0,0 +1,160 @@
+"""
+AWS Client Registry
+
+Process-wide pool of boto3 clients (S3 for NCS, bedrock-runtime for the LLMs)
+keyed by service, region, credentials and client configuration, so tools and
+agents reuse one client and its connection pool instead of building a new
+boto3 Session per call.
+
+Credentials read from a temporary credentials file are re-read only when the
+file changes on disk; rotated credentials produce a new client and the stale
+one is dropped.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from typing import Dict, Optional, Tuple
+
+import boto3
+from botocore.config import Config
+
+
+def read_credentials_file(env_file: str) -> Dict[str, str]:
+    """Parse a key = value credentials file (comments and blank lines ignored)"""
+    credentials = {}
+    with open(env_file, 'r') as f:
+        for line in f:
+            if '=' in line and not line.strip().startswith('#'):
+                key, value = line.strip().split('=', 1)
+                credentials[key.strip()] = value.strip()
+    return credentials
+
+
+class AWSClientRegistry:
+    """Thread-safe cache of boto3 clients shared by every collector and agent"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._clients: Dict[Tuple, object] = {}
+        # env_file -> (mtime, credentials)
+        self._credential_files: Dict[str, Tuple[float, Dict[str, str]]] = {}
+        self.stats = {'clients_created': 0, 'clients_reused': 0, 'credential_refreshes': 0}
+
+    @staticmethod
+    def _credentials_fingerprint(access_key_id: Optional[str], secret_access_key: Optional[str],
+                                 session_token: Optional[str]) -> str:
+        """Hash of the credentials so secrets are not kept in the key"""
+        digest = hashlib.sha256()
+        for part in (access_key_id, secret_access_key, session_token):
+            digest.update((part or "").encode('utf-8'))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def get_client(self, service_name: str, region_name: str, aws_access_key_id: str = None,
+                   aws_secret_access_key: str = None, aws_session_token: str = None, profile_name: str = None,
+                   config_options: Dict = None, endpoint_url: str = None, credential_source: str = None):
+        """
+        Get (or create) a client for a service, region and set of credentials
+
+        Args:
+            service_name: boto3 service, e.g. 's3' or 'bedrock-runtime'
+            region_name: AWS region
+            aws_access_key_id / aws_secret_access_key / aws_session_token: Explicit credentials (default chain if omitted)
+            profile_name: Named AWS profile
+            config_options: Keyword arguments for botocore Config (timeouts, retries, pool size)
+            endpoint_url: Optional custom endpoint (e.g. MinIO)
+            credential_source: Where the credentials come from (e.g. a credentials file); new
+                credentials from the same source replace the client built with the previous ones
+        """
+        key = (
+            service_name,
+            region_name,
+            profile_name,
+            endpoint_url,
+            credential_source,
+            json.dumps(config_options or {}, sort_keys=True),
+            self._credentials_fingerprint(aws_access_key_id, aws_secret_access_key, aws_session_token)
+        )
+
+        with self._lock:
+            client = self._clients.get(key)
+            if client is not None:
+                self.stats['clients_reused'] += 1
+                return client
+
+            # Rotated credentials: drop the client built with the source's previous credentials
+            # (everything but the credentials fingerprint matches)
+            if credential_source is not None:
+                for stale_key in [k for k in self._clients if k[:-1] == key[:-1]]:
+                    del self._clients[stale_key]
+
+            session = boto3.Session(
+                aws_access_key_id=aws_access_key_id,
+                aws_secret_access_key=aws_secret_access_key,
+                aws_session_token=aws_session_token,
+                profile_name=profile_name,
+                region_name=region_name
+            )
+            config = Config(**config_options) if config_options else None
+            client = session.client(service_name, config=config, endpoint_url=endpoint_url)
+            self._clients[key] = client
+            self.stats['clients_created'] += 1
+            return client
+
+    def get_client_from_credentials_file(self, service_name: str, env_file: str, region_name: str,
+                                         config_options: Dict = None, endpoint_url: str = None):
+        """
+        Get a client using the credentials in a temporary credentials file
+
+        The file is only re-read when its modification time changes.
+        """
+        mtime = os.path.getmtime(env_file)
+        with self._lock:
+            cached = self._credential_files.get(env_file)
+            if cached is None or cached[0] != mtime:
+                if cached is not None:
+                    self.stats['credential_refreshes'] += 1
+                self._credential_files[env_file] = (mtime, read_credentials_file(env_file))
+            credentials = self._credential_files[env_file][1]
+
+        return self.get_client(
+            service_name,
+            region_name,
+            aws_access_key_id=credentials.get('aws_access_key_id'),
+            aws_secret_access_key=credentials.get('aws_secret_access_key'),
+            aws_session_token=credentials.get('aws_session_token'),
+            config_options=config_options,
+            endpoint_url=endpoint_url,
+            credential_source=f"file:{os.path.abspath(env_file)}"
+        )
+
+    def invalidate(self, service_name: str = None):
+        """Drop cached clients (e.g. after an ExpiredToken error) so the next call rebuilds them"""
+        with self._lock:
+            if service_name is None:
+                self._clients.clear()
+                self._credential_files.clear()
+            else:
+                for key in [k for k in self._clients if k[0] == service_name]:
+                    del self._clients[key]
+
+    def get_stats(self) -> Dict[str, int]:
+        """Client creation/reuse counters for this process"""
+        stats = dict(self.stats)
+        stats['cached_clients'] = len(self._clients)
+        return stats
+
+
+_registry: Optional[AWSClientRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_aws_client_registry() -> AWSClientRegistry:
+    """Get the process-wide AWS client registry"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = AWSClientRegistry()
+        return _registry
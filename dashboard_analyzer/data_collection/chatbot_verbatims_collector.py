@@ -4,6 +4,7 @@ Procesa comentarios de texto libre para extraer insights cualitativos sobre NPS
 """
 
 import pandas as pd
+import numpy as np
 import re
 from typing import Dict, List, Tuple, Optional, Any
 import logging
@@ -11,6 +12,10 @@ from datetime import datetime, timedelta
 
 logger = logging.getLogger(__name__)
 
+# Limpieza de texto (ver _clean_text)
+SPECIAL_CHARS_PATTERN = re.compile(r'[^\w\s\.\,\!\?\-]')
+WHITESPACE_PATTERN = re.compile(r'\s+')
+
 
 class ChatbotVerbatimsCollector:
     """
@@ -71,6 +76,9 @@ class ChatbotVerbatimsCollector:
             'horrible', 'terrible', 'malo', 'pésimo', 'desastroso',
             'molesto', 'furioso', 'decepcionado', 'nunca más', 'awful'
         ]
+        
+        # Patrones de rutas precompilados (se aplican en orden sobre el texto en mayúsculas)
+        self.route_regexes = [re.compile(pattern) for pattern in self.route_patterns]
     
     def collect_verbatims_for_period(self, date_range: Tuple[str, str], node_path: str,
                                    filters: Optional[Dict] = None) -> pd.DataFrame:
@@ -182,9 +190,8 @@ class ChatbotVerbatimsCollector:
                 
                 # Buscar patrones de rutas
                 found_routes = []
-                for pattern in self.route_patterns:
-                    matches = re.findall(pattern, text.upper())
-                    found_routes.extend(matches)
+                for pattern in self.route_regexes:
+                    found_routes.extend(pattern.findall(text.upper()))
                 
                 # Limpiar y normalizar rutas encontradas
                 for route in found_routes:
@@ -222,38 +229,13 @@ class ChatbotVerbatimsCollector:
         try:
             verbatims_with_themes = verbatims_df.copy()
             
-            # Inicializar columnas de temas
-            for theme in self.theme_keywords.keys():
-                verbatims_with_themes[f'theme_{theme}'] = False
-                verbatims_with_themes[f'theme_{theme}_count'] = 0
-            
-            verbatims_with_themes['primary_theme'] = 'otros'
-            verbatims_with_themes['theme_confidence'] = 0.0
+            if 'verbatim_text' in verbatims_with_themes.columns:
+                texts = verbatims_with_themes['verbatim_text'].fillna('').astype(str).str.lower()
+            else:
+                texts = pd.Series('', index=verbatims_with_themes.index)
             
-            for idx, verbatim in verbatims_with_themes.iterrows():
-                text = str(verbatim.get('verbatim_text', '')).lower()
-                
-                theme_scores = {}
-                
-                # Contar menciones por tema
-                for theme, keywords in self.theme_keywords.items():
-                    count = sum(1 for keyword in keywords if keyword in text)
-                    verbatims_with_themes.loc[idx, f'theme_{theme}'] = count > 0
-                    verbatims_with_themes.loc[idx, f'theme_{theme}_count'] = count
-                    
-                    if count > 0:
-                        theme_scores[theme] = count
-                
-                # Determinar tema principal
-                if theme_scores:
-                    primary_theme = max(theme_scores, key=theme_scores.get)
-                    verbatims_with_themes.loc[idx, 'primary_theme'] = primary_theme
-                    
-                    # Calcular confianza (normalizada por longitud del texto)
-                    max_score = theme_scores[primary_theme]
-                    text_length = len(text.split())
-                    confidence = min(max_score / max(text_length, 1) * 10, 1.0)
-                    verbatims_with_themes.loc[idx, 'theme_confidence'] = round(confidence, 3)
+            for column, values in self._theme_columns(texts).items():
+                verbatims_with_themes[column] = values
             
             return verbatims_with_themes
             
@@ -375,31 +357,16 @@ class ChatbotVerbatimsCollector:
         try:
             processed_df = verbatims_df.copy()
             
-            # Limpiar texto
-            processed_df['verbatim_text_clean'] = processed_df['verbatim_text'].apply(self._clean_text)
+            # Una sola pasada por lotes: todas las columnas derivadas se calculan vectorizadas
+            # y se añaden de una vez (mismos resultados que _clean_text/analyze_sentiment por fila)
+            clean_texts = self._clean_texts(processed_df['verbatim_text'])
+            derived = {'verbatim_text_clean': clean_texts}
+            derived.update(self._sentiment_columns(clean_texts))
+            derived.update(self._theme_columns(processed_df['verbatim_text'].fillna('').astype(str).str.lower()))
+            derived['routes_mentioned'] = self._routes_mentioned(processed_df)
             
-            # Análisis de sentimiento
-            sentiment_results = processed_df['verbatim_text_clean'].apply(self.analyze_sentiment)
-            
-            # Expandir resultados de sentimiento
-            processed_df['sentiment_score'] = [result['score'] for result in sentiment_results]
-            processed_df['sentiment_category'] = [result['category'] for result in sentiment_results]
-            processed_df['sentiment_confidence'] = [result['confidence'] for result in sentiment_results]
-            
-            # Categorizar por temas
-            processed_df = self.categorize_themes(processed_df)
-            
-            # Extraer menciones de rutas
-            route_mentions = self.extract_routes_mentions(processed_df)
-            if not route_mentions.empty:
-                # Agregar información de rutas mencionadas
-                route_counts = route_mentions.groupby('verbatim_id')['route_mentioned'].apply(list).to_dict()
-                processed_df['routes_mentioned'] = processed_df.get('verbatim_id', processed_df.index).map(route_counts)
-                processed_df['routes_mentioned'] = processed_df['routes_mentioned'].fillna('').apply(
-                    lambda x: x if isinstance(x, list) else []
-                )
-            else:
-                processed_df['routes_mentioned'] = [[] for _ in range(len(processed_df))]
+            processed_df = processed_df.drop(columns=[col for col in derived if col in processed_df.columns])
+            processed_df = pd.concat([processed_df, pd.DataFrame(derived, index=processed_df.index)], axis=1)
             
             return processed_df
             
@@ -407,6 +374,103 @@ class ChatbotVerbatimsCollector:
             logger.error(f"Error processing verbatims: {e}")
             return verbatims_df
     
+    def _keyword_presence(self, texts: pd.Series, keywords: List[str]) -> Dict[str, np.ndarray]:
+        """Presencia (subcadena) de cada palabra clave en todos los textos, una pasada vectorizada por palabra"""
+        return {keyword: texts.str.contains(keyword, regex=False).to_numpy(dtype=bool) for keyword in dict.fromkeys(keywords)}
+    
+    def _count_keywords(self, presence: Dict[str, np.ndarray], keywords: List[str], size: int) -> np.ndarray:
+        """Número de palabras clave de la lista presentes en cada texto"""
+        counts = np.zeros(size, dtype=int)
+        for keyword in keywords:
+            counts += presence[keyword]
+        return counts
+    
+    def _clean_texts(self, texts: pd.Series) -> pd.Series:
+        """Versión vectorizada de _clean_text para una columna completa"""
+        empty = texts.isna() | ~texts.astype(bool)
+        clean = (texts.fillna('').astype(str).str.lower()
+                 .str.replace(SPECIAL_CHARS_PATTERN, ' ', regex=True)
+                 .str.replace(WHITESPACE_PATTERN, ' ', regex=True)
+                 .str.strip())
+        return clean.where(~empty, '')
+    
+    def _sentiment_columns(self, clean_texts: pd.Series) -> Dict[str, Any]:
+        """Versión vectorizada de analyze_sentiment: sentiment_score, sentiment_category y sentiment_confidence"""
+        size = len(clean_texts)
+        presence = self._keyword_presence(clean_texts, self.sentiment_positive + self.sentiment_negative)
+        positive = self._count_keywords(presence, self.sentiment_positive, size)
+        negative = self._count_keywords(presence, self.sentiment_negative, size)
+        total = positive + negative
+        words = np.maximum(clean_texts.str.split().str.len().to_numpy(dtype=float), 1)
+        
+        has_sentiment = total > 0
+        score = np.where(has_sentiment, (positive - negative) / words, 0.0)
+        confidence = np.where(has_sentiment, np.minimum(total / words * 2, 1.0), 0.0)
+        category = np.where(score > 0.01, 'positive', np.where(score < -0.01, 'negative', 'neutral'))
+        
+        return {
+            'sentiment_score': [round(value, 3) for value in score.tolist()],
+            'sentiment_category': category.astype(object),
+            'sentiment_confidence': [round(value, 3) for value in confidence.tolist()]
+        }
+    
+    def _theme_columns(self, texts: pd.Series) -> Dict[str, Any]:
+        """Columnas temáticas de categorize_themes calculadas para todos los textos a la vez"""
+        size = len(texts)
+        all_keywords = [keyword for keywords in self.theme_keywords.values() for keyword in keywords]
+        presence = self._keyword_presence(texts, all_keywords)
+        
+        columns = {}
+        theme_counts = []
+        for theme, keywords in self.theme_keywords.items():
+            counts = self._count_keywords(presence, keywords, size)
+            columns[f'theme_{theme}'] = counts > 0
+            columns[f'theme_{theme}_count'] = counts
+            theme_counts.append(counts)
+        
+        themes = list(self.theme_keywords.keys())
+        if size == 0 or not themes:
+            columns['primary_theme'] = np.full(size, 'otros', dtype=object)
+            columns['theme_confidence'] = np.zeros(size)
+            return columns
+        
+        # Tema principal: el de más menciones (el primero en caso de empate)
+        counts_matrix = np.column_stack(theme_counts)
+        max_score = counts_matrix.max(axis=1)
+        primary = np.array(themes, dtype=object)[counts_matrix.argmax(axis=1)]
+        has_theme = max_score > 0
+        
+        # Confianza normalizada por longitud del texto
+        text_length = np.maximum(texts.str.split().str.len().to_numpy(dtype=float), 1)
+        confidence = np.minimum(max_score / text_length * 10, 1.0)
+        
+        columns['primary_theme'] = np.where(has_theme, primary, 'otros').astype(object)
+        columns['theme_confidence'] = [round(value, 3) if themed else 0.0
+                                       for value, themed in zip(confidence.tolist(), has_theme.tolist())]
+        return columns
+    
+    def _routes_mentioned(self, verbatims_df: pd.DataFrame) -> List[List[str]]:
+        """Rutas mencionadas por verbatim (agrupadas por verbatim_id como extract_routes_mentions)"""
+        size = len(verbatims_df)
+        if 'verbatim_id' not in verbatims_df.columns:
+            return [[] for _ in range(size)]
+        
+        texts = verbatims_df['verbatim_text'].fillna('').astype(str).str.upper()
+        matches_per_pattern = [texts.str.findall(pattern).tolist() for pattern in self.route_regexes]
+        
+        routes_by_id: Dict[Any, List[str]] = {}
+        verbatim_ids = verbatims_df['verbatim_id'].tolist()
+        for row, verbatim_id in enumerate(verbatim_ids):
+            if pd.isna(verbatim_id):
+                continue
+            for matches in matches_per_pattern:
+                for route in matches[row]:
+                    clean_route = self._normalize_route(route)
+                    if clean_route:
+                        routes_by_id.setdefault(verbatim_id, []).append(clean_route)
+        
+        return [list(routes_by_id.get(verbatim_id, [])) if not pd.isna(verbatim_id) else [] for verbatim_id in verbatim_ids]
+    
     def _clean_text(self, text: str) -> str:
         """Limpia y normaliza texto de verbatims"""
         try:
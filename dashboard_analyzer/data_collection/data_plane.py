@@ -0,0 +1,136 @@
+"""
+Shared Data Plane
+Run-scoped in-memory store shared by the causal agents of one period
+
+Nodes of a subtree investigated for the same period ask for overlapping raw data
+(the NCS emails of a date range are identical for every node). The data plane loads
+each (source, key) once, lets concurrent requests wait on the same load, and keeps
+the result while the period's investigations hold a reference to its scope. When the
+last investigation of a scope releases it, everything loaded under it is evicted.
+"""
+
+import asyncio
+import contextvars
+import logging
+import threading
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+# Scope of the investigation running in the current task (inherited by tasks it creates)
+_current_scope: contextvars.ContextVar = contextvars.ContextVar('data_plane_scope', default=None)
+
+
+class SharedDataPlane:
+    """Single-flight, reference-counted cache of raw tool data per investigation scope"""
+
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._refcounts: Dict[Hashable, int] = {}
+        self._entries: Dict[Hashable, Dict[Tuple[str, Hashable], asyncio.Task]] = {}
+
+        self.hits = 0
+        self.loads = 0
+        self.uncached_loads = 0
+        self.evicted = 0
+
+    @asynccontextmanager
+    async def scope(self, scope_key: Hashable):
+        """
+        Hold a reference to a scope (e.g. one period) for the duration of an investigation
+
+        Data loaded while the context is active is shared with every other holder of the
+        same scope and evicted when the last holder leaves.
+        """
+        self.acquire(scope_key)
+        token = _current_scope.set(scope_key)
+        try:
+            yield self
+        finally:
+            _current_scope.reset(token)
+            self.release(scope_key)
+
+    def acquire(self, scope_key: Hashable):
+        with self._lock:
+            self._refcounts[scope_key] = self._refcounts.get(scope_key, 0) + 1
+
+    def release(self, scope_key: Hashable):
+        with self._lock:
+            remaining = self._refcounts.get(scope_key, 0) - 1
+            if remaining > 0:
+                self._refcounts[scope_key] = remaining
+                return
+            self._refcounts.pop(scope_key, None)
+            entries = self._entries.pop(scope_key, {})
+
+        for task in entries.values():
+            if not task.done():
+                task.cancel()
+        self.evicted += len(entries)
+        if entries:
+            self.logger.info(f"Data plane evicted {len(entries)} entries of scope {scope_key}")
+
+    async def get(self, source: str, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Get the data of (source, key), loading it once per scope
+
+        Outside of a scope the loader simply runs (nothing is retained). A failed load is
+        not cached, so the next request retries it.
+
+        Args:
+            source: Data source name (e.g. "ncs", "routes")
+            key: Hashable description of the request (dates, node, filters)
+            loader: Coroutine function loading the data
+        """
+        scope_key = _current_scope.get()
+        if scope_key is None:
+            self.uncached_loads += 1
+            return await loader()
+
+        entry_key = (source, key)
+        with self._lock:
+            entries = self._entries.setdefault(scope_key, {})
+            task = entries.get(entry_key)
+            if task is None:
+                task = asyncio.ensure_future(loader())
+                entries[entry_key] = task
+                self.loads += 1
+            else:
+                self.hits += 1
+
+        try:
+            # shield: one caller being cancelled (node timeout) must not cancel the shared load
+            return await asyncio.shield(task)
+        except Exception:
+            with self._lock:
+                if self._entries.get(scope_key, {}).get(entry_key) is task:
+                    del self._entries[scope_key][entry_key]
+            raise
+
+    def current_scope(self) -> Optional[Hashable]:
+        """Scope of the running investigation (None outside of one)"""
+        return _current_scope.get()
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'scopes': len(self._refcounts),
+                'entries': sum(len(entries) for entries in self._entries.values()),
+                'hits': self.hits,
+                'loads': self.loads,
+                'uncached_loads': self.uncached_loads,
+                'evicted': self.evicted
+            }
+
+
+_data_plane: Optional[SharedDataPlane] = None
+_data_plane_lock = threading.Lock()
+
+
+def get_data_plane() -> SharedDataPlane:
+    """Get the process-wide shared data plane"""
+    global _data_plane
+    with _data_plane_lock:
+        if _data_plane is None:
+            _data_plane = SharedDataPlane()
+        return _data_plane
@@ -1,5 +1,4 @@
 import os
-import boto3
 import pandas as pd
 from datetime import datetime, timedelta
 from pathlib import Path
@@ -10,123 +9,16 @@ from io import StringIO
 import re
 from bs4 import BeautifulSoup
 
-class NCSDataCollector:
-    """Collects Net Customer Satisfaction data from AWS S3 bucket"""
+from .ncs_fetcher import NCSParallelFetcher
+from .ncs_store import get_ncs_incident_store
+from .aws_clients import get_aws_client_registry
+
+
+class NCSEmailParser:
+    """Parses NCS HTML emails into incident rows (no AWS dependencies, safe to use in worker processes)"""
     
-    def __init__(self, temp_env_file: str = None):
-        """
-        Initialize NCS Data Collector
-        
-        Args:
-            temp_env_file: Path to temporary credentials file
-        """
+    def __init__(self):
         self.logger = logging.getLogger(__name__)
-        
-        # AWS S3 configuration
-        self.bucket_name = "ibdata-prod-ew1-s3-customer"
-        self.base_prefix = "customer/catia/ncs/raw/attatchments/"
-        
-        # Initialize AWS session
-        self.s3_client = None
-        self.temp_env_file = temp_env_file
-        
-        # Setup AWS credentials
-        self._setup_aws_credentials()
-        
-    def _setup_aws_credentials(self):
-        """Setup AWS credentials from temporary file or environment"""
-        try:
-            if self.temp_env_file and os.path.exists(self.temp_env_file):
-                # Read credentials from temp file
-                credentials = {}
-                with open(self.temp_env_file, 'r') as f:
-                    for line in f:
-                        if '=' in line and not line.strip().startswith('#'):
-                            key, value = line.strip().split('=', 1)
-                            credentials[key.strip()] = value.strip()
-                
-                # Set up boto3 session with credentials
-                session = boto3.Session(
-                    aws_access_key_id=credentials.get('aws_access_key_id'),
-                    aws_secret_access_key=credentials.get('aws_secret_access_key'),
-                    aws_session_token=credentials.get('aws_session_token'),
-                    region_name='eu-west-1'  # Based on bucket name
-                )
-                self.s3_client = session.client('s3')
-                self.logger.info("✅ Successfully configured AWS credentials from temp file")
-                
-            else:
-                # Fallback to environment variables
-                self.s3_client = boto3.client('s3', region_name='eu-west-1')
-                self.logger.info("✅ Using AWS credentials from environment")
-                
-        except Exception as e:
-            self.logger.error(f"❌ Failed to setup AWS credentials: {str(e)}")
-            raise
-    
-    def list_available_files(self, date_prefix: str = None) -> List[str]:
-        """
-        List available NCS files in S3 bucket
-        
-        Args:
-            date_prefix: Optional date prefix to filter files (e.g., "2025-06")
-            
-        Returns:
-            List of available file keys
-        """
-        try:
-            prefix = self.base_prefix
-            if date_prefix:
-                prefix += f"ndc-{date_prefix}"
-            
-            response = self.s3_client.list_objects_v2(
-                Bucket=self.bucket_name,
-                Prefix=prefix
-            )
-            
-            files = []
-            if 'Contents' in response:
-                for obj in response['Contents']:
-                    if obj['Key'].endswith('.txt'):
-                        files.append(obj['Key'])
-            
-            self.logger.info(f"Found {len(files)} NCS files with prefix '{prefix}'")
-            return files
-            
-        except Exception as e:
-            self.logger.error(f"Error listing S3 files: {str(e)}")
-            return []
-    
-    def read_ncs_file(self, file_key: str) -> pd.DataFrame:
-        """
-        Read a specific NCS file from S3 (HTML email format)
-        
-        Args:
-            file_key: S3 key of the file to read
-            
-        Returns:
-            DataFrame with NCS data extracted from HTML email
-        """
-        try:
-            self.logger.info(f"Reading NCS file: s3://{self.bucket_name}/{file_key}")
-            
-            # Download file from S3
-            response = self.s3_client.get_object(Bucket=self.bucket_name, Key=file_key)
-            content = response['Body'].read().decode('utf-8')
-            
-            # Parse HTML email content
-            df = self._parse_html_email_content(content, file_key)
-            
-            if not df.empty:
-                self.logger.info(f"✅ Successfully parsed NCS email: {len(df)} rows, {len(df.columns)} columns")
-            else:
-                self.logger.warning(f"⚠️ No data extracted from NCS email")
-            
-            return df
-            
-        except Exception as e:
-            self.logger.error(f"❌ Error reading NCS file {file_key}: {str(e)}")
-            return pd.DataFrame()
     
     def _parse_html_email_content(self, content: str, file_key: str) -> pd.DataFrame:
         """
@@ -303,6 +195,151 @@ class NCSDataCollector:
             self.logger.warning(f"Error extracting text-based data: {str(e)}")
             return []
     
+
+
+def parse_ncs_email(content: str, file_key: str) -> pd.DataFrame:
+    """Parse one NCS email - module-level so it can run in a process pool"""
+    return NCSEmailParser()._parse_html_email_content(content, file_key)
+
+
+class NCSDataCollector(NCSEmailParser):
+    """Collects Net Customer Satisfaction data from AWS S3 bucket"""
+    
+    def __init__(self, temp_env_file: str = None):
+        """
+        Initialize NCS Data Collector
+        
+        Args:
+            temp_env_file: Path to temporary credentials file
+        """
+        super().__init__()
+        
+        # AWS S3 configuration
+        self.bucket_name = "ibdata-prod-ew1-s3-customer"
+        self.base_prefix = "customer/catia/ncs/raw/attatchments/"
+        
+        self.region_name = 'eu-west-1'  # Based on bucket name
+        # Optional S3-compatible endpoint (e.g. MinIO) for running against a local copy
+        self.endpoint_url = os.getenv("NCS_S3_ENDPOINT_URL") or None
+        self.temp_env_file = temp_env_file
+        
+        # S3 clients come from the process-wide registry, shared by every collector
+        self.client_registry = get_aws_client_registry()
+        
+        # Setup AWS credentials
+        self._setup_aws_credentials()
+        self._fetcher = None
+        self.incident_store = get_ncs_incident_store()
+        
+    @property
+    def s3_client(self):
+        """Pooled S3 client (rebuilt by the registry when the credentials file is rotated)"""
+        # Enough pooled connections for every download thread
+        config_options = {'max_pool_connections': int(os.getenv("NCS_DOWNLOAD_WORKERS", "16"))}
+        if self.temp_env_file and os.path.exists(self.temp_env_file):
+            return self.client_registry.get_client_from_credentials_file(
+                's3', self.temp_env_file, self.region_name,
+                config_options=config_options, endpoint_url=self.endpoint_url
+            )
+        return self.client_registry.get_client(
+            's3', self.region_name, config_options=config_options, endpoint_url=self.endpoint_url
+        )
+    
+    def _setup_aws_credentials(self):
+        """Setup AWS credentials from temporary file or environment"""
+        try:
+            self.s3_client  # Build the client now so bad credentials fail at construction
+            if self.temp_env_file and os.path.exists(self.temp_env_file):
+                self.logger.info("✅ Successfully configured AWS credentials from temp file")
+            else:
+                # Fallback to environment variables
+                self.logger.info("✅ Using AWS credentials from environment")
+                
+        except Exception as e:
+            self.logger.error(f"❌ Failed to setup AWS credentials: {str(e)}")
+            raise
+    
+    def _get_fetcher(self) -> NCSParallelFetcher:
+        """Parallel list/download/parse helper bound to this collector's S3 client"""
+        s3_client = self.s3_client
+        if self._fetcher is None or self._fetcher.s3_client is not s3_client:
+            self._fetcher = NCSParallelFetcher(s3_client, self.bucket_name, self.base_prefix, parse_ncs_email)
+        return self._fetcher
+    
+    def list_available_files(self, date_prefix: str = None) -> List[str]:
+        """
+        List available NCS files in S3 bucket
+        
+        Args:
+            date_prefix: Optional date prefix to filter files (e.g., "2025-06")
+            
+        Returns:
+            List of available file keys
+        """
+        try:
+            prefix = self.base_prefix
+            if date_prefix:
+                prefix += f"ndc-{date_prefix}"
+            
+            response = self.s3_client.list_objects_v2(
+                Bucket=self.bucket_name,
+                Prefix=prefix
+            )
+            
+            files = []
+            if 'Contents' in response:
+                for obj in response['Contents']:
+                    if obj['Key'].endswith('.txt'):
+                        files.append(obj['Key'])
+            
+            self.logger.info(f"Found {len(files)} NCS files with prefix '{prefix}'")
+            return files
+            
+        except Exception as e:
+            self.logger.error(f"Error listing S3 files: {str(e)}")
+            return []
+    
+    def read_ncs_file(self, file_key: str) -> pd.DataFrame:
+        """
+        Read a specific NCS file from S3 (HTML email format)
+        
+        Args:
+            file_key: S3 key of the file to read
+            
+        Returns:
+            DataFrame with NCS data extracted from HTML email
+        """
+        try:
+            if self.incident_store.enabled:
+                stored = self.incident_store.get_file(file_key)
+                if stored is not None:
+                    return stored
+            
+            self.logger.info(f"Reading NCS file: s3://{self.bucket_name}/{file_key}")
+            
+            # Download file from S3
+            response = self.s3_client.get_object(Bucket=self.bucket_name, Key=file_key)
+            content = response['Body'].read().decode('utf-8')
+            
+            # Parse HTML email content
+            df = self._parse_html_email_content(content, file_key)
+            
+            file_date = self._get_fetcher().key_date(file_key)
+            if self.incident_store.enabled and file_date is not None:
+                self.incident_store.put_file(file_key, response.get('ETag', '').strip('"'), file_date,
+                                             response.get('ContentLength', 0), df)
+            
+            if not df.empty:
+                self.logger.info(f"✅ Successfully parsed NCS email: {len(df)} rows, {len(df.columns)} columns")
+            else:
+                self.logger.warning(f"⚠️ No data extracted from NCS email")
+            
+            return df
+            
+        except Exception as e:
+            self.logger.error(f"❌ Error reading NCS file {file_key}: {str(e)}")
+            return pd.DataFrame()
+    
     def read_ncs_file_by_path(self, s3_path: str) -> pd.DataFrame:
         """
         Read NCS file by full S3 path (HTML email format)
@@ -357,32 +394,30 @@ class NCSDataCollector:
             self.logger.info(f"Collecting NCS data from {start_date.strftime('%Y-%m-%d')} to {end_date.strftime('%Y-%m-%d')}")
             print(f"🔍 DEBUG NCSDataCollector: Collecting data from {start_date.strftime('%Y-%m-%d')} to {end_date.strftime('%Y-%m-%d')}")
             
+            fetcher = self._get_fetcher()
+            if self.incident_store.enabled:
+                # Only new files are downloaded; everything else comes from the local store
+                sync_stats = self.incident_store.sync_range(fetcher, start_date, end_date)
+                print(f"🔍 DEBUG NCSDataCollector: Store sync listed {sync_stats['days_listed']} days, downloaded {sync_stats['files_downloaded']} new files")
+                fetched = self.incident_store.load_range(start_date, end_date)
+            else:
+                fetched = fetcher.fetch_range(start_date, end_date)
+            total_files_found = len(fetched)
+            print(f"🔍 DEBUG NCSDataCollector: Found {total_files_found} files in range: {[obj['key'] for obj, _ in fetched[:3]] or 'None'}")
+            
             all_data = []
-            current_date = start_date
-            total_files_found = 0
             total_files_processed = 0
-            
-            while current_date <= end_date:
-                date_str = current_date.strftime('%Y-%m-%d')
-                print(f"🔍 DEBUG NCSDataCollector: Processing date {date_str}")
-                files = self.list_available_files(date_str)
-                total_files_found += len(files)
-                print(f"🔍 DEBUG NCSDataCollector: Found {len(files)} files for {date_str}: {files[:3] if files else 'None'}")
-                
-                for file_key in files:
-                    print(f"🔍 DEBUG NCSDataCollector: Reading file {file_key}")
-                    df = self.read_ncs_file(file_key)
-                    if not df.empty:
-                        print(f"✅ DEBUG NCSDataCollector: File {file_key} loaded with {len(df)} rows")
-                        # Add metadata
-                        df['source_file'] = file_key
-                        df['collection_date'] = current_date
-                        all_data.append(df)
-                        total_files_processed += 1
-                    else:
-                        print(f"⚠️ DEBUG NCSDataCollector: File {file_key} is EMPTY or failed to load")
-                
-                current_date += timedelta(days=1)
+            for obj, df in fetched:
+                file_key = obj['key']
+                if not df.empty:
+                    print(f"✅ DEBUG NCSDataCollector: File {file_key} loaded with {len(df)} rows")
+                    # Add metadata
+                    df['source_file'] = file_key
+                    df['collection_date'] = datetime.combine(obj['date'], start_date.time())
+                    all_data.append(df)
+                    total_files_processed += 1
+                else:
+                    print(f"⚠️ DEBUG NCSDataCollector: File {file_key} is EMPTY or failed to load")
             
             if all_data:
                 combined_df = pd.concat(all_data, ignore_index=True)
@@ -0,0 +1,190 @@
+"""
+NCS Parallel Fetcher
+
+Lists a whole date range of NCS emails in one paginated S3 pass, downloads the
+files concurrently on a thread pool and parses the HTML on a process pool, so
+NCS collection scales with cores and network instead of with the day count.
+
+Collection runs on worker threads, so the parser processes are never forked from
+this process: one long-lived pool is shared by every fetcher and starts its workers
+with the forkserver (or spawn) method, chosen by NCS_PARSE_START_METHOD.
+
+The fetcher only needs a boto3-compatible S3 client, so it runs unchanged
+against a local stand-in (moto's mock_aws, or MinIO via NCS_S3_ENDPOINT_URL).
+"""
+
+import atexit
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import date, datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+_parse_pool: Optional[ProcessPoolExecutor] = None
+_parse_pool_lock = threading.Lock()
+
+
+def _parse_start_method() -> str:
+    """Start method of the parser processes; forking a multithreaded process is unsafe"""
+    method = os.getenv("NCS_PARSE_START_METHOD")
+    if method:
+        return method
+    return "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+
+def get_parse_pool(workers: int) -> ProcessPoolExecutor:
+    """Shared parser process pool, created on first use with `workers` processes"""
+    global _parse_pool
+    with _parse_pool_lock:
+        if _parse_pool is None:
+            _parse_pool = ProcessPoolExecutor(max_workers=workers,
+                                              mp_context=multiprocessing.get_context(_parse_start_method()))
+        return _parse_pool
+
+
+def shutdown_parse_pool(pool: ProcessPoolExecutor = None):
+    """Shut down the shared parser pool (only if it is still `pool`, when given)"""
+    global _parse_pool
+    with _parse_pool_lock:
+        if _parse_pool is None or (pool is not None and _parse_pool is not pool):
+            return
+        pool, _parse_pool = _parse_pool, None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+atexit.register(shutdown_parse_pool)
+
+
+class NCSParallelFetcher:
+    """Concurrent listing, download and parsing of NCS email attachments"""
+
+    def __init__(self, s3_client, bucket_name: str, base_prefix: str, parse_func: Callable[[str, str], pd.DataFrame],
+                 download_workers: int = None, parse_workers: int = None, min_files_for_process_pool: int = None):
+        """
+        Initialize the fetcher
+
+        Args:
+            s3_client: boto3 S3 client (clients are thread-safe and shared by the download threads)
+            bucket_name: Bucket holding the NCS attachments
+            base_prefix: Key prefix of the attachments folder
+            parse_func: Picklable function (content, file_key) -> DataFrame used to parse each email
+            download_workers: Download threads (default: NCS_DOWNLOAD_WORKERS or 16)
+            parse_workers: Parser processes of the shared pool (default: NCS_PARSE_WORKERS or CPU count)
+            min_files_for_process_pool: Below this many files parsing runs inline (default: NCS_PROCESS_POOL_MIN_FILES or 8)
+        """
+        self.logger = logging.getLogger(__name__)
+        self.s3_client = s3_client
+        self.bucket_name = bucket_name
+        self.base_prefix = base_prefix
+        self.parse_func = parse_func
+        self.download_workers = download_workers or int(os.getenv("NCS_DOWNLOAD_WORKERS", "16"))
+        self.parse_workers = parse_workers or int(os.getenv("NCS_PARSE_WORKERS", str(os.cpu_count() or 1)))
+        self.min_files_for_process_pool = min_files_for_process_pool or int(os.getenv("NCS_PROCESS_POOL_MIN_FILES", "8"))
+
+    @property
+    def file_prefix(self) -> str:
+        return f"{self.base_prefix}ndc-"
+
+    def key_date(self, key: str) -> Optional[date]:
+        """Date encoded in an NCS key (ndc-YYYY-MM-DD...)"""
+        date_part = key[len(self.file_prefix):len(self.file_prefix) + 10]
+        try:
+            return datetime.strptime(date_part, '%Y-%m-%d').date()
+        except ValueError:
+            return None
+
+    def list_objects_for_range(self, start_date: datetime, end_date: datetime) -> List[Dict]:
+        """
+        List every NCS file between start_date and end_date (inclusive) in one paginated pass
+
+        Returns:
+            List of dicts with key, date, etag and size, ordered by key (i.e. by date)
+        """
+        start_day = start_date.date() if isinstance(start_date, datetime) else start_date
+        end_day = end_date.date() if isinstance(end_date, datetime) else end_date
+
+        # Keys sort by date, so start right before the first day and stop after the last one
+        paginator = self.s3_client.get_paginator('list_objects_v2')
+        pages = paginator.paginate(
+            Bucket=self.bucket_name,
+            Prefix=self.file_prefix,
+            StartAfter=f"{self.file_prefix}{start_day.strftime('%Y-%m-%d')}"
+        )
+
+        objects = []
+        for page in pages:
+            for obj in page.get('Contents', []):
+                key = obj['Key']
+                key_day = self.key_date(key)
+                if key_day is None:
+                    continue
+                if key_day > end_day:
+                    return objects
+                if key_day >= start_day and key.endswith('.txt'):
+                    objects.append({
+                        'key': key,
+                        'date': key_day,
+                        'etag': obj.get('ETag', '').strip('"'),
+                        'size': obj.get('Size', 0)
+                    })
+        return objects
+
+    def _download(self, key: str) -> Tuple[str, Optional[str]]:
+        try:
+            response = self.s3_client.get_object(Bucket=self.bucket_name, Key=key)
+            return key, response['Body'].read().decode('utf-8')
+        except Exception as e:
+            self.logger.error(f"❌ Error downloading NCS file {key}: {str(e)}")
+            return key, None
+
+    def download_files(self, keys: List[str]) -> Dict[str, str]:
+        """Download files concurrently; failed downloads are left out"""
+        if not keys:
+            return {}
+        with ThreadPoolExecutor(max_workers=min(self.download_workers, len(keys))) as executor:
+            results = executor.map(self._download, keys)
+        return {key: content for key, content in results if content is not None}
+
+    def parse_files(self, contents: Dict[str, str]) -> Dict[str, pd.DataFrame]:
+        """Parse downloaded emails, on a process pool when there are enough of them"""
+        keys = list(contents.keys())
+        if len(keys) >= self.min_files_for_process_pool and self.parse_workers > 1:
+            pool = None
+            try:
+                pool = get_parse_pool(self.parse_workers)
+                chunksize = max(1, len(keys) // (self.parse_workers * 4))
+                frames = list(pool.map(self.parse_func, [contents[k] for k in keys], keys, chunksize=chunksize))
+                return dict(zip(keys, frames))
+            except Exception as e:
+                # e.g. process creation not permitted in this environment; a broken pool is
+                # dropped so the next fetch starts a fresh one
+                self.logger.warning(f"⚠️ Process pool parsing failed ({e}), parsing inline")
+                if pool is not None:
+                    shutdown_parse_pool(pool)
+
+        return {key: self.parse_func(contents[key], key) for key in keys}
+
+    def fetch_objects(self, objects: List[Dict]) -> List[Tuple[Dict, pd.DataFrame, bool]]:
+        """
+        Download and parse already-listed files
+
+        Returns:
+            List of (object info, parsed DataFrame, downloaded) in input order; failed downloads yield empty frames
+        """
+        contents = self.download_files([obj['key'] for obj in objects])
+        frames = self.parse_files(contents)
+        return [(obj, frames.get(obj['key'], pd.DataFrame()), obj['key'] in contents) for obj in objects]
+
+    def fetch_range(self, start_date: datetime, end_date: datetime) -> List[Tuple[Dict, pd.DataFrame]]:
+        """
+        List, download and parse every NCS file in a date range
+
+        Returns:
+            List of (object info, parsed DataFrame) in key order; unparseable files yield empty frames
+        """
+        objects = self.list_objects_for_range(start_date, end_date)
+        return [(obj, df) for obj, df, _ in self.fetch_objects(objects)]
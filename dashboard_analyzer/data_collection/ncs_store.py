@@ -0,0 +1,283 @@
+"""
+NCS Incident Store
+
+Incremental local store of parsed NCS emails. The attachments in S3 are
+immutable once written, so each file is downloaded and parsed once and kept in
+a SQLite database keyed by S3 key and ETag; later range queries read the local
+copy and only re-list S3 for days that may still receive new files.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from contextlib import ExitStack
+from datetime import date, datetime, timedelta
+from io import StringIO
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS ncs_files (
+    key TEXT PRIMARY KEY,
+    etag TEXT,
+    file_date TEXT NOT NULL,
+    size INTEGER,
+    row_count INTEGER NOT NULL,
+    data TEXT,
+    synced_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_ncs_files_date ON ncs_files (file_date);
+CREATE TABLE IF NOT EXISTS ncs_synced_days (
+    day TEXT PRIMARY KEY,
+    synced_at REAL NOT NULL
+);
+"""
+
+
+class NCSIncidentStore:
+    """SQLite-backed store of parsed NCS emails with incremental S3 sync"""
+
+    def __init__(self, db_path: str = None, enabled: bool = None):
+        """
+        Initialize the store
+
+        Args:
+            db_path: SQLite file (default: NCS_STORE_PATH or <repo>/.cache/ncs/ncs_incidents.sqlite)
+            enabled: Whether the store is used (default: NCS_STORE_ENABLED, true unless set to false)
+        """
+        default_path = Path(__file__).parent.parent.parent / '.cache' / 'ncs' / 'ncs_incidents.sqlite'
+        self.db_path = Path(db_path or os.getenv("NCS_STORE_PATH", str(default_path)))
+
+        if enabled is None:
+            enabled = os.getenv("NCS_STORE_ENABLED", "true").lower() not in ("false", "0", "no")
+        self.enabled = enabled
+
+        # Days newer than this may still receive files, so their listing is refreshed after recent_ttl seconds
+        self.settle_days = int(os.getenv("NCS_STORE_SETTLE_DAYS", "2"))
+        self.recent_ttl = int(os.getenv("NCS_STORE_RECENT_TTL", "900"))
+
+        # _lock guards the schema setup, the day locks and the stats; a day lock is held while
+        # that day is listed and downloaded, so overlapping syncs do not fetch it twice
+        self._lock = threading.RLock()
+        self._day_locks: Dict[date, threading.Lock] = {}
+        self._initialized = False
+        self.stats = {'files_downloaded': 0, 'files_from_store': 0, 'days_listed': 0, 'days_skipped': 0}
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._initialized:
+            with self._lock:
+                if not self._initialized:
+                    self.db_path.parent.mkdir(parents=True, exist_ok=True)
+                    conn = sqlite3.connect(self.db_path, timeout=30)
+                    try:
+                        conn.executescript(SCHEMA)
+                    finally:
+                        conn.close()
+                    self._initialized = True
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def _pending_days(self, start_day: date, end_day: date) -> List[date]:
+        conn = self._connect()
+        try:
+            return self._days_needing_sync(conn, start_day, end_day)
+        finally:
+            conn.close()
+
+    def _day_locks_for(self, days: List[date]) -> List[threading.Lock]:
+        """Locks of the given days in date order (always acquired in that order, so syncs cannot deadlock)"""
+        with self._lock:
+            return [self._day_locks.setdefault(day, threading.Lock()) for day in sorted(days)]
+
+    @staticmethod
+    def _day(value) -> date:
+        return value.date() if isinstance(value, datetime) else value
+
+    def _days_needing_sync(self, conn: sqlite3.Connection, start_day: date, end_day: date) -> List[date]:
+        """Days in the range never listed, or listed too long ago while still open"""
+        synced = dict(conn.execute(
+            "SELECT day, synced_at FROM ncs_synced_days WHERE day BETWEEN ? AND ?",
+            (start_day.isoformat(), end_day.isoformat())
+        ).fetchall())
+
+        now = time.time()
+        settled_before = date.today() - timedelta(days=self.settle_days)
+        pending = []
+        current = start_day
+        while current <= end_day:
+            synced_at = synced.get(current.isoformat())
+            if synced_at is None:
+                pending.append(current)
+            elif current > settled_before and now - synced_at > self.recent_ttl:
+                pending.append(current)
+            current += timedelta(days=1)
+        return pending
+
+    def sync_range(self, fetcher, start_date: datetime, end_date: datetime) -> Dict[str, int]:
+        """
+        Bring the store up to date for a date range
+
+        Lists S3 only for days that are missing or still open, then downloads
+        and parses only keys that are new or whose ETag changed.
+
+        Args:
+            fetcher: NCSParallelFetcher bound to the NCS bucket
+            start_date: First day of the range
+            end_date: Last day of the range (inclusive)
+
+        Returns:
+            Counts of days listed and files downloaded
+        """
+        start_day, end_day = self._day(start_date), self._day(end_date)
+        total_days = (end_day - start_day).days + 1
+
+        pending_days = self._pending_days(start_day, end_day)
+        if not pending_days:
+            with self._lock:
+                self.stats['days_skipped'] += total_days
+            return {'days_listed': 0, 'files_downloaded': 0}
+
+        # S3 listing and downloads run holding only the locks of the days being synced
+        with ExitStack() as held:
+            for lock in self._day_locks_for(pending_days):
+                held.enter_context(lock)
+
+            # Another sync may have brought some of the days up to date while waiting
+            pending_days = self._pending_days(start_day, end_day)
+            with self._lock:
+                self.stats['days_skipped'] += total_days - len(pending_days)
+            if not pending_days:
+                return {'days_listed': 0, 'files_downloaded': 0}
+
+            # One listing pass covering the span of days that need it
+            listed = fetcher.list_objects_for_range(min(pending_days), max(pending_days))
+            pending_set = set(pending_days)
+            listed = [obj for obj in listed if obj['date'] in pending_set]
+
+            conn = self._connect()
+            try:
+                known = dict(conn.execute(
+                    "SELECT key, etag FROM ncs_files WHERE file_date BETWEEN ? AND ?",
+                    (min(pending_days).isoformat(), max(pending_days).isoformat())
+                ).fetchall())
+            finally:
+                conn.close()
+            to_fetch = [obj for obj in listed if known.get(obj['key']) != obj['etag']]
+
+            fetched = fetcher.fetch_objects(to_fetch) if to_fetch else []
+            synced_at = time.time()
+            # Days with failed downloads are listed again on the next sync
+            failed_days = {obj['date'] for obj, _, ok in fetched if not ok}
+
+            conn = self._connect()
+            try:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO ncs_files (key, etag, file_date, size, row_count, data, synced_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [
+                        (obj['key'], obj['etag'], obj['date'].isoformat(), obj['size'], len(df),
+                         df.to_json(orient='split', index=False) if not df.empty else None, synced_at)
+                        for obj, df, downloaded in fetched if downloaded
+                    ]
+                )
+                conn.executemany(
+                    "INSERT OR REPLACE INTO ncs_synced_days (day, synced_at) VALUES (?, ?)",
+                    [(day.isoformat(), synced_at) for day in pending_days if day not in failed_days]
+                )
+                conn.commit()
+            finally:
+                conn.close()
+
+        downloaded = sum(1 for _, _, ok in fetched if ok)
+        with self._lock:
+            self.stats['days_listed'] += len(pending_days)
+            self.stats['files_downloaded'] += downloaded
+        return {'days_listed': len(pending_days), 'files_downloaded': downloaded}
+
+    def load_range(self, start_date: datetime, end_date: datetime) -> List[Tuple[Dict, pd.DataFrame]]:
+        """
+        Read the parsed files of a date range from the store
+
+        Returns:
+            List of (object info, parsed DataFrame) in key order, like NCSParallelFetcher.fetch_range
+        """
+        start_day, end_day = self._day(start_date), self._day(end_date)
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT key, etag, file_date, size, data FROM ncs_files WHERE file_date BETWEEN ? AND ? ORDER BY key",
+                (start_day.isoformat(), end_day.isoformat())
+            ).fetchall()
+        finally:
+            conn.close()
+
+        results = []
+        for key, etag, file_date, size, data in rows:
+            info = {'key': key, 'etag': etag, 'date': date.fromisoformat(file_date), 'size': size}
+            results.append((info, self._decode(data)))
+        self.stats['files_from_store'] += len(results)
+        return results
+
+    def get_file(self, key: str) -> Optional[pd.DataFrame]:
+        """Parsed content of a single stored file, or None if it has not been synced"""
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT data FROM ncs_files WHERE key = ?", (key,)).fetchone()
+        finally:
+            conn.close()
+        if row is None:
+            return None
+        self.stats['files_from_store'] += 1
+        return self._decode(row[0])
+
+    def put_file(self, key: str, etag: str, file_date: date, size: int, df: pd.DataFrame):
+        """Store one parsed file (e.g. read outside a range sync)"""
+        with self._lock:
+            conn = self._connect()
+            try:
+                conn.execute(
+                    "INSERT OR REPLACE INTO ncs_files (key, etag, file_date, size, row_count, data, synced_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (key, etag, file_date.isoformat(), size, len(df),
+                     df.to_json(orient='split', index=False) if not df.empty else None, time.time())
+                )
+                conn.commit()
+            finally:
+                conn.close()
+
+    @staticmethod
+    def _decode(data: Optional[str]) -> pd.DataFrame:
+        if not data:
+            return pd.DataFrame()
+        # Parsed NCS cells are text - keep them as text instead of letting pandas infer types
+        return pd.read_json(StringIO(data), orient='split', dtype=False, convert_dates=False)
+
+    def clear(self):
+        """Drop every stored file and sync marker"""
+        if not self.db_path.exists():
+            return
+        with self._lock:
+            conn = self._connect()
+            try:
+                conn.execute("DELETE FROM ncs_files")
+                conn.execute("DELETE FROM ncs_synced_days")
+                conn.commit()
+            finally:
+                conn.close()
+
+    def get_stats(self) -> Dict[str, int]:
+        """Sync/read counters for this process"""
+        return dict(self.stats)
+
+
+_shared_store: Optional[NCSIncidentStore] = None
+
+
+def get_ncs_incident_store() -> NCSIncidentStore:
+    """Get the process-wide NCS incident store"""
+    global _shared_store
+    if _shared_store is None:
+        _shared_store = NCSIncidentStore()
+    return _shared_store
@@ -1,14 +1,16 @@
 import os
-import msal
-import requests
 import pandas as pd
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 from dotenv import load_dotenv
 import asyncio
-import aiohttp
 import re # Added for regex replacement
+import time
+
+from .query_scheduler import get_query_scheduler
+from .pbi_connection import get_connection_pool, get_token_provider
+from .query_cache import get_query_cache
 
 class PBIDataCollector:
     """Collects data from Power BI API for each node in the NPS tree hierarchy"""
@@ -31,6 +33,10 @@ class PBIDataCollector:
         
         self.access_token = None
         
+        # Token cache and keep-alive connections are shared by all collector instances
+        self.connection_pool = get_connection_pool()
+        self.token_provider = None
+        
         # Get access token on initialization
         self.access_token = self._get_access_token()
         
@@ -57,6 +63,12 @@ class PBIDataCollector:
         # Path to query files
         self.queries_path = Path(__file__).parent / 'queries'
         
+        # Shared scheduler bounding concurrent executeQueries calls across all collectors
+        self.query_scheduler = get_query_scheduler()
+        
+        # On-disk cache of query results keyed by the rendered DAX text
+        self.query_cache = get_query_cache()
+        
     def _load_query_template(self, query_file: str) -> str:
         """Load DAX query template from file"""
         query_path = self.queries_path / query_file
@@ -67,22 +79,12 @@ class PBIDataCollector:
             return f.read()
         
     def _get_access_token(self) -> str:
-        """Get access token for Power BI API"""
-        authority = f"https://login.microsoftonline.com/{self.tenant_id}"
-        scope = ["https://analysis.windows.net/powerbi/api/.default"]
-        
-        app = msal.ConfidentialClientApplication(
-            client_id=self.client_id,
-            client_credential=self.client_secret,
-            authority=authority
-        )
-        
-        result = app.acquire_token_for_client(scopes=scope)
+        """Get access token for Power BI API from the shared token cache (refreshed before expiry)"""
+        if self.token_provider is None:
+            self.token_provider = get_token_provider(self.tenant_id, self.client_id, self.client_secret)
         
-        if "access_token" not in result:
-            raise Exception("Error getting token: " + str(result))
-            
-        return result["access_token"]
+        self.access_token = self.token_provider.get_token()
+        return self.access_token
     
     def _get_daily_nps_query(self, cabins: List[str], companies: List[str], hauls: List[str]) -> str:
         """Generate DAX query for daily NPS data using template"""
@@ -143,9 +145,9 @@ class PBIDataCollector:
         
         return query
     
-    def _get_flexible_nps_query(self, aggregation_days: int, cabins: List[str], companies: List[str], hauls: List[str], analysis_date: datetime = None) -> str:
+    def _get_flexible_nps_query(self, aggregation_days: int, cabins: List[str], companies: List[str], hauls: List[str], analysis_date: datetime = None, template_file: str = "NPS_flex_agg.txt") -> str:
         """Generate DAX query for flexible NPS aggregation using template"""
-        template = self._load_query_template("NPS_flex_agg.txt")
+        template = self._load_query_template(template_file)
         
         # Replace placeholders with actual values
         cabins_str = '", "'.join(cabins)
@@ -188,9 +190,9 @@ class PBIDataCollector:
         print(f"  📋 Final query preview: {query[:200]}...")
         return query
 
-    def _get_flexible_operative_query(self, aggregation_days: int, cabins: List[str], companies: List[str], hauls: List[str], analysis_date: datetime = None) -> str:
+    def _get_flexible_operative_query(self, aggregation_days: int, cabins: List[str], companies: List[str], hauls: List[str], analysis_date: datetime = None, template_file: str = "Operativa_flex_agg.txt") -> str:
         """Generate DAX query for flexible operative aggregation using template - MATCHES NPS aggregation logic exactly"""
-        template = self._load_query_template("Operativa_flex_agg.txt")
+        template = self._load_query_template(template_file)
         
         # Replace placeholders with actual values
         cabins_str = '", "'.join(cabins)
@@ -286,21 +288,33 @@ class PBIDataCollector:
         
         return query
     
-    def _execute_query(self, query: str) -> pd.DataFrame:
-        """Execute a DAX query against Power BI API"""
+    def _execute_query(self, query: str, template: str = None) -> pd.DataFrame:
+        """Execute a DAX query against Power BI API (served from the query cache when possible)"""
+        cached = self.query_cache.get(query, self.dataset_id)
+        if cached is not None:
+            return cached
+        
+        df = self._post_query(query)
+        self.query_cache.put(query, df, self.dataset_id, template)
+        return df
+    
+    def _post_query(self, query: str) -> pd.DataFrame:
+        """Post a DAX query to the executeQueries endpoint"""
         dax_query = {
             "queries": [{"query": query}],
             "serializerSettings": {"includeNulls": True}
         }
         
         url = f"https://api.powerbi.com/v1.0/myorg/groups/{self.group_id}/datasets/{self.dataset_id}/executeQueries"
-        headers = {
-            "Authorization": f"Bearer {self.access_token}",
-            "Content-Type": "application/json"
-        }
         
         try:
-            response = requests.post(url, headers=headers, json=dax_query)
+            headers = {
+                "Authorization": f"Bearer {self._get_access_token()}",
+                "Content-Type": "application/json"
+            }
+            session = self.connection_pool.get_sync_session()
+            self.connection_pool.stats['sync_requests'] += 1
+            response = session.post(url, headers=headers, json=dax_query)
             
             if response.status_code != 200:
                 print(f"Error {response.status_code}: {response.text}")
@@ -361,7 +375,7 @@ class PBIDataCollector:
         # Collect daily NPS data
         try:
             query = self._get_daily_nps_query(cabins, companies, hauls)
-            df = self._execute_query(query)
+            df = self._execute_query(query, template="Daily NPS.txt")
             if not df.empty:
                 df.to_csv(node_dir / 'daily_NPS.csv', index=False)
                 results['daily_NPS'] = True
@@ -376,7 +390,7 @@ class PBIDataCollector:
         # Collect operative data
         try:
             query = self._get_operative_query(cabins, companies, hauls)
-            df = self._execute_query(query)
+            df = self._execute_query(query, template="Operativa.txt")
             if not df.empty:
                 df.to_csv(node_dir / 'daily_operative.csv', index=False)
                 results['daily_operative'] = True
@@ -402,7 +416,7 @@ class PBIDataCollector:
         
         try:
             print(f"  📝 Collecting verbatims with filters: Cabins={cabins}, Companies={companies}, Hauls={hauls}")
-            df = self._execute_query(query)
+            df = self._execute_query(query, template="Verbatims.txt")
             
             if not df.empty:
                 print(f"  ✅ Found {len(df)} verbatims for {node_path} on {date.strftime('%Y-%m-%d')}")
@@ -440,7 +454,7 @@ class PBIDataCollector:
         
         try:
             print(f"  📝 Collecting verbatims with filters: Cabins={cabins}, Companies={companies}, Hauls={hauls}")
-            df = self._execute_query(query)
+            df = self._execute_query(query, template="Verbatims.txt")
             
             if not df.empty:
                 print(f"  ✅ Found {len(df)} verbatims for {node_path} in date range")
@@ -528,44 +542,55 @@ class PBIDataCollector:
         
         return success_count, total_count
 
-    async def _execute_query_async(self, query: str) -> pd.DataFrame:
-        """Execute a DAX query against Power BI API asynchronously"""
+    async def _execute_query_async(self, query: str, label: str = None, template: str = None) -> pd.DataFrame:
+        """Execute a DAX query against Power BI API asynchronously through the shared query scheduler"""
+        # Cache hits never touch the scheduler or the network
+        cached = self.query_cache.get(query, self.dataset_id)
+        if cached is not None:
+            return cached
+        
+        df = await self.query_scheduler.run(
+            self.dataset_id, label or "query", lambda: self._post_query_async(query)
+        )
+        self.query_cache.put(query, df, self.dataset_id, template)
+        return df
+
+    async def _post_query_async(self, query: str) -> pd.DataFrame:
+        """Post a DAX query to the executeQueries endpoint"""
         dax_query = {
             "queries": [{"query": query}],
             "serializerSettings": {"includeNulls": True}
         }
         
         url = f"https://api.powerbi.com/v1.0/myorg/groups/{self.group_id}/datasets/{self.dataset_id}/executeQueries"
-        headers = {
-            "Authorization": f"Bearer {self.access_token}",
-            "Content-Type": "application/json"
-        }
         
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(url, headers=headers, json=dax_query) as response:
-                    if response.status != 200:
-                        response_text = await response.text()
-                        print(f"Error {response.status}: {response_text}")
-                        return pd.DataFrame()
-                        
-                    results = await response.json()
+            headers = {
+                "Authorization": f"Bearer {self._get_access_token()}",
+                "Content-Type": "application/json"
+            }
+            session = await self.connection_pool.get_async_session()
+            async with session.post(url, headers=headers, json=dax_query) as response:
+                if response.status != 200:
+                    response_text = await response.text()
+                    print(f"Error {response.status}: {response_text}")
+                    return pd.DataFrame()
+                    
+                results = await response.json()
+                
+                if not results.get('results') or not results['results'][0].get('tables'):
+                    print("No data returned from query")
+                    return pd.DataFrame()
                     
-                    if not results.get('results') or not results['results'][0].get('tables'):
-                        print("No data returned from query")
-                        return pd.DataFrame()
-                        
-                    rows = results['results'][0]['tables'][0].get('rows', [])
-                    return pd.DataFrame(rows)
+                rows = results['results'][0]['tables'][0].get('rows', [])
+                return pd.DataFrame(rows)
                     
         except Exception as e:
             print(f"Error executing async query: {str(e)}")
             return pd.DataFrame()
 
     async def collect_flexible_data_for_node(self, node_path: str, aggregation_days: int, target_folder: str, analysis_date: datetime = None) -> Dict[str, bool]:
-        """Collect flexible aggregated data for a specific node"""
-        results = {}
-        
+        """Collect flexible aggregated data for a specific node (NPS and operative queries run concurrently)"""
         # Parse node path to get filters
         cabins, companies, hauls = self._parse_node_path(node_path)
         
@@ -579,53 +604,217 @@ class PBIDataCollector:
             print(f"  Analysis date: {analysis_date.strftime('%Y-%m-%d')}")
         print(f"  Filters - Cabins: {cabins}, Companies: {companies}, Hauls: {hauls}")
         
-        # Collect flexible NPS data
+        nps_ok, operative_ok = await asyncio.gather(
+            self._collect_flexible_nps(node_path, node_dir, aggregation_days, cabins, companies, hauls, analysis_date),
+            self._collect_flexible_operative(node_path, node_dir, aggregation_days, cabins, companies, hauls, analysis_date)
+        )
+        
+        return {'flexible_NPS': nps_ok, 'flexible_operative': operative_ok}
+
+    async def _collect_flexible_nps(self, node_path: str, node_dir: Path, aggregation_days: int, cabins: List[str], companies: List[str], hauls: List[str], analysis_date: datetime = None) -> bool:
+        """Collect and save the flexible NPS file for a node"""
         try:
             query = self._get_flexible_nps_query(aggregation_days, cabins, companies, hauls, analysis_date)
-            df = await self._execute_query_async(query)
+            df = await self._execute_query_async(query, label=f"{node_path} NPS", template="NPS_flex_agg.txt")
             if not df.empty:
                 # Clean column names safely
                 df = self._safe_clean_columns(df)
                 df.to_csv(node_dir / f'flexible_NPS_{aggregation_days}d.csv', index=False)
-                results['flexible_NPS'] = True
-                print(f"  ✓ flexible_NPS_{aggregation_days}d.csv saved ({len(df)} periods)")
-            else:
-                results['flexible_NPS'] = False
-                print(f"  ✗ flexible_NPS_{aggregation_days}d.csv - no data")
+                print(f"  ✓ {node_path}: flexible_NPS_{aggregation_days}d.csv saved ({len(df)} periods)")
+                return True
+            print(f"  ✗ {node_path}: flexible_NPS_{aggregation_days}d.csv - no data")
+            return False
         except Exception as e:
-            results['flexible_NPS'] = False
-            print(f"  ✗ flexible_NPS_{aggregation_days}d.csv - error: {str(e)}")
-        
-        # Collect operative data - ALWAYS use flexible query with appropriate aggregation_days
+            print(f"  ✗ {node_path}: flexible_NPS_{aggregation_days}d.csv - error: {str(e)}")
+            return False
+
+    async def _collect_flexible_operative(self, node_path: str, node_dir: Path, aggregation_days: int, cabins: List[str], companies: List[str], hauls: List[str], analysis_date: datetime = None) -> bool:
+        """Collect and save the flexible operative file for a node"""
+        filename = f'flexible_operative_{aggregation_days}d.csv'
         try:
             # Use flexible aggregation for ALL cases (daily = 1 day, weekly = 7 days, etc.)
             query = self._get_flexible_operative_query(aggregation_days, cabins, companies, hauls, analysis_date)
-            filename = f'flexible_operative_{aggregation_days}d.csv'
             
             if aggregation_days == 1:
                 print(f"  📊 Using flexible operative query (1d = daily periods) - ✅ ALIGNED WITH NPS")
             else:
                 print(f"  📊 Using flexible operative query ({aggregation_days}d periods) - ✅ ALIGNED WITH NPS")
             
-            df = await self._execute_query_async(query)
+            df = await self._execute_query_async(query, label=f"{node_path} operative", template="Operativa_flex_agg.txt")
             if not df.empty:
                 # Clean column names safely
                 df = self._safe_clean_columns(df)
                 df.to_csv(node_dir / filename, index=False)
                 
-                results['flexible_operative'] = True
                 if aggregation_days == 1:
-                    print(f"  ✓ {filename} saved ({len(df)} daily periods) - ✅ SAME LOGIC AS NPS")
+                    print(f"  ✓ {node_path}: {filename} saved ({len(df)} daily periods) - ✅ SAME LOGIC AS NPS")
                 else:
-                    print(f"  ✓ {filename} saved ({len(df)} periods) - ✅ SAME LOGIC AS NPS")
-            else:
-                results['flexible_operative'] = False
-                print(f"  ✗ {filename} - no data")
+                    print(f"  ✓ {node_path}: {filename} saved ({len(df)} periods) - ✅ SAME LOGIC AS NPS")
+                return True
+            print(f"  ✗ {node_path}: {filename} - no data")
+            return False
         except Exception as e:
-            results['flexible_operative'] = False
-            print(f"  ✗ flexible_operative_{aggregation_days}d.csv - error: {str(e)}")
+            print(f"  ✗ {node_path}: {filename} - error: {str(e)}")
+            return False
+
+    async def collect_flexible_data_for_nodes(self, node_paths: List[str], aggregation_days: int, target_folder: str, analysis_date: datetime = None, max_in_flight: int = None, report_latency: bool = True, tree_mode: bool = None) -> Dict[str, Dict[str, bool]]:
+        """
+        Collect flexible aggregated data for several nodes concurrently
         
-        return results
+        Every node's NPS and operative queries are fanned out through the shared
+        query scheduler, so a full-tree download takes roughly as long as the
+        slowest query instead of the sum of all of them.
+        
+        Args:
+            node_paths: Node paths to collect (e.g. the output of get_segment_node_paths)
+            aggregation_days: Number of days per period
+            target_folder: Where to save the data
+            analysis_date: Optional analysis date to use instead of TODAY() in queries
+            max_in_flight: Optional override of the scheduler's concurrency limit
+            report_latency: Print the per-query latency report when finished
+            tree_mode: Fetch the whole tree with one query per data type (default: PBI_TREE_MODE, true)
+            
+        Returns:
+            Dict mapping node_path -> {file_type: success}
+        """
+        if max_in_flight:
+            self.query_scheduler.set_max_in_flight(max_in_flight)
+        
+        if tree_mode is None:
+            tree_mode = os.getenv("PBI_TREE_MODE", "true").lower() not in ("false", "0", "no")
+        if tree_mode and len(node_paths) > 1:
+            return await self.collect_flexible_tree_data(node_paths, aggregation_days, target_folder, analysis_date, report_latency)
+        
+        # The scheduler is shared with concurrent flows: report only this download's queries
+        start = time.perf_counter()
+        with self.query_scheduler.stats_scope() as latencies:
+            node_results = await asyncio.gather(
+                *[self.collect_flexible_data_for_node(node_path, aggregation_days, target_folder, analysis_date) for node_path in node_paths],
+                return_exceptions=True
+            )
+        wall_seconds = time.perf_counter() - start
+        
+        all_results = {}
+        for node_path, result in zip(node_paths, node_results):
+            if isinstance(result, Exception):
+                print(f"❌ Error collecting data for {node_path}: {result}")
+                all_results[node_path] = {'flexible_NPS': False, 'flexible_operative': False}
+            else:
+                all_results[node_path] = result
+        
+        if report_latency:
+            self.query_scheduler.print_latency_report(wall_seconds, latencies)
+            self.connection_pool.print_connection_stats()
+        
+        return all_results
+
+    def _get_tree_node_rows(self, node_paths: List[str]) -> str:
+        """Render the DATATABLE rows describing each tree node's filters ("*" = all values)"""
+        rows = []
+        for node_path in node_paths:
+            cabins, companies, hauls = self._parse_node_path(node_path)
+            haul = hauls[0] if len(hauls) == 1 else "*"
+            cabin = cabins[0] if len(cabins) == 1 else "*"
+            company = companies[0] if len(companies) == 1 else "*"
+            rows.append(f'\t\t\t\t{{"{node_path}", "{haul}", "{cabin}", "{company}"}}')
+        return ",\n".join(rows)
+
+    def _get_flexible_tree_query(self, data_type: str, aggregation_days: int, node_paths: List[str], analysis_date: datetime = None) -> str:
+        """
+        Generate a tree-mode DAX query returning every node's periods in one evaluation
+        
+        Args:
+            data_type: "NPS" or "operative"
+            aggregation_days: Number of days per period
+            node_paths: Tree nodes to include (parents are computed as rollups)
+            analysis_date: Optional analysis date to use instead of TODAY()
+        """
+        cabins, companies, hauls = self._parse_node_path("Global")
+        if data_type == "NPS":
+            query = self._get_flexible_nps_query(aggregation_days, cabins, companies, hauls, analysis_date, template_file="NPS_flex_agg_tree.txt")
+        else:
+            query = self._get_flexible_operative_query(aggregation_days, cabins, companies, hauls, analysis_date, template_file="Operativa_flex_agg_tree.txt")
+        return query.replace('{NODE_ROWS}', self._get_tree_node_rows(node_paths))
+
+    def _split_tree_result(self, df: pd.DataFrame, node_paths: List[str]) -> Dict[str, pd.DataFrame]:
+        """Split a tree-mode result into the per-node frames written by collect_flexible_data_for_node"""
+        node_frames = {}
+        if df.empty or 'Node' not in df.columns:
+            return node_frames
+        
+        node_columns = ['Node', 'Node_Haul', 'Node_Cabin', 'Node_Company']
+        for node_path, node_df in df.groupby('Node', sort=False):
+            if node_path not in node_paths:
+                continue
+            node_df = node_df.drop(columns=[col for col in node_columns if col in node_df.columns])
+            if 'Period_Group' in node_df.columns:
+                node_df = node_df.sort_values('Period_Group', ascending=False)
+            node_frames[node_path] = node_df.reset_index(drop=True)
+        return node_frames
+
+    async def collect_flexible_tree_data(self, node_paths: List[str], aggregation_days: int, target_folder: str, analysis_date: datetime = None, report_latency: bool = True) -> Dict[str, Dict[str, bool]]:
+        """
+        Collect flexible data for a whole tree with one NPS and one operative query
+        
+        The tree-mode queries evaluate every node (with parent rollups) in a single
+        EVALUATE; the result is split client-side into the same per-node CSV files
+        that collect_flexible_data_for_node writes. Nodes missing from a tree
+        result fall back to the per-node queries.
+        
+        Args:
+            node_paths: Node paths to collect
+            aggregation_days: Number of days per period
+            target_folder: Where to save the data
+            analysis_date: Optional analysis date to use instead of TODAY() in queries
+            report_latency: Print the per-query latency report when finished
+            
+        Returns:
+            Dict mapping node_path -> {file_type: success}
+        """
+        print(f"🌳 Collecting flexible data for {len(node_paths)} nodes in tree mode")
+        start = time.perf_counter()
+        with self.query_scheduler.stats_scope() as latencies:
+            nps_df, operative_df = await asyncio.gather(
+                self._execute_query_async(
+                    self._get_flexible_tree_query("NPS", aggregation_days, node_paths, analysis_date),
+                    label="tree NPS", template="NPS_flex_agg_tree.txt"
+                ),
+                self._execute_query_async(
+                    self._get_flexible_tree_query("operative", aggregation_days, node_paths, analysis_date),
+                    label="tree operative", template="Operativa_flex_agg_tree.txt"
+                )
+            )
+        
+            nps_frames = self._split_tree_result(self._safe_clean_columns(nps_df), node_paths)
+            operative_frames = self._split_tree_result(self._safe_clean_columns(operative_df), node_paths)
+        
+            all_results = {}
+            missing_nodes = []
+            for node_path in node_paths:
+                if node_path not in nps_frames or node_path not in operative_frames:
+                    missing_nodes.append(node_path)
+                    continue
+            
+                node_dir = Path(target_folder) / node_path.replace('/', '_')
+                node_dir.mkdir(parents=True, exist_ok=True)
+                nps_frames[node_path].to_csv(node_dir / f'flexible_NPS_{aggregation_days}d.csv', index=False)
+                operative_frames[node_path].to_csv(node_dir / f'flexible_operative_{aggregation_days}d.csv', index=False)
+                all_results[node_path] = {'flexible_NPS': True, 'flexible_operative': True}
+                print(f"  ✓ {node_path}: {len(nps_frames[node_path])} NPS periods, {len(operative_frames[node_path])} operative periods")
+        
+            if missing_nodes:
+                print(f"  ⚠️ Tree result incomplete for {missing_nodes} - falling back to per-node queries")
+                fallback_results = await self.collect_flexible_data_for_nodes(
+                    missing_nodes, aggregation_days, target_folder, analysis_date, report_latency=False, tree_mode=False
+                )
+                all_results.update(fallback_results)
+        
+        if report_latency:
+            self.query_scheduler.print_latency_report(time.perf_counter() - start, latencies)
+            self.connection_pool.print_connection_stats()
+        
+        # Preserve the caller's node order
+        return {node_path: all_results[node_path] for node_path in node_paths}
 
     def _safe_clean_columns(self, df: pd.DataFrame) -> pd.DataFrame:
         """
@@ -707,7 +896,7 @@ class PBIDataCollector:
                 print(f"📁 Using LEGACY operative query for backward compatibility")
             
             # Execute the query
-            df = self._execute_query(query)
+            df = self._execute_query(query, template="Operativa_flex_agg.txt" if use_flexible else "Operativa.txt")
             
             if not df.empty:
                 # Clean column names
@@ -761,7 +950,7 @@ class PBIDataCollector:
             )
             
             # Execute the query
-            df = self._execute_query(query)
+            df = self._execute_query(query, template="Exp. Drivers.txt")
             
             if not df.empty:
                 # Clean column names safely
@@ -796,7 +985,7 @@ class PBIDataCollector:
             query = self._get_routes_range_query(cabins, companies, hauls, start_date, end_date, comparison_filter, comparison_start_date, comparison_end_date)
             
             # Execute the query
-            df = self._execute_query(query)
+            df = self._execute_query(query, template="Rutas.txt")
             
             if not df.empty:
                 # Clean column names safely
@@ -1008,6 +1197,26 @@ class PBIDataCollector:
             '__CURRENT_DAY__', str(start_date.day)
         )
         
+        # The Date_Master filter (__DS0FilterTable4) is the analysis window; the comparison
+        # dates below only fill the __DS0FilterTableSelPeriod block
+        query = re.sub(
+            r'VAR __DS0FilterTable4 =.*?(?=\s*VAR)',
+            lambda match: match.group(0).replace(
+                '__START_YEAR__', str(start_date.year)
+            ).replace(
+                '__START_MONTH__', str(start_date.month)
+            ).replace(
+                '__START_DAY__', str(start_date.day)
+            ).replace(
+                '__END_YEAR__', str(end_date.year)
+            ).replace(
+                '__END_MONTH__', str(end_date.month)
+            ).replace(
+                '__END_DAY__', str(end_date.day)
+            ),
+            query, count=1, flags=re.DOTALL
+        )
+        
         # Handle vs Sel. Period logic like in other queries
         if comparison_filter != "vs Sel. Period":
             # Remove the entire VAR __DS0FilterTableSelPeriod block
@@ -1103,6 +1312,127 @@ class PBIDataCollector:
         
         return query
 
+    async def collect_customer_profile_for_date_range(self, node_path: str, start_date: datetime, end_date: datetime, profile_dimension: str = "Channel", comparison_filter: str = "vs L7d", comparison_start_date: datetime = None, comparison_end_date: datetime = None, route_filter: List[str] = None) -> pd.DataFrame:
+        """
+        Collect customer profile data of one dimension for a node and date range
+        
+        Args:
+            node_path: Node path like "Global/LH/Business"
+            start_date: Start date for the range
+            end_date: End date for the range
+            profile_dimension: Customer profile dimension (Business/Leisure, Fleet, Residence Region, Tier, ...)
+            comparison_filter: Comparison filter to use (None for absolute values only, evaluated as vs L7d)
+            comparison_start_date: Start date for comparison period (required when comparison_filter is "vs Sel. Period")
+            comparison_end_date: End date for comparison period (required when comparison_filter is "vs Sel. Period")
+            route_filter: Optional routes to restrict the profile to
+            
+        Returns:
+            DataFrame with one row per profile category
+        """
+        try:
+            cabins, companies, hauls = self._get_node_filters(node_path)
+            query = self._get_customer_profile_range_query(
+                cabins, companies, hauls, start_date, end_date, profile_dimension,
+                route_filter, comparison_filter or "vs L7d", comparison_start_date, comparison_end_date
+            )
+            
+            # Through the shared scheduler, so the dimensions of a profile run concurrently
+            df = await self._execute_query_async(query, label=f"customer profile {profile_dimension}", template="Customer Profile.txt")
+            
+            if not df.empty:
+                df = self._safe_clean_columns(df)
+                print(f"         ✅ Collected {len(df)} {profile_dimension} profiles for analysis (filter: {comparison_filter})")
+            
+            return df
+            
+        except Exception as e:
+            print(f"         ❌ Error collecting customer profile data ({profile_dimension}): {str(e)}")
+            return pd.DataFrame()
+
+    def _get_customer_profile_multi_query(self, cabins: List[str], companies: List[str], hauls: List[str],
+                                          start_date: datetime, end_date: datetime, profile_dimensions: List[str],
+                                          route_filter: List[str] = None, comparison_filter: str = "vs L7d",
+                                          comparison_start_date: datetime = None, comparison_end_date: datetime = None) -> str:
+        """
+        Generate one DAX query returning several customer profile dimensions
+        
+        Each dimension keeps the variables of its single-dimension query (suffixed with
+        its position) and the EVALUATE is the UNION of their results, tagged with a
+        Dimension column, so all dimensions cost one executeQueries round-trip.
+        """
+        definitions = []
+        tables = []
+        for index, dimension in enumerate(profile_dimensions):
+            query = self._get_customer_profile_range_query(
+                cabins, companies, hauls, start_date, end_date, dimension,
+                route_filter, comparison_filter, comparison_start_date, comparison_end_date
+            )
+            define_block, _ = query.split('EVALUATE', 1)
+            define_block = define_block.split('DEFINE', 1)[1]
+            definitions.append(re.sub(r'\b(__DS0\w*|__ValueFilterDM\w*)\b', rf'\1_{index}', define_block).rstrip())
+            tables.append(f'ADDCOLUMNS(__DS0Core_{index}, "Dimension", "{dimension}")')
+        
+        tables_str = ",\n        ".join(tables)
+        return "// DAX Query - Customer Profile Analysis (multiple dimensions)\nDEFINE" + "\n".join(definitions) + \
+            f"\n\nEVALUATE\n    UNION(\n        {tables_str}\n    )\n"
+
+    async def collect_customer_profile_dimensions(self, node_path: str, start_date: datetime, end_date: datetime, profile_dimensions: List[str], comparison_filter: str = "vs L7d", comparison_start_date: datetime = None, comparison_end_date: datetime = None, route_filter: List[str] = None, multi_query: bool = None) -> Dict[str, pd.DataFrame]:
+        """
+        Collect several customer profile dimensions of a node and date range
+        
+        By default each dimension is its own query and all of them are issued
+        concurrently through the shared query scheduler. In multi-query mode the
+        dimensions are evaluated by one UNION query and split client-side; dimensions
+        missing from that result fall back to their own queries.
+        
+        Args:
+            node_path: Node path like "Global/LH/Business"
+            start_date: Start date for the range
+            end_date: End date for the range
+            profile_dimensions: Dimensions to collect
+            comparison_filter: Comparison filter to use (None for absolute values only)
+            comparison_start_date: Start date for comparison period
+            comparison_end_date: End date for comparison period
+            route_filter: Optional routes to restrict the profiles to
+            multi_query: Collect all dimensions with one query (default: PBI_PROFILE_MULTI_QUERY, false)
+            
+        Returns:
+            Dict mapping dimension -> DataFrame (empty when no data), in the order requested
+        """
+        if multi_query is None:
+            multi_query = os.getenv("PBI_PROFILE_MULTI_QUERY", "false").lower() in ("true", "1", "yes")
+        
+        frames = {}
+        if multi_query and len(profile_dimensions) > 1:
+            try:
+                cabins, companies, hauls = self._get_node_filters(node_path)
+                query = self._get_customer_profile_multi_query(
+                    cabins, companies, hauls, start_date, end_date, profile_dimensions,
+                    route_filter, comparison_filter or "vs L7d", comparison_start_date, comparison_end_date
+                )
+                df = self._safe_clean_columns(await self._execute_query_async(
+                    query, label=f"customer profile x{len(profile_dimensions)}", template="Customer Profile.txt"
+                ))
+                if not df.empty and 'Dimension' in df.columns:
+                    for dimension, dimension_df in df.groupby('Dimension', sort=False):
+                        frames[dimension] = dimension_df.drop(columns=['Dimension']).reset_index(drop=True)
+                print(f"         ✅ Collected {len(frames)}/{len(profile_dimensions)} profile dimensions with one query (filter: {comparison_filter})")
+            except Exception as e:
+                print(f"         ⚠️ Multi-dimension customer profile query failed: {str(e)}")
+        
+        missing = [dimension for dimension in profile_dimensions if dimension not in frames]
+        if missing:
+            results = await asyncio.gather(*[
+                self.collect_customer_profile_for_date_range(
+                    node_path, start_date, end_date, dimension, comparison_filter,
+                    comparison_start_date, comparison_end_date, route_filter
+                )
+                for dimension in missing
+            ])
+            frames.update(zip(missing, results))
+        
+        return {dimension: frames[dimension] for dimension in profile_dimensions}
+
     async def collect_routes_dictionary(self) -> pd.DataFrame:
         """
         Colecta el diccionario simple de rutas para filtrado NCS
@@ -1111,31 +1441,23 @@ class PBIDataCollector:
             DataFrame con columnas: route, country_name, gr_region, haul_aggr
         """
         try:
-            self.logger.info("🗺️ Collecting routes dictionary for NCS filtering...")
+            print("🗺️ Collecting routes dictionary for NCS filtering...")
             
             # Load the simple routes dictionary template
             template = self._load_query_template("Rutas Diccionario.txt")
             
-            # Execute query without any filters - we want the complete dictionary
-            result = await self._execute_query(template)
+            # Execute query without any filters - we want the complete dictionary (cached for a day)
+            result = await self._execute_query_async(template, label="routes_dictionary", template="Rutas Diccionario.txt")
             
             if result is not None and not result.empty:
-                self.logger.info(f"✅ Collected routes dictionary with {len(result)} routes")
-                self.logger.debug(f"Routes dictionary columns: {list(result.columns)}")
-                
-                # Log some sample routes for debugging
-                if len(result) > 0:
-                    sample_routes = result.head(3)
-                    for _, route in sample_routes.iterrows():
-                        route_info = route.get('route', 'N/A')
-                        haul_info = route.get('haul_aggr', 'N/A')
-                        self.logger.debug(f"Sample route: {route_info} -> {haul_info}")
-                
+                # Power BI names columns "[route]" / "Route_Master[haul_aggr]" - keep the bare column names
+                result = result.rename(columns=lambda col: str(col).rsplit('[', 1)[-1].rstrip(']'))
+                print(f"✅ Collected routes dictionary with {len(result)} routes")
                 return result
             else:
-                self.logger.warning("❌ Routes dictionary query returned empty result")
+                print("❌ Routes dictionary query returned empty result")
                 return pd.DataFrame()
                 
         except Exception as e:
-            self.logger.error(f"❌ Error collecting routes dictionary: {e}")
+            print(f"❌ Error collecting routes dictionary: {e}")
             return pd.DataFrame()
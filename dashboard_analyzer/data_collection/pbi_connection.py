@@ -0,0 +1,221 @@
+"""
+Power BI Connection Pool
+
+Process-wide HTTP connection pooling and MSAL token lifecycle shared by every
+PBIDataCollector instance, so a run pays the TCP+TLS handshake and the Azure AD
+token round-trip once instead of once per query / per collector.
+"""
+
+import asyncio
+import os
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+import aiohttp
+import msal
+import requests
+from requests.adapters import HTTPAdapter
+
+POWERBI_SCOPE = ["https://analysis.windows.net/powerbi/api/.default"]
+
+
+class PBITokenProvider:
+    """MSAL client-credentials token cache with proactive refresh before expiry"""
+
+    def __init__(self, tenant_id: str, client_id: str, client_secret: str, refresh_margin_seconds: int = None):
+        """
+        Initialize the token provider
+
+        Args:
+            tenant_id: Azure AD tenant
+            client_id: Service principal client id
+            client_secret: Service principal secret
+            refresh_margin_seconds: Refresh the token when it expires within this many seconds (default: PBI_TOKEN_REFRESH_MARGIN or 300)
+        """
+        self.refresh_margin_seconds = refresh_margin_seconds or int(os.getenv("PBI_TOKEN_REFRESH_MARGIN", "300"))
+        self._app = msal.ConfidentialClientApplication(
+            client_id=client_id,
+            client_credential=client_secret,
+            authority=f"https://login.microsoftonline.com/{tenant_id}"
+        )
+        self._lock = threading.Lock()
+        self._access_token: Optional[str] = None
+        self._expires_at = 0.0
+        self.refresh_count = 0
+
+    def _needs_refresh(self) -> bool:
+        return self._access_token is None or time.time() >= self._expires_at - self.refresh_margin_seconds
+
+    def get_token(self) -> str:
+        """Return a valid access token, refreshing it if it is about to expire"""
+        if not self._needs_refresh():
+            return self._access_token
+
+        with self._lock:
+            # Another thread may have refreshed while we waited for the lock
+            if not self._needs_refresh():
+                return self._access_token
+
+            result = self._app.acquire_token_for_client(scopes=POWERBI_SCOPE)
+            if "access_token" not in result:
+                raise Exception("Error getting token: " + str(result))
+
+            self._access_token = result["access_token"]
+            self._expires_at = time.time() + int(result.get("expires_in", 3600))
+            self.refresh_count += 1
+            return self._access_token
+
+    def seconds_until_expiry(self) -> float:
+        """Seconds left before the current token expires (0 if there is none)"""
+        if self._access_token is None:
+            return 0.0
+        return max(0.0, self._expires_at - time.time())
+
+
+class PBIConnectionPool:
+    """Reusable keep-alive HTTP sessions (sync and async) for the Power BI REST API"""
+
+    def __init__(self, pool_size: int = None, keepalive_timeout: int = None):
+        """
+        Initialize the connection pool
+
+        Args:
+            pool_size: Maximum number of pooled connections (default: PBI_POOL_SIZE or 10)
+            keepalive_timeout: Seconds an idle connection is kept open (default: PBI_KEEPALIVE_TIMEOUT or 60)
+        """
+        self.pool_size = pool_size or int(os.getenv("PBI_POOL_SIZE", "10"))
+        self.keepalive_timeout = keepalive_timeout or int(os.getenv("PBI_KEEPALIVE_TIMEOUT", "60"))
+
+        self._sync_session: Optional[requests.Session] = None
+        self._sync_lock = threading.Lock()
+
+        # aiohttp sessions are bound to an event loop: one session per loop
+        self._async_sessions: Dict[asyncio.AbstractEventLoop, aiohttp.ClientSession] = {}
+
+        self.stats = {
+            'async_requests': 0,
+            'async_connections_created': 0,
+            'async_connections_reused': 0,
+            'sync_requests': 0
+        }
+
+    def get_sync_session(self) -> requests.Session:
+        """Get the shared requests session (thread-safe, keep-alive enabled)"""
+        if self._sync_session is None:
+            with self._sync_lock:
+                if self._sync_session is None:
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+                    session.mount("https://", adapter)
+                    self._sync_session = session
+        return self._sync_session
+
+    def _build_trace_config(self) -> aiohttp.TraceConfig:
+        """Trace hooks counting new vs reused connections"""
+        trace_config = aiohttp.TraceConfig()
+
+        async def on_request_start(session, ctx, params):
+            self.stats['async_requests'] += 1
+
+        async def on_connection_create_end(session, ctx, params):
+            self.stats['async_connections_created'] += 1
+
+        async def on_connection_reuseconn(session, ctx, params):
+            self.stats['async_connections_reused'] += 1
+
+        trace_config.on_request_start.append(on_request_start)
+        trace_config.on_connection_create_end.append(on_connection_create_end)
+        trace_config.on_connection_reuseconn.append(on_connection_reuseconn)
+        return trace_config
+
+    async def get_async_session(self) -> aiohttp.ClientSession:
+        """Get the shared aiohttp session for the running event loop"""
+        loop = asyncio.get_running_loop()
+        # Sessions of loops that have ended are closed here, their connectors would leak otherwise
+        for stale_loop in [other for other in self._async_sessions if other.is_closed()]:
+            await self._close_async_session(self._async_sessions.pop(stale_loop))
+
+        session = self._async_sessions.get(loop)
+        if session is None or session.closed:
+            connector = aiohttp.TCPConnector(limit=self.pool_size, keepalive_timeout=self.keepalive_timeout)
+            session = aiohttp.ClientSession(connector=connector, trace_configs=[self._build_trace_config()])
+            self._async_sessions[loop] = session
+        return session
+
+    @staticmethod
+    async def _close_async_session(session: aiohttp.ClientSession):
+        """Close a session, dropping its connector if its transports belong to a closed loop"""
+        if session.closed:
+            return
+        try:
+            await session.close()
+        except Exception:
+            session.detach()
+
+    async def close(self):
+        """Close the pooled sessions"""
+        current_loop = asyncio.get_running_loop()
+        for loop, session in list(self._async_sessions.items()):
+            if loop is not current_loop and loop.is_running():
+                # Session of a loop still running in another thread: close it on that loop
+                await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(self._close_async_session(session), loop))
+            else:
+                await self._close_async_session(session)
+        self._async_sessions = {}
+        if self._sync_session is not None:
+            self._sync_session.close()
+            self._sync_session = None
+
+    def get_connection_stats(self) -> Dict[str, float]:
+        """
+        Keep-alive statistics for the pooled connections.
+
+        Neither aiohttp nor requests pipeline HTTP/1.1 requests, so reuse is
+        reported as requests served per opened connection.
+        """
+        stats = dict(self.stats)
+
+        sync_connections = 0
+        sync_pool_requests = 0
+        if self._sync_session is not None:
+            adapter = self._sync_session.get_adapter("https://")
+            for pool in adapter.poolmanager.pools.values():
+                sync_connections += getattr(pool, 'num_connections', 0)
+                sync_pool_requests += getattr(pool, 'num_requests', 0)
+        stats['sync_connections_created'] = sync_connections
+
+        opened = stats['async_connections_created'] + sync_connections
+        served = stats['async_requests'] + sync_pool_requests
+        stats['requests_per_connection'] = served / opened if opened else 0.0
+        return stats
+
+    def print_connection_stats(self):
+        """Print the keep-alive statistics"""
+        stats = self.get_connection_stats()
+        print(f"🔌 Power BI connections: {stats['async_requests'] + stats['sync_requests']} requests, "
+              f"{stats['async_connections_created'] + stats['sync_connections_created']} connections opened, "
+              f"{stats['async_connections_reused']} async reuses, "
+              f"{stats['requests_per_connection']:.1f} requests/connection")
+
+
+_token_providers: Dict[Tuple[str, str], PBITokenProvider] = {}
+_token_providers_lock = threading.Lock()
+_connection_pool: Optional[PBIConnectionPool] = None
+
+
+def get_token_provider(tenant_id: str, client_id: str, client_secret: str) -> PBITokenProvider:
+    """Get the process-wide token provider for a service principal"""
+    key = (tenant_id, client_id)
+    with _token_providers_lock:
+        if key not in _token_providers:
+            _token_providers[key] = PBITokenProvider(tenant_id, client_id, client_secret)
+        return _token_providers[key]
+
+
+def get_connection_pool() -> PBIConnectionPool:
+    """Get the process-wide Power BI connection pool"""
+    global _connection_pool
+    if _connection_pool is None:
+        _connection_pool = PBIConnectionPool()
+    return _connection_pool
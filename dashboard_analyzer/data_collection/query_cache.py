@@ -0,0 +1,186 @@
+"""
+DAX Query Result Cache
+
+Content-addressed on-disk cache for Power BI query results. Entries are keyed
+by a hash of the final rendered DAX text and stored as Parquet files with a
+small JSON sidecar holding the TTL chosen when the entry was written:
+
+- queries whose date range ended long enough ago (historic data) never expire
+- queries with recent date literals expire after PBI_CACHE_RECENT_TTL seconds
+- "TODAY()"-relative queries expire after PBI_CACHE_TODAY_TTL seconds
+"""
+
+import hashlib
+import json
+import os
+import re
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Optional
+
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401 - required by DataFrame.to_parquet
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+# Templates whose results change on their own schedule regardless of the dates they contain
+TEMPLATE_TTLS = {
+    "Rutas Diccionario.txt": 24 * 3600,
+}
+
+DATE_LITERAL_PATTERN = re.compile(r'DATE\s*\(\s*(\d{4})\s*,\s*(\d{1,2})\s*,\s*(\d{1,2})\s*\)', re.IGNORECASE)
+
+
+class QueryCache:
+    """Parquet-backed cache for DAX query results with per-query TTLs"""
+
+    def __init__(self, cache_dir: str = None, enabled: bool = None):
+        """
+        Initialize the query cache
+
+        Args:
+            cache_dir: Directory for cached results (default: PBI_CACHE_DIR or <repo>/.cache/pbi_queries)
+            enabled: Whether the cache is used (default: PBI_CACHE_ENABLED, true unless set to false)
+        """
+        default_dir = Path(__file__).parent.parent.parent / '.cache' / 'pbi_queries'
+        self.cache_dir = Path(cache_dir or os.getenv("PBI_CACHE_DIR", str(default_dir)))
+
+        if enabled is None:
+            enabled = os.getenv("PBI_CACHE_ENABLED", "true").lower() not in ("false", "0", "no")
+        if enabled and not PARQUET_AVAILABLE:
+            print("⚠️ pyarrow not installed - DAX query cache disabled")
+            enabled = False
+        self.enabled = enabled
+
+        self.today_ttl = int(os.getenv("PBI_CACHE_TODAY_TTL", "900"))
+        self.recent_ttl = int(os.getenv("PBI_CACHE_RECENT_TTL", "21600"))
+        self.settle_days = int(os.getenv("PBI_CACHE_SETTLE_DAYS", "7"))
+
+        self.stats = {'hits': 0, 'misses': 0, 'writes': 0, 'expired': 0}
+
+    def make_key(self, query: str, dataset_id: str = None) -> str:
+        """Hash of the rendered query text (and the dataset it runs against)"""
+        digest = hashlib.sha256()
+        digest.update((dataset_id or "").encode('utf-8'))
+        digest.update(b"\0")
+        digest.update(query.encode('utf-8'))
+        return digest.hexdigest()
+
+    def ttl_for(self, query: str, template: str = None) -> Optional[int]:
+        """
+        Decide how long a result stays valid
+
+        Returns:
+            TTL in seconds, or None if the result never expires
+        """
+        if template in TEMPLATE_TTLS:
+            return TEMPLATE_TTLS[template]
+
+        if 'TODAY()' in query.upper():
+            return self.today_ttl
+
+        dates = []
+        for year, month, day in DATE_LITERAL_PATTERN.findall(query):
+            try:
+                dates.append(datetime(int(year), int(month), int(day)))
+            except ValueError:
+                continue
+
+        if not dates:
+            return self.recent_ttl
+
+        settled_before = datetime.now() - timedelta(days=self.settle_days)
+        if max(dates) <= settled_before:
+            return None  # Historic range - the data will not change
+        return self.recent_ttl
+
+    def _paths(self, key: str):
+        shard = self.cache_dir / key[:2]
+        return shard / f"{key}.parquet", shard / f"{key}.json"
+
+    def get(self, query: str, dataset_id: str = None) -> Optional[pd.DataFrame]:
+        """Return the cached result for a query, or None on miss/expiry"""
+        if not self.enabled:
+            return None
+
+        data_path, meta_path = self._paths(self.make_key(query, dataset_id))
+        if not data_path.exists() or not meta_path.exists():
+            self.stats['misses'] += 1
+            return None
+
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+
+            ttl = meta.get('ttl')
+            if ttl is not None and time.time() - meta.get('created_at', 0) > ttl:
+                self.stats['expired'] += 1
+                self.stats['misses'] += 1
+                return None
+
+            df = pd.read_parquet(data_path)
+            df.columns = meta.get('columns', list(df.columns))
+            self.stats['hits'] += 1
+            return df
+
+        except Exception as e:
+            print(f"⚠️ Could not read cached query result: {e}")
+            self.stats['misses'] += 1
+            return None
+
+    def put(self, query: str, df: pd.DataFrame, dataset_id: str = None, template: str = None):
+        """Store a query result (empty results are never cached)"""
+        if not self.enabled or df is None or df.empty:
+            return
+
+        data_path, meta_path = self._paths(self.make_key(query, dataset_id))
+        try:
+            data_path.parent.mkdir(parents=True, exist_ok=True)
+
+            # Parquet needs string column names; the originals are restored on read
+            to_store = df.copy()
+            to_store.columns = [str(col) for col in df.columns]
+            tmp_path = data_path.with_suffix('.parquet.tmp')
+            to_store.to_parquet(tmp_path, index=False)
+            os.replace(tmp_path, data_path)
+
+            meta = {
+                'created_at': time.time(),
+                'ttl': self.ttl_for(query, template),
+                'template': template,
+                'rows': len(df),
+                'columns': list(df.columns)
+            }
+            with open(meta_path, 'w', encoding='utf-8') as f:
+                json.dump(meta, f)
+            self.stats['writes'] += 1
+
+        except Exception as e:
+            # Mixed-type object columns can fail to serialize - just skip caching them
+            print(f"⚠️ Could not cache query result: {e}")
+
+    def clear(self):
+        """Remove every cached entry"""
+        if not self.cache_dir.exists():
+            return
+        for path in self.cache_dir.glob('*/*'):
+            path.unlink()
+
+    def get_stats(self) -> Dict[str, int]:
+        """Hit/miss counters for this process"""
+        return dict(self.stats)
+
+
+_shared_cache: Optional[QueryCache] = None
+
+
+def get_query_cache() -> QueryCache:
+    """Get the process-wide query cache"""
+    global _shared_cache
+    if _shared_cache is None:
+        _shared_cache = QueryCache()
+    return _shared_cache
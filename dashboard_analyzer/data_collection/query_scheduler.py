@@ -0,0 +1,181 @@
+"""
+Query Scheduler
+
+Shared scheduler for Power BI executeQueries calls. Bounds the number of
+queries in flight, enforces a per-dataset rate limit and records the latency
+of every query so fan-out downloads can be reported on.
+"""
+
+import asyncio
+import contextvars
+import os
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+# Latency lists of the stats scopes active in the current context (inherited by its tasks)
+_stats_scopes: contextvars.ContextVar[Tuple[List[Dict], ...]] = contextvars.ContextVar("query_stats_scopes", default=())
+
+
+class QueryScheduler:
+    """Bounded-concurrency, rate-limited scheduler for DAX queries"""
+
+    def __init__(self, max_in_flight: int = None, queries_per_minute: int = None):
+        """
+        Initialize the scheduler
+
+        Args:
+            max_in_flight: Maximum number of queries running at the same time (default: PBI_MAX_IN_FLIGHT or 6)
+            queries_per_minute: Maximum queries started per dataset per minute (default: PBI_QUERIES_PER_MINUTE or 120)
+        """
+        self.max_in_flight = max_in_flight or int(os.getenv("PBI_MAX_IN_FLIGHT", "6"))
+        self.queries_per_minute = queries_per_minute or int(os.getenv("PBI_QUERIES_PER_MINUTE", "120"))
+
+        # asyncio primitives are bound to the loop they are first used on,
+        # so they are (re)created lazily for the running loop
+        self._loop = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._semaphore_users = 0
+        self._resize_pending = False
+        self._dataset_locks: Dict[str, asyncio.Lock] = {}
+        self._dataset_windows: Dict[str, deque] = {}
+
+        self.in_flight = 0
+        self.latencies: List[Dict] = []
+
+    def _bind_loop(self):
+        """Create the asyncio primitives for the currently running loop"""
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.max_in_flight)
+            self._dataset_locks = {}
+            self._resize_pending = False
+        elif self._resize_pending and self._semaphore_users == 0:
+            # New limit from set_max_in_flight, applied once no query holds or waits on the old one
+            self._semaphore = asyncio.Semaphore(self.max_in_flight)
+            self._resize_pending = False
+
+    async def _wait_for_rate_limit(self, dataset_id: str):
+        """Block until another query may be started against dataset_id"""
+        lock = self._dataset_locks.setdefault(dataset_id, asyncio.Lock())
+        window = self._dataset_windows.setdefault(dataset_id, deque())
+
+        async with lock:
+            while True:
+                now = time.monotonic()
+                while window and now - window[0] >= 60:
+                    window.popleft()
+                if len(window) < self.queries_per_minute:
+                    window.append(now)
+                    return
+                await asyncio.sleep(60 - (now - window[0]))
+
+    async def run(self, dataset_id: str, label: str, query_coro_factory):
+        """
+        Run a query through the scheduler
+
+        Args:
+            dataset_id: Dataset the query targets (rate limits are per dataset)
+            label: Human readable label used in the latency report
+            query_coro_factory: Zero-argument callable returning the coroutine that executes the query
+
+        Returns:
+            Whatever the query coroutine returns
+        """
+        self._bind_loop()
+        semaphore = self._semaphore
+
+        self._semaphore_users += 1
+        try:
+            async with semaphore:
+                await self._wait_for_rate_limit(dataset_id or "default")
+
+                self.in_flight += 1
+                start = time.perf_counter()
+                ok = False
+                rows = 0
+                try:
+                    result = await query_coro_factory()
+                    ok = result is not None and not getattr(result, 'empty', False)
+                    rows = len(result) if result is not None and hasattr(result, '__len__') else 0
+                    return result
+                finally:
+                    self.in_flight -= 1
+                    entry = {
+                        'label': label,
+                        'dataset_id': dataset_id,
+                        'seconds': time.perf_counter() - start,
+                        'rows': rows,
+                        'ok': ok
+                    }
+                    self.latencies.append(entry)
+                    for scope in _stats_scopes.get():
+                        scope.append(entry)
+        finally:
+            self._semaphore_users -= 1
+
+    def set_max_in_flight(self, max_in_flight: int):
+        """Change the concurrency limit (applied once no query holds or waits on the current limit)"""
+        if max_in_flight and max_in_flight != self.max_in_flight:
+            self.max_in_flight = max_in_flight
+            self._resize_pending = True
+
+    def reset_stats(self):
+        """Clear recorded latencies"""
+        self.latencies = []
+
+    @contextmanager
+    def stats_scope(self):
+        """
+        Record the latencies of the queries started in this context separately
+
+        Tasks created inside the block inherit the scope, so concurrent downloads
+        sharing the scheduler each get their own report. Yields the scope's latency list.
+        """
+        scope: List[Dict] = []
+        token = _stats_scopes.set(_stats_scopes.get() + (scope,))
+        try:
+            yield scope
+        finally:
+            _stats_scopes.reset(token)
+
+    def get_latency_summary(self, latencies: List[Dict] = None) -> Dict[str, float]:
+        """Aggregate latency statistics for the recorded queries (or for the given latency list)"""
+        latencies = self.latencies if latencies is None else latencies
+        if not latencies:
+            return {'queries': 0, 'failed': 0, 'total_seconds': 0.0, 'mean_seconds': 0.0, 'p50_seconds': 0.0, 'max_seconds': 0.0}
+
+        seconds = sorted(entry['seconds'] for entry in latencies)
+        return {
+            'queries': len(seconds),
+            'failed': sum(1 for entry in latencies if not entry['ok']),
+            'total_seconds': sum(seconds),
+            'mean_seconds': sum(seconds) / len(seconds),
+            'p50_seconds': seconds[len(seconds) // 2],
+            'max_seconds': seconds[-1]
+        }
+
+    def print_latency_report(self, wall_seconds: float = None, latencies: List[Dict] = None):
+        """Print per-query latencies and the aggregate summary (of all recorded queries or of a stats scope)"""
+        latencies = self.latencies if latencies is None else latencies
+        summary = self.get_latency_summary(latencies)
+        print(f"\n⏱️ Query latency report ({summary['queries']} queries, max {self.max_in_flight} in flight):")
+        for entry in sorted(latencies, key=lambda e: e['seconds'], reverse=True):
+            status = "✓" if entry['ok'] else "✗"
+            print(f"   {status} {entry['label']}: {entry['seconds']:.2f}s ({entry['rows']} rows)")
+        print(f"   Sum of query times: {summary['total_seconds']:.2f}s | p50: {summary['p50_seconds']:.2f}s | slowest: {summary['max_seconds']:.2f}s")
+        if wall_seconds is not None:
+            print(f"   Wall-clock time: {wall_seconds:.2f}s")
+
+
+_shared_scheduler: Optional[QueryScheduler] = None
+
+
+def get_query_scheduler() -> QueryScheduler:
+    """Get the process-wide query scheduler shared by all collectors"""
+    global _shared_scheduler
+    if _shared_scheduler is None:
+        _shared_scheduler = QueryScheduler()
+    return _shared_scheduler
@@ -0,0 +1,141 @@
+"""
+Routes Dictionary
+Route_Master dictionary loaded once per run, with per-haul airport code sets and
+token-set matchers used to narrow NCS incidents to a haul
+"""
+
+import asyncio
+import os
+import re
+import threading
+import time
+from typing import Dict, FrozenSet, Iterable, Optional
+
+import pandas as pd
+
+# Maximal runs of word characters: a code matches a token exactly when the old
+# \bCODE\b alternation would have matched it
+TOKEN_PATTERN = re.compile(r'\w+')
+
+
+class AirportCodeMatcher:
+    """Case-insensitive whole-word lookup of airport codes in free text (O(tokens) per text)"""
+
+    def __init__(self, codes: Iterable[str]):
+        codes = {code.strip().upper() for code in codes if code and code.strip()}
+        self.codes: FrozenSet[str] = frozenset(code for code in codes if TOKEN_PATTERN.fullmatch(code))
+
+        # Codes that are not a single token (unusual) keep the regex word-boundary match
+        irregular = sorted(codes - self.codes)
+        self._irregular_pattern = (
+            re.compile('|'.join(f'\\b{re.escape(code)}\\b' for code in irregular), re.IGNORECASE)
+            if irregular else None
+        )
+
+    def matches(self, text) -> bool:
+        """Whether the text mentions any of the codes as a whole word"""
+        if not isinstance(text, str):
+            return False
+        if not self.codes.isdisjoint(TOKEN_PATTERN.findall(text.upper())):
+            return True
+        return bool(self._irregular_pattern and self._irregular_pattern.search(text))
+
+    def mask(self, texts: pd.Series) -> pd.Series:
+        """Boolean mask of the texts mentioning any code (non-text values never match)"""
+        return texts.map(self.matches).astype(bool)
+
+
+class RoutesDictionary:
+    """Route_Master rows with airport code sets and matchers cached per haul"""
+
+    def __init__(self, routes: pd.DataFrame):
+        self.routes = routes
+        self.loaded_at = time.time()
+        self._airports: Dict[str, FrozenSet[str]] = {}
+        self._matchers: Dict[str, AirportCodeMatcher] = {}
+
+        if not routes.empty and {'route', 'haul_aggr'}.issubset(routes.columns):
+            for haul, haul_routes in routes.groupby('haul_aggr'):
+                codes = set()
+                for route in haul_routes['route'].dropna().astype(str):
+                    # MAD-BCN -> MAD, BCN
+                    if '-' in route:
+                        origin, dest = route.split('-', 1)
+                        codes.add(origin.strip().upper())
+                        codes.add(dest.strip().upper())
+                codes.discard('')
+                self._airports[haul] = frozenset(codes)
+
+    @property
+    def empty(self) -> bool:
+        return self.routes.empty
+
+    def route_count(self, haul: str) -> int:
+        if self.routes.empty or 'haul_aggr' not in self.routes.columns:
+            return 0
+        return int((self.routes['haul_aggr'] == haul).sum())
+
+    def airports_for_haul(self, haul: str) -> FrozenSet[str]:
+        """Airport codes appearing in the routes of a haul"""
+        return self._airports.get(haul, frozenset())
+
+    def matcher(self, haul: str) -> AirportCodeMatcher:
+        """Compiled matcher for the airports of a haul (built once)"""
+        matcher = self._matchers.get(haul)
+        if matcher is None:
+            matcher = AirportCodeMatcher(self.airports_for_haul(haul))
+            self._matchers[haul] = matcher
+        return matcher
+
+
+_routes_dictionary: Optional[RoutesDictionary] = None
+_routes_dictionary_loop = None
+_routes_dictionary_task: Optional[asyncio.Task] = None
+_routes_dictionary_lock = threading.Lock()
+
+
+async def _load_routes_dictionary(pbi_collector) -> RoutesDictionary:
+    global _routes_dictionary
+    dictionary = RoutesDictionary(await pbi_collector.collect_routes_dictionary())
+    if not dictionary.empty:
+        with _routes_dictionary_lock:
+            _routes_dictionary = dictionary
+    return dictionary
+
+
+async def get_routes_dictionary(pbi_collector) -> RoutesDictionary:
+    """
+    Get the routes dictionary, querying Power BI at most once per ROUTES_DICTIONARY_TTL
+    (default one day; the query result itself is also kept by the query cache for a day)
+
+    Concurrent callers share a single load. An empty result is not kept, so the next
+    call retries the query.
+    """
+    global _routes_dictionary_loop, _routes_dictionary_task
+    ttl = int(os.getenv("ROUTES_DICTIONARY_TTL", str(24 * 3600)))
+
+    with _routes_dictionary_lock:
+        dictionary = _routes_dictionary
+        if dictionary is not None and time.time() - dictionary.loaded_at < ttl:
+            return dictionary
+
+        # asyncio tasks are bound to the loop that created them
+        loop = asyncio.get_running_loop()
+        if _routes_dictionary_task is None or _routes_dictionary_loop is not loop:
+            _routes_dictionary_loop = loop
+            _routes_dictionary_task = loop.create_task(_load_routes_dictionary(pbi_collector))
+        task = _routes_dictionary_task
+
+    try:
+        return await asyncio.shield(task)
+    finally:
+        with _routes_dictionary_lock:
+            if _routes_dictionary_task is task and task.done():
+                _routes_dictionary_task = None
+
+
+def clear_routes_dictionary():
+    """Drop the memoized dictionary (next call reloads it)"""
+    global _routes_dictionary
+    with _routes_dictionary_lock:
+        _routes_dictionary = None
@@ -13,14 +13,21 @@ from typing import List, Dict, Any, Optional
 import sys
 import os
 import json
-from contextlib import redirect_stdout, redirect_stderr
+import contextvars
+import io
+import time
+from contextlib import contextmanager
 import pandas as pd
 
 from dashboard_analyzer.data_collection.pbi_collector import PBIDataCollector
+from dashboard_analyzer.data_collection.query_scheduler import get_query_scheduler
+from dashboard_analyzer.data_collection.pbi_connection import get_connection_pool
 from dashboard_analyzer.anomaly_detection.flexible_detector import FlexibleAnomalyDetector
 from dashboard_analyzer.anomaly_detection.flexible_anomaly_interpreter import FlexibleAnomalyInterpreter
+from dashboard_analyzer.anomaly_detection.period_pipeline import StagedPipeline, PipelineStage, get_stage_workers
 from dashboard_analyzer.anomaly_explanation.genai_core.agents.anomaly_summary_agent import AnomalySummaryAgent
 from dashboard_analyzer.anomaly_explanation.genai_core.utils.enums import get_default_llm_type
+from dashboard_analyzer.anomaly_explanation.genai_core.utils.streaming import streaming_enabled, console_stream_handler
 
 # Global debug flag
 DEBUG_MODE = True
@@ -30,6 +37,77 @@ def debug_print(message):
     if DEBUG_MODE:
         print(f"🔍 DEBUG: {message}")
 
+class _NullStream:
+    """Write sink discarding everything (never closed, so late writers cannot fail)"""
+    def write(self, text):
+        return len(text)
+    def flush(self):
+        pass
+
+class _TaskLocalStream:
+    """sys.stdout / sys.stderr proxy writing to the stream selected by the current task"""
+    def __init__(self, default, target: contextvars.ContextVar):
+        self._default = default
+        self._target = target
+    def _stream(self):
+        return self._target.get() or self._default
+    def write(self, text):
+        return self._stream().write(text)
+    def flush(self):
+        self._stream().flush()
+    def __getattr__(self, name):
+        return getattr(self._stream(), name)
+
+# Streams of the current task (and the tasks it creates); None writes to the real stream
+_stdout_target: contextvars.ContextVar = contextvars.ContextVar('stdout_target', default=None)
+_stderr_target: contextvars.ContextVar = contextvars.ContextVar('stderr_target', default=None)
+
+@contextmanager
+def _task_output(stdout, stderr):
+    """Send stdout/stderr of the current task to the given streams"""
+    if not isinstance(sys.stdout, _TaskLocalStream):
+        sys.stdout = _TaskLocalStream(sys.stdout, _stdout_target)
+    if not isinstance(sys.stderr, _TaskLocalStream):
+        sys.stderr = _TaskLocalStream(sys.stderr, _stderr_target)
+    stdout_token = _stdout_target.set(stdout)
+    stderr_token = _stderr_target.set(stderr)
+    try:
+        yield
+    finally:
+        _stderr_target.reset(stderr_token)
+        _stdout_target.reset(stdout_token)
+
+@contextmanager
+def silenced_output():
+    """
+    Discard stdout/stderr of the current task only
+    
+    Unlike redirect_stdout, which swaps the process-wide stream, concurrent flows
+    (weekly and daily analysis) keep printing while another one is silenced.
+    """
+    with _task_output(_NullStream(), _NullStream()):
+        yield
+
+@contextmanager
+def buffered_output():
+    """
+    Collect stdout/stderr of the current task in memory
+    
+    Yields the (stdout, stderr) buffers so concurrent flows can print their
+    output as one block each instead of interleaving line by line.
+    """
+    stdout_buffer, stderr_buffer = io.StringIO(), io.StringIO()
+    with _task_output(stdout_buffer, stderr_buffer):
+        yield stdout_buffer, stderr_buffer
+
+def print_progress(message: str):
+    """Print a short status line to the real stdout, even from inside buffered_output()"""
+    if isinstance(_stdout_target.get(), _NullStream):
+        return
+    stream = sys.stdout._default if isinstance(sys.stdout, _TaskLocalStream) else sys.stdout
+    stream.write(message + "\n")
+    stream.flush()
+
 def debug_save_hierarchical_data(hierarchical_explanation: str, period: int, date_param: Optional[str] = None, 
                                 causal_explanations: Optional[dict] = None, relationships: Optional[dict] = None):
     """Save hierarchical explanation data for interpreter debugging"""
@@ -237,18 +315,15 @@ async def collect_flexible_data(aggregation_days: int, target_folder: str, segme
     total_attempted = 0
     total_success = 0
     
-    for node_path in node_paths:
-        try:
-            debug_print(f"Collecting data for node: {node_path}")
-            results = await collector.collect_flexible_data_for_node(
-                node_path, aggregation_days, target_folder, analysis_date
-            )
-            total_attempted += len(results)
-            total_success += sum(results.values())
-            debug_print(f"Node {node_path}: {sum(results.values())}/{len(results)} files successful")
-        except Exception as e:
-            print(f"❌ Error collecting data for {node_path}: {e}")
-            debug_print(f"Error details for {node_path}: {type(e).__name__}: {str(e)}")
+    # Fan out every node's queries through the shared query scheduler
+    debug_print(f"Collecting data for {len(node_paths)} nodes concurrently: {node_paths}")
+    all_results = await collector.collect_flexible_data_for_nodes(
+        node_paths, aggregation_days, target_folder, analysis_date
+    )
+    for node_path, results in all_results.items():
+        total_attempted += len(results)
+        total_success += sum(results.values())
+        debug_print(f"Node {node_path}: {sum(results.values())}/{len(results)} files successful")
     
     print(f"\n📊 Flexible Data Collection Summary:")
     print(f"   Total files attempted: {total_attempted}")
@@ -1424,17 +1499,16 @@ async def run_flexible_data_download_silent_with_date(aggregation_days: int, per
     total_attempted = 0
     
     # Suppress all output during data collection
-    with open(os.devnull, 'w') as devnull:
-        with redirect_stdout(devnull), redirect_stderr(devnull):
-            for node_path in node_paths:
-                try:
-                    results = await collector.collect_flexible_data_for_node(
-                        node_path, aggregation_days, target_folder, start_date
-                    )
-                    total_attempted += len(results)
-                    total_success += sum(results.values())
-                except Exception:
-                    pass
+    with silenced_output():
+        try:
+            all_results = await collector.collect_flexible_data_for_nodes(
+                node_paths, aggregation_days, target_folder, start_date
+            )
+            for results in all_results.values():
+                total_attempted += len(results)
+                total_success += sum(results.values())
+        except Exception:
+            pass
     
     if total_success > 0:
         return target_folder
@@ -1563,7 +1637,8 @@ async def run_comprehensive_analysis(
     daily_anomaly_detection_mode: str = 'mean',
     daily_baseline_periods: int = 7,
     daily_aggregation_days: int = 1,
-    daily_periods: int = 7
+    daily_periods: int = 7,
+    concurrent_flows: Optional[bool] = None
 ):
     """
     Refactored comprehensive analysis to be a clean orchestrator.
@@ -1571,7 +1646,14 @@ async def run_comprehensive_analysis(
     1. A weekly comparative analysis.
     2. A daily single analysis for each of the last 7 days.
     Finally, it consolidates the results.
+    
+    The two flows share nothing until the summary, so by default they run
+    concurrently (COMPREHENSIVE_CONCURRENT_FLOWS); Power BI queries, data pulls
+    and LLM requests of both go through the same process-wide schedulers and budgets.
     """
+    if concurrent_flows is None:
+        concurrent_flows = os.getenv("COMPREHENSIVE_CONCURRENT_FLOWS", "true").lower() not in ("false", "0", "no")
+
     print("🚀 ENHANCED COMPREHENSIVE NPS ANALYSIS (Refactored)")
     print("=" * 80)
     print(f"📅 Analysis Date: {analysis_date.strftime('%Y-%m-%d')} ({date_parameter})")
@@ -1579,12 +1661,8 @@ async def run_comprehensive_analysis(
 
     generated_reports = []
 
-    # --- 1. Weekly Comparative Analysis ---
-    print("\n" + "=" * 40)
-    print("📊 STEP 1: Running Weekly Comparative Analysis")
-    print("=" * 40)
-    try:
-        weekly_report_path = await execute_analysis_flow(
+    flow_configs = {
+        'weekly': dict(
             analysis_date=analysis_date,
             date_parameter=date_parameter,
             segment=segment,
@@ -1598,34 +1676,8 @@ async def run_comprehensive_analysis(
             comparison_end_date=comparison_end_date,
             date_flight_local=date_flight_local,
             study_mode="comparative",
-        )
-        if weekly_report_path and "Error" not in str(weekly_report_path):
-            # Store the actual data, not just the path
-            generated_reports.append({
-                'type': 'weekly',
-                'data': weekly_report_path
-            })
-            print(f"✅ Weekly analysis completed. Data length: {len(str(weekly_report_path))} chars")
-        else:
-            print(f"⚠️ Weekly analysis completed but no anomalies found or insufficient data.")
-            # Even if no anomalies found, we should still include the weekly analysis
-            if weekly_report_path and "Error" not in str(weekly_report_path):
-                generated_reports.append({
-                    'type': 'weekly',
-                    'data': weekly_report_path
-                })
-
-    except Exception as e:
-        print(f"❌ CRITICAL ERROR during weekly analysis: {e}")
-        import traceback
-        traceback.print_exc()
-
-    # --- 2. Daily Analysis ---
-    print("\n" + "=" * 40)
-    print("📊 STEP 2: Running Daily Analysis")
-    print("=" * 40)
-    try:
-        daily_report_path = await execute_analysis_flow(
+        ),
+        'daily': dict(
             analysis_date=analysis_date,
             date_parameter=date_parameter,
             segment=segment,
@@ -1639,20 +1691,83 @@ async def run_comprehensive_analysis(
             comparison_end_date=None,
             date_flight_local=date_flight_local,
             study_mode="single",
-        )
-        if daily_report_path and "Error" not in str(daily_report_path):
-            # Store the actual data, not just the path
-            generated_reports.append({
-                'type': 'daily',
-                'data': daily_report_path
-            })
-            print(f"✅ Daily analysis completed. Data length: {len(str(daily_report_path))} chars")
-        else:
-            print(f"❌ Daily analysis failed. Reason: {daily_report_path}")
-    except Exception as e:
-        print(f"❌ CRITICAL ERROR during daily analysis: {e}")
-        import traceback
-        traceback.print_exc()
+        ),
+    }
+
+    async def run_flow(flow_type: str):
+        """One flow; a failure is reported and leaves the other flow running"""
+        try:
+            start = time.perf_counter()
+            result = await execute_analysis_flow(**flow_configs[flow_type])
+            print(f"⏱️ {flow_type.capitalize()} analysis flow finished in {time.perf_counter() - start:.1f}s")
+            return result
+        except Exception as e:
+            print(f"❌ CRITICAL ERROR during {flow_type} analysis: {e}")
+            import traceback
+            traceback.print_exc()
+            return None
+
+    async def run_buffered_flow(flow_type: str):
+        """
+        One concurrent flow whose output is printed as a single block when it ends
+        
+        Only start/finish and period progress lines are shown live. The buffered output
+        is printed even when the flow is interrupted (Ctrl+C, cancellation).
+        """
+        print_progress(f"⏳ {flow_type.capitalize()} analysis flow started (output shown when it finishes)")
+        buffers = None
+        status = "interrupted"
+        try:
+            with buffered_output() as buffers:
+                result = await run_flow(flow_type)
+            status = "finished"
+            return result
+        finally:
+            print_progress(f"⏹️ {flow_type.capitalize()} analysis flow {status}")
+            if buffers is not None:
+                stdout_buffer, stderr_buffer = buffers
+                print("\n" + "=" * 40)
+                print(f"📊 {flow_type.upper()} ANALYSIS OUTPUT" + ("" if status == "finished" else f" ({status})"))
+                print("=" * 40)
+                sys.stdout.write(stdout_buffer.getvalue())
+                sys.stdout.flush()
+                sys.stderr.write(stderr_buffer.getvalue())
+                sys.stderr.flush()
+
+    # --- 1 & 2. Weekly Comparative and Daily Analyses ---
+    print("\n" + "=" * 40)
+    if concurrent_flows:
+        print("📊 STEPS 1-2: Running Weekly Comparative and Daily Analyses concurrently")
+        print("=" * 40)
+        weekly_report_path, daily_report_path = await asyncio.gather(run_buffered_flow('weekly'), run_buffered_flow('daily'))
+    else:
+        print("📊 STEP 1: Running Weekly Comparative Analysis")
+        print("=" * 40)
+        weekly_report_path = await run_flow('weekly')
+        print("\n" + "=" * 40)
+        print("📊 STEP 2: Running Daily Analysis")
+        print("=" * 40)
+        daily_report_path = await run_flow('daily')
+
+    if weekly_report_path and "Error" not in str(weekly_report_path):
+        # Store the actual data, not just the path
+        generated_reports.append({
+            'type': 'weekly',
+            'data': weekly_report_path
+        })
+        print(f"✅ Weekly analysis completed. Data length: {len(str(weekly_report_path))} chars")
+    else:
+        print(f"⚠️ Weekly analysis completed but no anomalies found or insufficient data.")
+
+    if daily_report_path and "Error" not in str(daily_report_path):
+        # Store the actual data, not just the path
+        generated_reports.append({
+            'type': 'daily',
+            'data': daily_report_path
+        })
+        print(f"✅ Daily analysis completed. Data length: {len(str(daily_report_path))} chars")
+    else:
+        print(f"❌ Daily analysis failed. Reason: {daily_report_path}")
 
 
     # --- 3. Final Summary ---
@@ -1703,16 +1818,25 @@ async def run_comprehensive_analysis(
             )
             print("✅ Summary Agent initialized. Generating executive summary...")
             
+            # Streaming mode (LLM_STREAM_OUTPUT) prints the summary while it is generated
+            stream_output = streaming_enabled()
+            if stream_output:
+                print("\n" + "=" * 80)
+                print("👑 EXECUTIVE SUMMARY 👑")
+                print("=" * 80)
+
             # Call the correct method with the correct arguments
             final_summary = await summary_agent.generate_comprehensive_summary(
                 weekly_comparative_analysis=weekly_comparative_analysis,
-                daily_single_analyses=daily_single_analyses
+                daily_single_analyses=daily_single_analyses,
+                stream_handler=console_stream_handler() if stream_output else None
             )
             
-            print("\n" + "=" * 80)
-            print("👑 EXECUTIVE SUMMARY 👑")
-            print("=" * 80)
-            print(final_summary)
+            if not stream_output:
+                print("\n" + "=" * 80)
+                print("👑 EXECUTIVE SUMMARY 👑")
+                print("=" * 80)
+                print(final_summary)
             final_result = final_summary
 
         except Exception as e:
@@ -1753,13 +1877,12 @@ async def analyze_single_day(target_date: datetime, segment: str, explanation_mo
         
         print(f"🔍 Collecting data for {len(node_paths)} hierarchical nodes: {node_paths}")
         
-        for node_path in node_paths:
-            await pbi_collector.collect_flexible_data_for_node(
-                node_path=node_path,
-                aggregation_days=1,
-                target_folder=str(temp_folder),
-                analysis_date=target_date
-            )
+        await pbi_collector.collect_flexible_data_for_nodes(
+            node_paths=node_paths,
+            aggregation_days=1,
+            target_folder=str(temp_folder),
+            analysis_date=target_date
+        )
         
         # Create detector for anomaly detection
         from dashboard_analyzer.anomaly_detection.flexible_detector import FlexibleAnomalyDetector
@@ -1897,7 +2020,6 @@ async def analyze_single_day(target_date: datetime, segment: str, explanation_mo
 async def run_flexible_analysis_silent(data_folder: str, analysis_date: datetime = None, date_parameter: str = None, anomaly_detection_mode: str = "target", baseline_periods: int = 7, causal_filter: str = "vs L7d", periods: int = 7):
     """Run flexible analysis completely silently"""
     import os
-    from contextlib import redirect_stdout, redirect_stderr
     
     # Extract aggregation days from folder name
     folder_name = Path(data_folder).name
@@ -1943,19 +2065,20 @@ async def run_flexible_analysis_silent(data_folder: str, analysis_date: datetime
     anomaly_periods = []
     
     # Suppress all output during analysis
-    with open(os.devnull, 'w') as devnull:
-        with redirect_stdout(devnull), redirect_stderr(devnull):
-            try:
-                for period in periods_to_analyze:
-                    period_anomalies, period_deviations, period_explanations, period_nps_values = await detector.analyze_period(data_folder, period, analysis_date, reference_period)
-                    
-                    # Check if any node has an anomaly
-                    has_anomaly = any(state in ['+', '-'] for state in period_anomalies.values())
-                    if has_anomaly:
-                        anomaly_periods.append(period)
-            
-            except Exception:
-                return None
+    with silenced_output():
+        try:
+            # All periods are scored in one pass over the node x period matrix
+            period_results = await detector.analyze_periods(data_folder, periods_to_analyze, analysis_date, reference_period)
+            for period in periods_to_analyze:
+                period_anomalies, period_deviations, period_explanations, period_nps_values = period_results[period]
+                
+                # Check if any node has an anomaly
+                has_anomaly = any(state in ['+', '-'] for state in period_anomalies.values())
+                if has_anomaly:
+                    anomaly_periods.append(period)
+        
+        except Exception:
+            return None
     
     # DEBUG: Check NPS values after silenced analysis
     print(f"🔍 DEBUG SILENT_ANALYSIS: period_nps_values type: {type(period_nps_values) if 'period_nps_values' in locals() else 'Not defined'}", file=sys.stderr)
@@ -2039,7 +2162,6 @@ async def run_flexible_analysis(data_folder: str, explanation_mode: str = "agent
 async def run_weekly_current_vs_average_analysis_silent(data_folder: str, analysis_date=None, anomaly_detection_mode: str = "target", baseline_periods: int = 7):
     """Run weekly analysis silently focusing only on current week (period 1) vs 3-week average"""
     import os
-    from contextlib import redirect_stdout, redirect_stderr
     
     # Extract aggregation days from folder name (should be 7 for weekly)
     folder_name = Path(data_folder).name
@@ -2065,19 +2187,18 @@ async def run_weekly_current_vs_average_analysis_silent(data_folder: str, analys
     anomaly_periods = []
     
     # Suppress all output during analysis
-    with open(os.devnull, 'w') as devnull:
-        with redirect_stdout(devnull), redirect_stderr(devnull):
-            try:
-                # Analyze only the current week (period 1)
-                period_anomalies, period_deviations, period_explanations, period_nps_values = await detector.analyze_period(data_folder, current_week_period, analysis_date)
-                
-                # Check if current week has any anomaly
-                has_anomaly = any(state in ['+', '-'] for state in period_anomalies.values())
-                if has_anomaly:
-                    anomaly_periods.append(current_week_period)
+    with silenced_output():
+        try:
+            # Analyze only the current week (period 1)
+            period_anomalies, period_deviations, period_explanations, period_nps_values = await detector.analyze_period(data_folder, current_week_period, analysis_date)
             
-            except Exception:
-                return None
+            # Check if current week has any anomaly
+            has_anomaly = any(state in ['+', '-'] for state in period_anomalies.values())
+            if has_anomaly:
+                anomaly_periods.append(current_week_period)
+        
+        except Exception:
+            return None
     
     return {
         'detector': detector,
@@ -2160,17 +2281,13 @@ async def show_silent_anomaly_analysis(analysis_data: dict, analysis_type: str,
         print(f"✅ No periods to analyze in {analysis_type.lower()} analysis")
         return []
     
-    # Show detailed analysis for selected periods
-    for period in periods_to_show:
-        print(f"\n{'='*60}")
-        print(f"{analysis_type} PERIOD {period} ANALYSIS")
-        print("="*60)
-        
-        # Get anomalies for this period
-        analysis_date = analysis_data.get('analysis_date')
-        date_parameter = analysis_data.get('date_parameter')
-        
-                # Calculate reference_period for baseline (same logic as in run_flexible_analysis_silent)
+    # Periods go through detection -> causal investigation -> interpretation as a staged
+    # pipeline: several periods are in flight at once, reports are printed in period order
+    analysis_date = analysis_data.get('analysis_date')
+    date_parameter = analysis_data.get('date_parameter')
+    
+    async def detect_period(period):
+        # Calculate reference_period for baseline (same logic as in run_flexible_analysis_silent)
         reference_period = None
         if analysis_date and date_parameter:
             if any(param in date_parameter for param in ['flight_local', 'available']):
@@ -2187,16 +2304,134 @@ async def show_silent_anomaly_analysis(analysis_data: dict, analysis_type: str,
         print(f"🔍 DEBUG DAILY_ANALYSIS: period_nps_values content: {period_nps_values}", file=sys.stderr)
         
         # Get date range using the correct method based on date_parameter
-        date_parameter = analysis_data.get('date_parameter')
-        
         if analysis_date and date_parameter in ['flight_local', 'available']:
             # For date_flight_local or default available: calculate relative to analysis_date
-            start_date, end_date = calculate_period_date_range(analysis_date, period, aggregation_days)
-            date_range = (start_date, end_date)
+            date_range = calculate_period_date_range(analysis_date, period, aggregation_days)
         else:
             # For other parameters or fallback: use interpreter method
             date_range = interpreter._get_period_date_range(period, aggregation_days)
         
+        # Calculate correct date range for the causal investigation if analysis_date is available
+        start_date, end_date = None, None
+        if analysis_date:
+            start_date, end_date = calculate_period_date_range(analysis_date, period, aggregation_days)
+        
+        node_requests = {}
+        for node_path in [node for node, state in period_anomalies.items() if state in ['+', '-']]:
+            anomaly_state = period_anomalies.get(node_path, "?")
+            
+            # Build NPS context for the causal agent and calculate anomaly magnitude
+            nps_context = ""
+            anomaly_magnitude = 0.0
+            if period_nps_values and node_path in period_nps_values:
+                nps_data = period_nps_values[node_path]
+                print(f"🔍 DEBUG SILENT_ANOMALY Causal agent NPS for {node_path}: {nps_data}", file=sys.stderr)
+                if isinstance(nps_data, dict):
+                    current_nps = nps_data.get('current', 'N/A')
+                    baseline_nps = nps_data.get('baseline', 'N/A')
+                    nps_context = f"Current NPS: {current_nps}, Baseline NPS: {baseline_nps}"
+                    # Calculate anomaly magnitude from NPS values
+                    if isinstance(current_nps, (int, float)) and isinstance(baseline_nps, (int, float)):
+                        anomaly_magnitude = current_nps - baseline_nps
+                else:
+                    nps_context = f"NPS: {nps_data}"
+            else:
+                print(f"🔍 DEBUG SILENT_ANOMALY Causal agent NO NPS for {node_path}", file=sys.stderr)
+            
+            node_requests[node_path] = dict(
+                target_period=period,
+                aggregation_days=aggregation_days,
+                anomaly_state=anomaly_state,
+                anomaly_magnitude=anomaly_magnitude,
+                start_date=start_date,
+                end_date=end_date,
+                nps_context=nps_context,
+                causal_filter=causal_filter,
+                comparison_start_date=comparison_start_date,
+                comparison_end_date=comparison_end_date
+            )
+        
+        return {
+            'period': period,
+            'period_anomalies': period_anomalies,
+            'period_deviations': period_deviations,
+            'period_nps_values': period_nps_values,
+            'date_range': date_range,
+            'parent_interpretations': generate_parent_interpretations(period_anomalies),
+            'node_requests': node_requests,
+            'explanations': {}
+        }
+    
+    async def investigate_period(state):
+        node_requests = state['node_requests']
+        if node_requests:
+            print(f"🔍 DEBUG: Collecting explanations for {len(node_requests)} anomalous nodes: {list(node_requests)}", file=sys.stderr)
+            # Independent nodes are investigated concurrently; results come back in tree order
+            state['explanations'] = await interpreter.explain_anomalies(
+                node_requests,
+                timeout=1500.0  # 25 minutes per node for complex Claude Sonnet 4 analysis
+            )
+            for node_path, explanation in state['explanations'].items():
+                print(f"🔍 EXPLANATION COLLECTED for {node_path}: {len(explanation) if explanation else 0} chars", file=sys.stderr)
+                if explanation:
+                    print(f"   Preview: {explanation[:300]}...", file=sys.stderr)
+        return state
+    
+    async def interpret_period(state):
+        state['ai_interpretation'] = None
+        state['used_causal_explanations'] = False
+        if not ai_available:
+            return state
+        
+        explanations = state['explanations']
+        date_range = state['date_range']
+        date_param = date_range[0].strftime('%Y-%m-%d') if date_range and date_range[0] else None
+        try:
+            # Check if we have causal agent explanations that should go directly to interpreter
+            causal_explanations = {}
+            for node_path, explanation in explanations.items():
+                if explanation and ("🤖 **AGENT CAUSAL ANALYSIS**" in explanation or "AI Causal Investigation:" in explanation):
+                    # This is a full causal agent explanation - pass it directly
+                    if "🤖 **AGENT CAUSAL ANALYSIS**" in explanation:
+                        clean_explanation = explanation.replace("🤖 **AGENT CAUSAL ANALYSIS**\n", "").strip()
+                    else:
+                        clean_explanation = explanation.replace("• AI Causal Investigation:", "").strip()
+                    causal_explanations[node_path] = clean_explanation
+            
+            if causal_explanations:
+                # Use direct causal agent explanation instead of tree format
+                state['used_causal_explanations'] = True
+                if len(causal_explanations) == 1:
+                    # For single node with causal explanation, pass it directly
+                    ai_input = next(iter(causal_explanations.values()))
+                else:
+                    # Multiple causal explanations - combine them
+                    ai_input = f"Multiple anomalous nodes analyzed:\n\n"
+                    for node_path, explanation in causal_explanations.items():
+                        ai_input += f"NODO: {node_path}\n{explanation}\n\n"
+            else:
+                # Fallback to tree format for non-causal explanations
+                ai_input = build_ai_input_string(state['period'], state['period_anomalies'], state['period_deviations'],
+                                                 state['parent_interpretations'], explanations, date_range, segment,
+                                                 state['period_nps_values'])
+                debug_print(f"AI input string length: {len(ai_input)} characters")
+                debug_print(f"AI input preview: {ai_input[:500]}...")
+            
+            state['ai_interpretation'] = await asyncio.wait_for(
+                ai_agent.interpret_anomaly_tree(ai_input, date_param, segment),
+                timeout=600.0
+            )
+        except Exception as e:
+            state['ai_interpretation'] = f"AI interpretation failed: {str(e)}"
+        return state
+    
+    async def report_period(period, state):
+        print_progress(f"   ▶ {analysis_type} period {period} analyzed")
+        print(f"\n{'='*60}")
+        print(f"{analysis_type} PERIOD {period} ANALYSIS")
+        print("="*60)
+        
+        date_range = state['date_range']
         if date_range:
             start_date, end_date = date_range
             print(f"📅 Date Range: {start_date.strftime('%Y-%m-%d')} to {end_date.strftime('%Y-%m-%d')}")
@@ -2204,155 +2439,35 @@ async def show_silent_anomaly_analysis(analysis_data: dict, analysis_type: str,
         else:
             date_range_str = "Unknown dates"
         
-        # Generate parent interpretations
-        parent_interpretations = generate_parent_interpretations(period_anomalies)
-        
-        # Collect explanations for anomalous nodes silently
-        explanations = {}
-        nodes_with_anomalies = [node for node, state in period_anomalies.items() if state in ['+', '-']]
-        
-        if nodes_with_anomalies:
-            # DEBUG: Temporarily NOT suppressing output to see what explanations are being collected
-            print(f"🔍 DEBUG: Collecting explanations for {len(nodes_with_anomalies)} anomalous nodes: {nodes_with_anomalies}", file=sys.stderr)
-            # with open(os.devnull, 'w') as devnull:
-            #     with redirect_stdout(devnull), redirect_stderr(devnull):
-            if True:  # Changed from suppressed context
-                    for node_path in nodes_with_anomalies:
-                        try:
-                            anomaly_state = period_anomalies.get(node_path, "?")
-                            
-                            # Calculate correct date range if analysis_date is available
-                            start_date, end_date = None, None
-                            analysis_date = analysis_data.get('analysis_date')
-                            if analysis_date:
-                                start_date, end_date = calculate_period_date_range(analysis_date, period, aggregation_days)
-                            
-                            # Build NPS context for the causal agent and calculate anomaly magnitude
-                            nps_context = ""
-                            anomaly_magnitude = 0.0
-                            print(f"🔍 DEBUG SILENT_ANOMALY NPS BUILD: period_nps_values keys: {list(period_nps_values.keys()) if period_nps_values else 'None'}", file=sys.stderr)
-                            print(f"🔍 DEBUG SILENT_ANOMALY NPS BUILD: Looking for node_path: {node_path}", file=sys.stderr)
-                            if period_nps_values and node_path in period_nps_values:
-                                nps_data = period_nps_values[node_path]
-                                print(f"🔍 DEBUG SILENT_ANOMALY Causal agent NPS for {node_path}: {nps_data}", file=sys.stderr)
-                                if isinstance(nps_data, dict):
-                                    current_nps = nps_data.get('current', 'N/A')
-                                    baseline_nps = nps_data.get('baseline', 'N/A')
-                                    nps_context = f"Current NPS: {current_nps}, Baseline NPS: {baseline_nps}"
-                                    # Calculate anomaly magnitude from NPS values
-                                    if isinstance(current_nps, (int, float)) and isinstance(baseline_nps, (int, float)):
-                                        anomaly_magnitude = current_nps - baseline_nps
-                                else:
-                                    nps_context = f"NPS: {nps_data}"
-                            else:
-                                print(f"🔍 DEBUG SILENT_ANOMALY Causal agent NO NPS for {node_path}", file=sys.stderr)
-                            
-                            explanation = await asyncio.wait_for(
-                                interpreter.explain_anomaly(
-                                    node_path=node_path,
-                                    target_period=period,
-                                    aggregation_days=aggregation_days,
-                                    anomaly_state=anomaly_state,
-                                    anomaly_magnitude=anomaly_magnitude,  # ✅ Now passing anomaly magnitude
-                                    start_date=start_date,
-                                    end_date=end_date,
-                                    nps_context=nps_context,  # ✅ Now passing NPS context
-                                    causal_filter=causal_filter,
-                                    comparison_start_date=comparison_start_date,
-                                    comparison_end_date=comparison_end_date
-                                ),
-                                timeout=1500.0  # 25 minutes for complex Claude Sonnet 4 analysis
-                            )
-                            explanations[node_path] = explanation
-                            print(f"🔍 EXPLANATION COLLECTED for {node_path}: {len(explanation) if explanation else 0} chars", file=sys.stderr)
-                            if explanation:
-                                print(f"   Preview: {explanation[:300]}...", file=sys.stderr)
-                        except Exception:
-                            explanations[node_path] = "Analysis timeout"
-        
         # Show the tree
-        analysis_date = analysis_data.get('analysis_date')
-        date_parameter = analysis_data.get('date_parameter')
         await print_enhanced_tree_with_explanations_and_interpretations(
-            period_anomalies, period_deviations, explanations, parent_interpretations,
+            state['period_anomalies'], state['period_deviations'], state['explanations'], state['parent_interpretations'],
             aggregation_days, period, date_range, segment, analysis_date, date_parameter
         )
         
         # AI Interpretation
-        ai_interpretation = None
         if ai_available:
             print(f"\n🤖 AI INTERPRETATION:")
             print("-" * 40)
-            
-            try:
-                # Check if we have causal agent explanations that should go directly to interpreter
-                causal_explanations = {}
-                for node_path, explanation in explanations.items():
-                    if explanation and ("🤖 **AGENT CAUSAL ANALYSIS**" in explanation or "AI Causal Investigation:" in explanation):
-                        # This is a full causal agent explanation - pass it directly
-                        if "🤖 **AGENT CAUSAL ANALYSIS**" in explanation:
-                            clean_explanation = explanation.replace("🤖 **AGENT CAUSAL ANALYSIS**\n", "").strip()
-                        else:
-                            clean_explanation = explanation.replace("• AI Causal Investigation:", "").strip()
-                        causal_explanations[node_path] = clean_explanation
-                
-                if causal_explanations:
-                    # Use direct causal agent explanation instead of tree format
-                    print("🔍 Using direct causal agent explanation for tree interpretation")
-                    
-                    # For single node with causal explanation, pass it directly
-                    if len(causal_explanations) == 1:
-                        node_path, causal_explanation = next(iter(causal_explanations.items()))
-                        
-                        ai_interpretation = await asyncio.wait_for(
-                            ai_agent.interpret_anomaly_tree(causal_explanation, 
-                                                           start_date.strftime('%Y-%m-%d') if date_range else None, segment),
-                            timeout=600.0
-                        )
-                    else:
-                        # Multiple causal explanations - combine them
-                        combined_explanation = f"Multiple anomalous nodes analyzed:\n\n"
-                        for node_path, explanation in causal_explanations.items():
-                            combined_explanation += f"NODO: {node_path}\n{explanation}\n\n"
-                        
-                        ai_interpretation = await asyncio.wait_for(
-                            ai_agent.interpret_anomaly_tree(combined_explanation, 
-                                                           start_date.strftime('%Y-%m-%d') if date_range else None, segment),
-                            timeout=600.0
-                        )
-                else:
-                    # Fallback to tree format for non-causal explanations
-                    ai_input = build_ai_input_string(period, period_anomalies, period_deviations, 
-                                                     parent_interpretations, explanations, date_range, segment, period_nps_values)
-                    
-                    debug_print(f"AI input string length: {len(ai_input)} characters")
-                    debug_print(f"AI input preview: {ai_input[:500]}...")
-                    
-                    # Fix: Extract start_date from date_range if available
-                    date_param = None
-                    if date_range and len(date_range) >= 2:
-                        range_start_date, _ = date_range
-                        if range_start_date:
-                            date_param = range_start_date.strftime('%Y-%m-%d')
-                    
-                    ai_interpretation = await asyncio.wait_for(
-                        ai_agent.interpret_anomaly_tree(ai_input, date_param, segment),
-                        timeout=600.0
-                    )
-                
-                print(ai_interpretation)
-                
-            except Exception as e:
-                ai_interpretation = f"AI interpretation failed: {str(e)}"
-                print(ai_interpretation)
+            if state['used_causal_explanations']:
+                print("🔍 Using direct causal agent explanation for tree interpretation")
+            print(state['ai_interpretation'])
         
         # Collect period data for summary
-        period_data = {
+        all_periods_data.append({
             'period': period,
             'date_range': date_range_str,
-            'ai_interpretation': ai_interpretation or "No AI interpretation available"
-        }
-        all_periods_data.append(period_data)
+            'ai_interpretation': state['ai_interpretation'] or "No AI interpretation available"
+        })
+    
+    pipeline = StagedPipeline([
+        PipelineStage("detect", detect_period, get_stage_workers("detect", 1)),
+        PipelineStage("investigate", investigate_period, get_stage_workers("investigate", 2)),
+        PipelineStage("interpret", interpret_period, get_stage_workers("interpret", 2))
+    ])
+    await pipeline.run(periods_to_show, on_result=report_period)
+    if len(periods_to_show) > 1:
+        pipeline.print_report(f"{analysis_type} period pipeline")
     
     return all_periods_data
 
@@ -2968,6 +3083,10 @@ async def main():
     parser.add_argument('--causal-comparison-dates', nargs=2, metavar=('START_DATE', 'END_DATE'),
                         help='Comparison period dates (YYYY-MM-DD YYYY-MM-DD) when using --causal-filter-comparison "vs Sel. Period"')
     
+    # Power BI download concurrency
+    parser.add_argument('--pbi-max-in-flight', type=int, default=None,
+                       help='Maximum number of concurrent Power BI queries during data download (default: PBI_MAX_IN_FLIGHT env var or 6)')
+    
     # Debug mode parameter
     parser.add_argument('--debug', action='store_true',
                        help='Enable debug mode with verbose print statements')
@@ -2999,6 +3118,9 @@ async def main():
     if DEBUG_MODE:
         print("🔍 DEBUG MODE ENABLED - Verbose output activated")
     
+    if args.pbi_max_in_flight:
+        get_query_scheduler().set_max_in_flight(args.pbi_max_in_flight)
+    
     # Calculate the analysis start date based on date parameters
     today = datetime.now().date()
     pbi_lag_days = 4  # PBI dashboard has 4-day lag
@@ -3105,6 +3227,9 @@ async def main():
         print(f"\n❌ Error during analysis: {str(e)}")
         import traceback
         print(f"Debug info: {traceback.format_exc()}")
+    finally:
+        # Close the pooled Power BI sessions on the loop that opened them
+        await get_connection_pool().close()
 
 def print_full_tree(anomalies, get_state_description, get_deviation_text, print_interpretation, print_explanation):
     """Print the complete Global tree"""